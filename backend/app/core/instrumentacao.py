@@ -0,0 +1,174 @@
+"""
+Instrumentação da geração de PDF
+
+- Tempo por etapa (distribuição, escala, vistas, tabela, save...)
+- Contadores de operações de desenho e chamadas de stringWidth
+- Captura opcional com cProfile (COREWOOD_PERFIL_RENDER=1 em todas, ou
+  header X-Render-Profile: 1 na requisição se COREWOOD_PERFIL_HEADER=1;
+  sem a variável o header é ignorado: em produção qualquer usuário logado
+  poderia ligar o profiler)
+
+Uso:
+    with medir_render() as metricas:
+        gerador.gerar_pdf(...)
+    metricas.registrar(arquivo=...)          # logger "app.metrics"
+    FileResponse(..., headers=metricas.headers())
+
+Fora de um medir_render, etapa()/contar() não fazem nada.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+logger_metricas = logging.getLogger("app.metrics")
+
+# Métodos do canvas contados como operação de desenho
+OPERACOES_CANVAS = (
+    'line', 'rect', 'circle', 'drawString', 'drawCentredString',
+    'drawRightString', 'drawImage', 'doForm',
+)
+
+# Funções listadas no resumo do cProfile
+LIMITE_PERFIL = 25
+
+_atual: ContextVar[Optional["MetricasRender"]] = ContextVar("metricas_render", default=None)
+
+
+@dataclass
+class MetricasRender:
+    """Medições de uma renderização"""
+    etapas: Dict[str, float] = field(default_factory=dict)      # ms acumulados por etapa
+    contadores: Dict[str, int] = field(default_factory=dict)
+    total_ms: float = 0.0
+    perfil: Optional[str] = None                                 # resumo do pstats
+
+    def somar_etapa(self, nome: str, ms: float):
+        self.etapas[nome] = self.etapas.get(nome, 0.0) + ms
+
+    def contar(self, nome: str, quantidade: int = 1):
+        self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def server_timing(self) -> str:
+        """Valor do header Server-Timing (aparece no DevTools do navegador)"""
+        itens = [f"{nome};dur={ms:.1f}" for nome, ms in self.etapas.items()]
+        itens.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(itens)
+
+    def headers(self) -> Dict[str, str]:
+        """Headers HTTP com as métricas"""
+        return {
+            'Server-Timing': self.server_timing(),
+            'X-Render-Metrics': ";".join(f"{nome}={valor}" for nome, valor in sorted(self.contadores.items())),
+        }
+
+    def registrar(self, **contexto):
+        """Envia as métricas para o logger "app.metrics" (campos estruturados em extra)"""
+        logger_metricas.info(
+            "⏱️ PDF renderizado em %.1fms | %s", self.total_ms, self.server_timing(),
+            extra={'etapas': {k: round(v, 2) for k, v in self.etapas.items()},
+                   'contadores': dict(self.contadores), **contexto}
+        )
+        if self.perfil:
+            logger_metricas.info("🔬 Perfil da renderização:\n%s", self.perfil, extra=contexto)
+
+
+def metricas_atuais() -> Optional[MetricasRender]:
+    """Métricas da renderização em andamento (None se não estiver medindo)"""
+    return _atual.get()
+
+
+def _ligado(valor: Optional[str]) -> bool:
+    return str(valor or "").strip().lower() in ("1", "true", "sim")
+
+
+def perfil_ativado(header: Optional[str] = None) -> bool:
+    """
+    cProfile ligado por COREWOOD_PERFIL_RENDER, ou pelo header da requisição
+    quando COREWOOD_PERFIL_HEADER permite
+    """
+    if _ligado(os.getenv("COREWOOD_PERFIL_RENDER")):
+        return True
+    return _ligado(os.getenv("COREWOOD_PERFIL_HEADER")) and _ligado(header)
+
+
+def _resumo_perfil(profiler: cProfile.Profile) -> str:
+    saida = io.StringIO()
+    pstats.Stats(profiler, stream=saida).sort_stats("cumulative").print_stats(LIMITE_PERFIL)
+
+    pasta = os.getenv("COREWOOD_PERFIL_DIR")
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+        # uuid: renders simultâneos no mesmo segundo e processo não se sobrescrevem
+        nome = f"render_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{uuid.uuid4().hex[:8]}.prof"
+        profiler.dump_stats(os.path.join(pasta, nome))
+    return saida.getvalue()
+
+
+@contextmanager
+def medir_render(perfil: bool = False) -> Iterator[MetricasRender]:
+    """Ativa a medição para o bloco; com perfil=True também roda o cProfile"""
+    metricas = MetricasRender()
+    token = _atual.set(metricas)
+    profiler = cProfile.Profile() if perfil else None
+    inicio = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        yield metricas
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            metricas.perfil = _resumo_perfil(profiler)
+        metricas.total_ms = (time.perf_counter() - inicio) * 1000
+        _atual.reset(token)
+
+
+@contextmanager
+def etapa(nome: str):
+    """Cronometra o bloco na etapa `nome` (acumula se repetir, ex: uma vez por página)"""
+    metricas = _atual.get()
+    if metricas is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        metricas.somar_etapa(nome, (time.perf_counter() - inicio) * 1000)
+
+
+def contar(nome: str, quantidade: int = 1):
+    """Soma num contador da renderização em andamento"""
+    metricas = _atual.get()
+    if metricas is not None:
+        metricas.contar(nome, quantidade)
+
+
+def _contando(metodo, metricas: MetricasRender, *nomes: str):
+    def chamada(*args, **kwargs):
+        for nome in nomes:
+            metricas.contar(nome)
+        return metodo(*args, **kwargs)
+    return chamada
+
+
+def instrumentar_canvas(c):
+    """
+    Conta as operações de desenho e os stringWidth deste canvas.
+    Sem medição ativa o canvas fica intocado (custo zero).
+    """
+    metricas = _atual.get()
+    if metricas is None:
+        return c
+    for nome in OPERACOES_CANVAS:
+        setattr(c, nome, _contando(getattr(c, nome), metricas, 'desenho', f'desenho.{nome}'))
+    setattr(c, 'stringWidth', _contando(c.stringWidth, metricas, 'stringWidth'))
+    return c
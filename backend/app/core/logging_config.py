@@ -0,0 +1,124 @@
+"""
+Configuração de logging estruturado da API
+
+- Nível global via COREWOOD_LOG_LEVEL (padrão INFO)
+- Níveis por módulo via COREWOOD_LOG_LEVELS ("app.parser=DEBUG,app.routes.editor=WARNING")
+- Formato via COREWOOD_LOG_FORMAT ("texto" ou "json")
+- Escrita não bloqueante: os handlers só enfileiram, uma thread grava no stdout
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from typing import Dict, Optional
+
+LOGGER_RAIZ = "app"
+
+# Atributos padrão de LogRecord (o que sobrar é "extra" do log estruturado)
+_ATRIBUTOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class FormatterJSON(logging.Formatter):
+    """Formata cada registro como uma linha JSON (inclui campos passados em extra=)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for chave, valor in record.__dict__.items():
+            if chave not in _ATRIBUTOS_PADRAO and not chave.startswith("_"):
+                dados[chave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados["exc"] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class _QueueHandlerApp(logging.handlers.QueueHandler):
+    """
+    QueueHandler que não formata o registro antes de enfileirar.
+
+    O prepare() padrão junta o traceback ao msg e apaga o exc_info, então o
+    FormatterJSON nunca via a exceção. Aqui o msg fica só com a mensagem e o
+    traceback já formatado vai em exc_text (o Formatter de texto também o
+    usa), para a thread do listener montar a saída.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def _parse_niveis(texto: str) -> Dict[str, str]:
+    """Converte "modulo=NIVEL,modulo2=NIVEL" em dict"""
+    niveis = {}
+    for item in texto.split(","):
+        if "=" not in item:
+            continue
+        modulo, nivel = item.split("=", 1)
+        if modulo.strip():
+            niveis[modulo.strip()] = nivel.strip().upper()
+    return niveis
+
+
+def configurar_logging(nivel: str = None, niveis_modulos: Dict[str, str] = None,
+                       formato: str = None) -> logging.Logger:
+    """
+    Configura o logger "app" com fila + listener (chamada idempotente).
+
+    Args:
+        nivel: nível global (padrão: COREWOOD_LOG_LEVEL ou INFO)
+        niveis_modulos: níveis por logger, ex: {"app.parser": "DEBUG"}
+        formato: "texto" ou "json" (padrão: COREWOOD_LOG_FORMAT ou texto)
+
+    Returns:
+        Logger raiz da aplicação
+    """
+    global _listener
+
+    nivel = (nivel or os.getenv("COREWOOD_LOG_LEVEL", "INFO")).upper()
+    formato = formato or os.getenv("COREWOOD_LOG_FORMAT", "texto")
+    niveis = _parse_niveis(os.getenv("COREWOOD_LOG_LEVELS", ""))
+    niveis.update(niveis_modulos or {})
+
+    raiz = logging.getLogger(LOGGER_RAIZ)
+    raiz.setLevel(nivel)
+    for modulo, nivel_modulo in niveis.items():
+        logging.getLogger(modulo).setLevel(nivel_modulo)
+
+    if _listener is not None:
+        return raiz
+
+    handler_saida = logging.StreamHandler(sys.stdout)
+    if formato == "json":
+        handler_saida.setFormatter(FormatterJSON())
+    else:
+        handler_saida.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S"
+        ))
+
+    fila = queue.SimpleQueue()
+    raiz.addHandler(_QueueHandlerApp(fila))
+    raiz.propagate = False
+
+    _listener = logging.handlers.QueueListener(fila, handler_saida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    return raiz
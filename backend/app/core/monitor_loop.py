@@ -0,0 +1,102 @@
+"""
+Monitor de atraso do event loop
+
+Uma task dorme COREWOOD_LOOP_INTERVALO_MS (padrão 50) e mede quanto acordou
+atrasada: é o tempo em que o loop ficou preso em código síncrono dentro de
+rota async (parse, geração de PDF/MPR...), atrasando todas as outras
+requisições. Atraso acima de COREWOOD_LOOP_ALERTA_MS (padrão 250) vai para
+o log como aviso.
+
+Ligado com COREWOOD_MONITOR_LOOP=1; estatísticas em GET /health/loop
+(?zerar=true recomeça a janela, usado pelo benchmarks.carga entre fases).
+"""
+import asyncio
+import logging
+import os
+import statistics
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_AMOSTRAS = 20000  # ~16min com intervalo de 50ms
+
+
+def _env_ms(nome: str, padrao: float) -> float:
+    try:
+        return max(1.0, float(os.getenv(nome, padrao)))
+    except ValueError:
+        return padrao
+
+
+def monitor_ativado() -> bool:
+    return os.getenv("COREWOOD_MONITOR_LOOP", "").lower() in ("1", "true", "sim")
+
+
+class MonitorLoop:
+    """Amostras de atraso (ms) do event loop em que foi iniciado"""
+
+    def __init__(self, intervalo_ms: float = 50, alerta_ms: float = 250):
+        self.intervalo_ms = intervalo_ms
+        self.alerta_ms = alerta_ms
+        self._amostras: Deque[float] = deque(maxlen=MAX_AMOSTRAS)
+        self._task: Optional[asyncio.Task] = None
+        self._inicio_janela = time.monotonic()
+
+    @property
+    def ativo(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def iniciar(self):
+        """Cria a task no loop atual (chamar de dentro do loop, ex.: startup)"""
+        if not self.ativo:
+            self._task = asyncio.get_running_loop().create_task(self._medir())
+            logger.info("⏱️ Monitor do event loop ligado (intervalo %.0fms)", self.intervalo_ms)
+
+    def parar(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _medir(self):
+        intervalo = self.intervalo_ms / 1000
+        while True:
+            inicio = time.perf_counter()
+            await asyncio.sleep(intervalo)
+            atraso = max(0.0, (time.perf_counter() - inicio - intervalo) * 1000)
+            self._amostras.append(atraso)
+            if atraso > self.alerta_ms:
+                logger.warning("🐢 Event loop travado por %.0fms", atraso)
+
+    def zerar(self):
+        self._amostras.clear()
+        self._inicio_janela = time.monotonic()
+
+    def estatisticas(self, zerar: bool = False) -> Dict:
+        """p50/p95/p99/máximo do atraso na janela atual (ms)"""
+        amostras = sorted(self._amostras)
+        resumo = {
+            'ativo': self.ativo,
+            'intervalo_ms': self.intervalo_ms,
+            'janela_s': round(time.monotonic() - self._inicio_janela, 1),
+            'amostras': len(amostras),
+        }
+        if len(amostras) >= 2:
+            quantis = statistics.quantiles(amostras, n=100, method='inclusive')
+            resumo.update({
+                'p50_ms': round(quantis[49], 2),
+                'p95_ms': round(quantis[94], 2),
+                'p99_ms': round(quantis[98], 2),
+                'max_ms': round(amostras[-1], 2),
+                'acima_alerta': sum(1 for a in amostras if a > self.alerta_ms),
+            })
+        if zerar:
+            self.zerar()
+        return resumo
+
+
+monitor_loop = MonitorLoop(
+    intervalo_ms=_env_ms("COREWOOD_LOOP_INTERVALO_MS", 50),
+    alerta_ms=_env_ms("COREWOOD_LOOP_ALERTA_MS", 250),
+)
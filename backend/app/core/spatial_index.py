@@ -0,0 +1,93 @@
+"""
+Índice espacial para busca de furos por raio
+
+Hash em grade (células do tamanho da tolerância) com consulta por distância
+euclidiana real: dois pontos a menos de `raio` um do outro sempre se
+encontram, independente de que lado da linha da grade caíram.
+Funciona em qualquer número de dimensões (1D para coordenada fixa de furo
+horizontal, 2D para posição X/Y, etc).
+"""
+import math
+from itertools import product
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+class IndiceEspacial:
+    """Hash espacial em grade com buscas por raio, separado por categoria"""
+
+    def __init__(self, tamanho_celula: float = 1.0):
+        if tamanho_celula <= 0:
+            raise ValueError("tamanho_celula deve ser positivo")
+        self.tamanho_celula = float(tamanho_celula)
+        # categoria -> célula -> [(ponto, ordem, valor)]
+        self._celulas: Dict[Hashable, Dict[Tuple[int, ...], List[Tuple[Tuple[float, ...], int, Any]]]] = {}
+        self._total = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    def _celula(self, ponto: Sequence[float]) -> Tuple[int, ...]:
+        return tuple(math.floor(c / self.tamanho_celula) for c in ponto)
+
+    def inserir(self, ponto: Sequence[float], valor: Any = None, categoria: Hashable = None):
+        """Insere um ponto (com valor associado) na categoria informada"""
+        ponto = tuple(float(c) for c in ponto)
+        grade = self._celulas.setdefault(categoria, {})
+        grade.setdefault(self._celula(ponto), []).append((ponto, self._total, valor))
+        self._total += 1
+
+    def buscar(self, ponto: Sequence[float], raio: float, categoria: Hashable = None) -> List[Any]:
+        """
+        Retorna os valores a até `raio` do ponto (distância euclidiana),
+        do mais próximo para o mais distante (empate: ordem de inserção)
+        """
+        grade = self._celulas.get(categoria)
+        if not grade:
+            return []
+
+        ponto = tuple(float(c) for c in ponto)
+        faixas = [
+            range(math.floor((c - raio) / self.tamanho_celula),
+                  math.floor((c + raio) / self.tamanho_celula) + 1)
+            for c in ponto
+        ]
+        raio2 = raio * raio
+
+        encontrados = []
+        for celula in product(*faixas):
+            for outro, ordem, valor in grade.get(celula, ()):
+                dist2 = sum((a - b) ** 2 for a, b in zip(ponto, outro))
+                if dist2 <= raio2:
+                    encontrados.append((dist2, ordem, valor))
+
+        encontrados.sort(key=lambda e: (e[0], e[1]))
+        return [valor for _, _, valor in encontrados]
+
+    def mais_proximo(self, ponto: Sequence[float], raio: float, categoria: Hashable = None) -> Optional[Any]:
+        """Valor mais próximo a até `raio` do ponto, ou None"""
+        encontrados = self.buscar(ponto, raio, categoria)
+        return encontrados[0] if encontrados else None
+
+    def existe(self, ponto: Sequence[float], raio: float, categoria: Hashable = None) -> bool:
+        """True se há algum ponto da categoria a até `raio`"""
+        return bool(self.buscar(ponto, raio, categoria))
+
+
+def deduplicar(pontos: Sequence[Sequence[float]], tolerancia: float,
+               categorias: Sequence[Hashable] = None) -> List[int]:
+    """
+    Remove pontos repetidos: um ponto é descartado se já existe um ponto
+    mantido da mesma categoria a até `tolerancia` dele.
+
+    Returns:
+        Índices dos pontos mantidos, na ordem original
+    """
+    indice = IndiceEspacial(tolerancia)
+    mantidos = []
+    for i, ponto in enumerate(pontos):
+        categoria = categorias[i] if categorias is not None else None
+        if indice.existe(ponto, tolerancia, categoria):
+            continue
+        indice.inserir(ponto, i, categoria)
+        mantidos.append(i)
+    return mantidos
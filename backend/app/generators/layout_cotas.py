@@ -0,0 +1,461 @@
+"""
+Layout das cotas e especificações dos desenhos técnicos
+
+Calcula ANTES de desenhar a posição de todas as linhas de cota e textos,
+a partir da geometria já em escala, e devolve uma lista plana de operações
+(Linha, Circulo, Texto). O renderizador só percorre a lista.
+
+Rótulos que se sobreporiam (cotas Y na mesma coluna, cotas X na mesma
+linha, especificações de furos vizinhos) são afastados por uma varredura
+de intervalos: cada rótulo fica o mais perto possível da sua posição ideal
+sem encostar no vizinho, e a linha de cota ganha um cotovelo até ele.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+from reportlab.lib import colors
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import getAscentDescent, stringWidth
+
+from ..core.instrumentacao import contar
+
+COR_COTA = "#A5A6A68A"
+COR_TEXTO = "#000000"
+
+FONTE = "Helvetica"
+TAMANHO_COTA = 11
+TAMANHO_ESPECIFICACAO = 10
+
+OFFSET_EXTERNO = 15   # linha de cota sai 15pt para fora da peça
+DOBRA = 6             # comprimento do cotovelo quando o rótulo é afastado
+FOLGA = 1             # espaço mínimo entre dois rótulos
+TAMANHO_SETA = 2
+
+
+# ----------------------------------------------------------------------
+# Operações de desenho
+# ----------------------------------------------------------------------
+@dataclass(frozen=True)
+class Linha:
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    cor: Any = COR_COTA
+    espessura: float = 0.3
+
+
+@dataclass(frozen=True)
+class Circulo:
+    x: float
+    y: float
+    raio: float
+    cor: Any = colors.black
+    espessura: float = 0.5
+
+
+@dataclass(frozen=True)
+class Texto:
+    """Texto já alinhado: (x, y) é a origem do drawString (rotacao 90 = de baixo para cima)"""
+    x: float
+    y: float
+    texto: str
+    tamanho: float = TAMANHO_COTA
+    rotacao: int = 0
+    cor: Any = COR_TEXTO
+    fonte: str = FONTE
+
+
+Operacao = Union[Linha, Circulo, Texto]
+
+
+@lru_cache(maxsize=32)
+def _cor(valor: str):
+    return colors.HexColor(valor)
+
+
+def _resolver_cor(cor):
+    return _cor(cor) if isinstance(cor, str) else cor
+
+
+def desenhar_operacoes(c, operacoes: Sequence[Operacao]):
+    """Desenha a lista de operações, trocando cor/espessura/fonte só quando mudam"""
+    traco = espessura = preenchimento = fonte = None
+
+    for op in operacoes:
+        if isinstance(op, Texto):
+            if op.cor != preenchimento:
+                c.setFillColor(_resolver_cor(op.cor))
+                preenchimento = op.cor
+            if (op.fonte, op.tamanho) != fonte:
+                c.setFont(op.fonte, op.tamanho)
+                fonte = (op.fonte, op.tamanho)
+            if op.rotacao:
+                c.saveState()
+                c.translate(op.x, op.y)
+                c.rotate(op.rotacao)
+                c.drawString(0, 0, op.texto)
+                c.restoreState()
+            else:
+                c.drawString(op.x, op.y, op.texto)
+            continue
+
+        if op.cor != traco:
+            c.setStrokeColor(_resolver_cor(op.cor))
+            traco = op.cor
+        if op.espessura != espessura:
+            c.setLineWidth(op.espessura)
+            espessura = op.espessura
+        if isinstance(op, Linha):
+            c.line(op.x1, op.y1, op.x2, op.y2)
+        else:
+            c.circle(op.x, op.y, op.raio, stroke=1, fill=0)
+
+    c.setFillColor(colors.black)
+    c.setStrokeColor(colors.black)
+
+
+# ----------------------------------------------------------------------
+# Varredura de intervalos
+# ----------------------------------------------------------------------
+def espalhar(centros: Sequence[float], tamanhos: Sequence[float],
+             maximo: Optional[float] = None) -> List[float]:
+    """
+    Posiciona intervalos numa reta sem sobreposição, o mais perto possível
+    dos centros desejados (mínimos quadrados), mantendo a ordem.
+
+    Varre os intervalos ordenados; quando um invade o bloco anterior, os dois
+    viram um bloco só, centrado na média das posições desejadas.
+    Com `maximo`, nenhum intervalo passa desse limite (os blocos descem).
+
+    Returns:
+        Novos centros, na mesma ordem de `centros`
+    """
+    ordem = sorted(range(len(centros)), key=lambda i: (centros[i], i))
+
+    # Bloco: [início na ordem, nº de itens, soma dos inícios desejados, tamanho total]
+    blocos = []
+    for k, i in enumerate(ordem):
+        bloco = [k, 1, centros[i] - tamanhos[i] / 2, tamanhos[i]]
+        while blocos:
+            anterior = blocos[-1]
+            if anterior[2] / anterior[1] + anterior[3] <= bloco[2] / bloco[1]:
+                break
+            blocos.pop()
+            # Itens do bloco atual ficam deslocados do tamanho do anterior
+            bloco = [anterior[0], anterior[1] + bloco[1],
+                     anterior[2] + bloco[2] - bloco[1] * anterior[3],
+                     anterior[3] + bloco[3]]
+        blocos.append(bloco)
+
+    # Início de cada bloco; com limite, desce os blocos de cima para baixo
+    inicios = [soma / n for _, n, soma, _ in blocos]
+    movidos = [n > 1 for _, n, _, _ in blocos]
+    if maximo is not None:
+        teto = maximo
+        for b in range(len(blocos) - 1, -1, -1):
+            if inicios[b] + blocos[b][3] > teto:
+                inicios[b] = teto - blocos[b][3]
+                movidos[b] = True
+            teto = inicios[b]
+
+    novos = list(centros)
+    for (inicio, n, _, _), posicao, movido in zip(blocos, inicios, movidos):
+        if not movido:
+            continue  # Rótulo sozinho fica exatamente onde queria
+        for i in ordem[inicio:inicio + n]:
+            novos[i] = posicao + tamanhos[i] / 2
+            posicao += tamanhos[i]
+    return novos
+
+
+def agrupar_sobrepostos(intervalos: Sequence[Tuple[float, float]]) -> List[List[int]]:
+    """Grupos de intervalos (início, fim) que se sobrepõem direta ou indiretamente"""
+    ordem = sorted(range(len(intervalos)), key=lambda i: intervalos[i][0])
+    grupos = []
+    fim_atual = None
+    for i in ordem:
+        inicio, fim = intervalos[i]
+        if fim_atual is None or inicio > fim_atual:
+            grupos.append([i])
+            fim_atual = fim
+        else:
+            grupos[-1].append(i)
+            fim_atual = max(fim_atual, fim)
+    return grupos
+
+
+# ----------------------------------------------------------------------
+# Rótulos de cota
+# ----------------------------------------------------------------------
+def _altura_texto(tamanho: float) -> Tuple[float, float]:
+    """(ascendente, descendente) da fonte; descendente é negativo"""
+    return getAscentDescent(FONTE, tamanho)
+
+
+def _largura(texto: str, tamanho: float) -> float:
+    """Largura do texto na fonte das cotas (contada nas métricas de render)"""
+    contar('stringWidth')
+    return stringWidth(texto, FONTE, tamanho)
+
+
+def _cotas_coluna(itens: List[Tuple[float, float, str]], x_borda: float, sentido: int,
+                  espessura: float, desvio_texto: float = 3,
+                  y_maximo: Optional[float] = None) -> List[Operacao]:
+    """
+    Cotas com texto horizontal numa coluna ao lado da peça.
+
+    Args:
+        itens: (x de saída da linha, y do ponto cotado, texto)
+        x_borda: borda da peça de onde a coluna sai
+        sentido: -1 = coluna à esquerda (texto alinhado à direita), +1 = à direita
+        desvio_texto: quanto a linha de base fica abaixo da linha de cota
+        y_maximo: nenhum texto passa desta altura (não invade a faixa de cima)
+    """
+    if not itens:
+        return []
+    ascendente, descendente = _altura_texto(TAMANHO_COTA)
+    meio = (ascendente + descendente) / 2 - desvio_texto
+    desejados = [y + meio for _, y, _ in itens]
+    centros = espalhar(desejados, [ascendente - descendente + FOLGA] * len(itens), y_maximo)
+
+    x_linha = x_borda + sentido * OFFSET_EXTERNO
+    x_dobra = x_borda + sentido * (OFFSET_EXTERNO - DOBRA)
+    x_texto = x_borda + sentido * (OFFSET_EXTERNO + 8)
+
+    operacoes = []
+    for (x_inicio, y, texto), desejado, centro in zip(itens, desejados, centros):
+        y_rotulo = y + (centro - desejado)
+        if y_rotulo == y:
+            operacoes.append(Linha(x_inicio, y, x_linha, y, espessura=espessura))
+        else:
+            operacoes.append(Linha(x_inicio, y, x_dobra, y, espessura=espessura))
+            operacoes.append(Linha(x_dobra, y, x_linha, y_rotulo, espessura=espessura))
+
+        largura = _largura(texto, TAMANHO_COTA)
+        x = x_texto - largura if sentido < 0 else x_texto
+        operacoes.append(Texto(x, y_rotulo - desvio_texto, texto))
+    return operacoes
+
+
+def _cotas_topo(itens: List[Tuple[float, float, float, str]], y_borda: float,
+                espessura: float, desvio_texto: float = 0) -> List[Operacao]:
+    """
+    Cotas com texto vertical (90°) numa faixa acima da peça.
+
+    Args:
+        itens: (x do ponto cotado, y de saída da linha, x onde o rótulo
+                quer ficar, texto); se o rótulo quer ficar fora do x cotado,
+                a linha sobe até a faixa e segue na horizontal
+        y_borda: borda superior da peça
+        desvio_texto: quanto a linha de base fica à esquerda da linha de cota
+    """
+    if not itens:
+        return []
+    ascendente, descendente = _altura_texto(TAMANHO_COTA)
+    # Texto girado 90°: o corpo das letras fica à esquerda da linha de base
+    meio = -desvio_texto - (ascendente + descendente) / 2
+    desejados = [x_desejado + meio for _, _, x_desejado, _ in itens]
+    centros = espalhar(desejados, [ascendente - descendente + FOLGA] * len(itens))
+
+    y_linha = y_borda + OFFSET_EXTERNO
+    y_dobra = y_borda + OFFSET_EXTERNO - DOBRA
+    y_texto = y_linha + 3  # Texto começa logo depois do fim da linha
+
+    operacoes = []
+    for (x, y_inicio, x_desejado, texto), desejado, centro in zip(itens, desejados, centros):
+        x_rotulo = x_desejado + (centro - desejado)
+        if x_rotulo == x:
+            operacoes.append(Linha(x, y_inicio, x, y_linha, espessura=espessura))
+        elif x_desejado != x:
+            # Rótulo deslocado de propósito: perna vertical e depois horizontal
+            operacoes.append(Linha(x, y_inicio, x, y_linha, espessura=espessura))
+            operacoes.append(Linha(x, y_linha, x_rotulo, y_linha, espessura=espessura))
+        else:
+            operacoes.append(Linha(x, y_inicio, x, y_dobra, espessura=espessura))
+            operacoes.append(Linha(x, y_dobra, x_rotulo, y_linha, espessura=espessura))
+
+        operacoes.append(Texto(x_rotulo - desvio_texto, y_texto, texto, rotacao=90))
+    return operacoes
+
+
+def _especificacoes(itens: List[Tuple[float, float, float, float, str]],
+                    tamanho: float, y_maximo: Optional[float] = None) -> List[Operacao]:
+    """
+    Especificação de cada furo (Ø, profundidade, mandril) com linha e setinha.
+    Especificações que se sobrepõem são afastadas verticalmente.
+
+    Args:
+        itens: (x de saída da linha, y do furo, x do texto, desvio do texto
+                acima da linha, texto); x do texto < x de saída = texto à esquerda
+        y_maximo: nenhum texto passa desta altura (faixa das cotas acima da peça)
+    """
+    if not itens:
+        return []
+    ascendente, descendente = _altura_texto(tamanho)
+
+    caixas = []
+    for x_inicio, y, x_texto, desvio, texto in itens:
+        largura = _largura(texto, tamanho)
+        x_esquerda = x_texto if x_texto >= x_inicio else x_texto - largura
+        caixas.append((x_esquerda, x_esquerda + largura))
+
+    meio = (ascendente + descendente) / 2
+    y_rotulos = [y for _, y, _, _, _ in itens]
+    for grupo in agrupar_sobrepostos(caixas):
+        if len(grupo) < 2 and y_maximo is None:
+            continue
+        desejados = [itens[i][1] + itens[i][3] + meio for i in grupo]
+        centros = espalhar(desejados, [ascendente - descendente + FOLGA] * len(grupo), y_maximo)
+        for i, desejado, centro in zip(grupo, desejados, centros):
+            y_rotulos[i] = itens[i][1] + (centro - desejado)
+
+    operacoes = []
+    for (x_inicio, y, x_texto, desvio, texto), (x_esquerda, _), y_rotulo in zip(itens, caixas, y_rotulos):
+        sentido = 1 if x_texto >= x_inicio else -1
+        x_seta = x_texto - sentido * 2
+        operacoes.append(Linha(x_inicio, y, x_seta, y_rotulo, cor=colors.grey, espessura=0.5))
+        operacoes.append(Linha(x_seta, y_rotulo, x_seta - sentido * TAMANHO_SETA, y_rotulo + TAMANHO_SETA,
+                               cor=colors.grey, espessura=0.5))
+        operacoes.append(Linha(x_seta, y_rotulo, x_seta - sentido * TAMANHO_SETA, y_rotulo - TAMANHO_SETA,
+                               cor=colors.grey, espessura=0.5))
+        operacoes.append(Texto(x_esquerda, y_rotulo + desvio, texto, tamanho=tamanho, cor=colors.black))
+    return operacoes
+
+
+def _raio_desenho(diametro: float, escala: float) -> float:
+    """Raio proporcional ao diâmetro real, com limites para não ficar muito pequeno ou grande"""
+    return max(1.5, min(6, (diametro / 2) * mm * escala))
+
+
+def _texto_furo(furo, mandril: int, formatar: Callable, separador_mandril: str = ',') -> str:
+    if furo.profundidade == 0:
+        texto = f"Ø{formatar(furo.diametro)}"
+        return f"{texto}{separador_mandril}M{mandril}" if mandril else texto
+    texto = f"Ø{formatar(furo.diametro)}X{formatar(furo.profundidade)}"
+    return f"{texto},M{mandril}" if mandril else texto
+
+
+# ----------------------------------------------------------------------
+# Vistas
+# ----------------------------------------------------------------------
+def layout_vista_principal(furos: Sequence, mandris: Sequence[int],
+                           x_origem: float, y_origem: float,
+                           largura: float, altura: float, escala: float,
+                           largura_real: float, altura_real: float,
+                           formatar: Callable) -> List[Operacao]:
+    """
+    Vista de topo: cotas principais da peça, furos verticais, especificações
+    e cotas X (acima) / Y (à esquerda) dos furos.
+
+    Args:
+        furos: furos verticais da página
+        mandris: mandril de cada furo (mesma ordem)
+        x_origem, y_origem, largura, altura: retângulo da peça já em escala
+        largura_real, altura_real: dimensões reais (mm) para as cotas principais
+        formatar: formatador de cotas (GeradorDesenhoTecnico.formatar_cota)
+    """
+    y_topo = y_origem + altura
+    posicoes = [(x_origem + furo.x * mm * escala, y_topo - furo.y * mm * escala) for furo in furos]
+
+    # Furo que leva a cota Y: o mais à esquerda de cada linha (mesmo Y)
+    linhas = {}
+    for i, furo in enumerate(furos):
+        linhas.setdefault(round(float(furo.y), 1), []).append(i)
+    com_cota_y = {min(indices, key=lambda i: float(furos[i].x)) for indices in linhas.values()}
+
+    # Furo que leva a cota X: o de maior Y de cada coluna (mesmo X)
+    colunas = {}
+    for i, furo in enumerate(furos):
+        colunas.setdefault(round(float(furo.x), 1), []).append(i)
+    com_cota_x = {max(indices, key=lambda i: float(furos[i].y)) for indices in colunas.values()}
+
+    operacoes: List[Operacao] = []
+
+    # Furos e especificações
+    especificacoes = []
+    for furo, mandril, (x, y) in zip(furos, mandris, posicoes):
+        raio = _raio_desenho(furo.diametro, escala)
+        operacoes.append(Circulo(x, y, raio))
+        especificacoes.append((x + raio, y, x + raio * 8.5, raio * 0.2,
+                               _texto_furo(furo, mandril, formatar)))
+    operacoes += _especificacoes(especificacoes, TAMANHO_ESPECIFICACAO, y_maximo=y_topo + FOLGA)
+
+    # Cotas Y (coluna à esquerda), incluindo a cota principal da altura na base
+    itens_y = [(x_origem, y_origem, f"{altura_real:.0f}")]
+    itens_y += [(posicoes[i][0], posicoes[i][1], formatar(furos[i].y))
+                for i in sorted(com_cota_y) if furos[i].y > 0]
+    operacoes += _cotas_coluna(itens_y, x_origem, -1, espessura=0.3,
+                               y_maximo=y_topo + OFFSET_EXTERNO)
+
+    # Cotas X (faixa acima), incluindo a cota principal da largura no canto direito
+    x_direita = x_origem + largura
+    itens_x = [(x_direita, y_topo, x_direita, f"{largura_real:.0f}")]
+    itens_x += [(posicoes[i][0], posicoes[i][1], posicoes[i][0], formatar(furos[i].x))
+                for i in sorted(com_cota_x) if furos[i].x > 0]
+    operacoes += _cotas_topo(itens_x, y_topo, espessura=0.3, desvio_texto=3)
+
+    return operacoes
+
+
+def layout_vista_lateral(furos: Sequence, mandris: Sequence[int], lado: str,
+                         x_origem: float, y_origem: float,
+                         largura_vista: float, altura_vista: float, escala: float,
+                         espessura_real: float, formatar: Callable) -> List[Operacao]:
+    """
+    Vista lateral: cota da espessura, furos horizontais, cotas Y (para fora),
+    cotas Z (acima) e especificações (do lado oposto às cotas Y).
+
+    Args:
+        furos: furos horizontais deste lado
+        mandris: mandril de cada furo (mesma ordem)
+        lado: 'esquerda' ou 'direita'
+        x_origem, y_origem, largura_vista, altura_vista: retângulo da vista já em escala
+        espessura_real: espessura da peça (mm)
+    """
+    y_topo = y_origem + altura_vista
+    x_direita = x_origem + largura_vista
+    posicoes = [(x_origem + float(furo.z) * mm * escala, y_topo - float(furo.y) * mm * escala)
+                for furo in furos]
+    raios = [_raio_desenho(furo.diametro, escala) for furo in furos]
+
+    # Furo que leva a cota Z: o mais próximo do topo de cada coluna (mesmo Z)
+    colunas = {}
+    for i, furo in enumerate(furos):
+        colunas.setdefault(round(float(furo.z), 1), []).append(i)
+    com_cota_z = {min(indices, key=lambda i: float(furos[i].y)) for indices in colunas.values()}
+
+    operacoes: List[Operacao] = [Circulo(x, y, raio) for (x, y), raio in zip(posicoes, raios)]
+
+    # Cotas Y para fora da vista
+    if lado == 'esquerda':
+        itens_y = [(x - raio, y, formatar(float(furo.y)))
+                   for furo, (x, y), raio in zip(furos, posicoes, raios)]
+        operacoes += _cotas_coluna(itens_y, x_origem, -1, espessura=0.5, desvio_texto=2,
+                                   y_maximo=y_topo + OFFSET_EXTERNO)
+    else:
+        itens_y = [(x + raio, y, formatar(float(furo.y)))
+                   for furo, (x, y), raio in zip(furos, posicoes, raios)]
+        operacoes += _cotas_coluna(itens_y, x_direita, +1, espessura=0.5, desvio_texto=2,
+                                   y_maximo=y_topo + OFFSET_EXTERNO)
+
+    # Cotas Z acima, junto com a cota da espessura (sobe do canto direito e vai para a direita)
+    itens_z = [(posicoes[i][0], posicoes[i][1] + raios[i], posicoes[i][0], formatar(float(furos[i].z)))
+               for i in sorted(com_cota_z)]
+    itens_z.append((x_direita, y_topo, x_direita + OFFSET_EXTERNO, formatar(espessura_real)))
+    operacoes += _cotas_topo(itens_z, y_topo, espessura=0.5)
+
+    # Especificações do lado oposto às cotas Y
+    especificacoes = []
+    for furo, mandril, (x, y), raio in zip(furos, mandris, posicoes, raios):
+        texto = _texto_furo(furo, mandril, formatar, separador_mandril=' ')
+        if lado == 'esquerda':
+            especificacoes.append((x + raio, y, x_direita + 10, -2, texto))
+        else:
+            especificacoes.append((x - raio, y, x_origem - 10, -2, texto))
+    operacoes += _especificacoes(especificacoes, TAMANHO_COTA, y_maximo=y_topo + FOLGA)
+
+    return operacoes
+
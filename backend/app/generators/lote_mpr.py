@@ -0,0 +1,228 @@
+"""
+Geração de MPRs em lote (STEP com várias peças -> ZIP)
+
+O STEP é lido uma vez só; os MPRs das peças são gerados num pool de
+processos e cada um entra no ZIP assim que fica pronto. O ZIP leva um
+manifesto.json com furos, bytes e tempo de cada peça.
+
+Workers: COREWOOD_MPR_WORKERS (padrão: núcleos da máquina, até 4).
+0 ou 1 gera tudo no próprio processo (também usado se o pool quebrar).
+
+Gerar um MPR custa ~1ms a cada 100 furos, então lotes pequenos ficam
+no próprio processo (mandar para o pool custaria mais que gerar): o pool
+só entra a partir de COREWOOD_MPR_LIMIAR_FUROS furos no total (padrão 2000).
+O pool sobe no primeiro lote acima do limiar e é reaproveitado pelas
+conversões seguintes. Com COREWOOD_MPR_AQUECER=1 ele sobe já na subida da
+API (aquecer_pool); desligado por padrão, porque cada worker importa o app
+(~0,4s) e disputaria a CPU com a subida de todos os workers do uvicorn.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .mpr_generator import GeradorMPR
+
+logger = logging.getLogger(__name__)
+
+MANIFESTO = "manifesto.json"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_trava_pool = threading.Lock()
+
+
+def _env_int(nome: str, padrao: int) -> int:
+    try:
+        return max(0, int(os.getenv(nome, padrao)))
+    except ValueError:
+        return padrao
+
+
+def numero_workers() -> int:
+    """Processos do pool (COREWOOD_MPR_WORKERS)"""
+    return _env_int("COREWOOD_MPR_WORKERS", min(4, os.cpu_count() or 1))
+
+
+def limiar_furos() -> int:
+    """Total de furos do lote a partir do qual vale usar o pool"""
+    return _env_int("COREWOOD_MPR_LIMIAR_FUROS", 2000)
+
+
+def aquecimento_ativado() -> bool:
+    """Subir o pool junto com a API (COREWOOD_MPR_AQUECER=1)"""
+    return os.getenv("COREWOOD_MPR_AQUECER", "").lower() in ("1", "true", "sim")
+
+
+def nome_arquivo_mpr(nome: str, padrao: str = "peca") -> str:
+    """Nome seguro para o arquivo (sem pontuação, barras ou espaços)"""
+    return re.sub(r'[^\w\s-]', '', nome or '').strip().replace(' ', '_') or padrao
+
+
+def dados_mpr(peca: Dict) -> Dict:
+    """peca_data do GeradorMPR a partir de uma peça do parser STEP"""
+    return {
+        "largura": peca["largura"],
+        "comprimento": peca["comprimento"],
+        "espessura": peca["espessura"],
+        "furos": peca.get("furos", [])
+    }
+
+
+def _gerar_peca(peca_data: Dict) -> Tuple[bytes, float]:
+    """Roda no worker: (conteúdo em cp1252, ms de geração)"""
+    inicio = time.perf_counter()
+    conteudo = GeradorMPR().gerar_mpr_bytes(peca_data)
+    return conteudo, (time.perf_counter() - inicio) * 1000
+
+
+def _obter_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: o processo da API tem threads (uvicorn, pools), fork não é seguro
+    global _pool
+    with _trava_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context("spawn"))
+            logger.info("⚙️ Pool de geração de MPR iniciado com %d workers", workers)
+        return _pool
+
+
+def aquecer_pool():
+    """
+    Sobe os workers sem esperar (o import nos processos novos leva ~1-2s).
+    Só com COREWOOD_MPR_AQUECER=1; sem ele o pool sobe no primeiro lote grande.
+    """
+    workers = numero_workers()
+    if workers <= 1 or not aquecimento_ativado():
+        return
+    try:
+        pool = _obter_pool(workers)
+        for _ in range(workers):
+            pool.submit(int)
+    except (OSError, RuntimeError) as e:
+        logger.warning("⚠️ Pool de MPR não iniciou (%s), lotes serão gerados no processo", e)
+        _descartar_pool()
+
+
+def _descartar_pool():
+    global _pool
+    with _trava_pool:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def gerar_mprs(pecas: Sequence[Dict]) -> Iterator[Tuple[int, Union[Tuple[bytes, float], Exception]]]:
+    """
+    Gera os MPRs das peças (peca_data), na ordem em que ficam prontos.
+    Produz (índice, (conteúdo, ms)) ou (índice, exceção) se a peça falhar.
+    """
+    workers = numero_workers()
+    total_furos = sum(len(peca.get("furos") or []) for peca in pecas)
+    if workers > 1 and len(pecas) > 1 and total_furos >= limiar_furos():
+        try:
+            pool = _obter_pool(workers)
+            futuros = {pool.submit(_gerar_peca, peca): i for i, peca in enumerate(pecas)}
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            logger.warning("⚠️ Pool de MPR indisponível (%s), gerando no processo", e)
+            _descartar_pool()
+        else:
+            pendentes = set(range(len(pecas)))
+            try:
+                for futuro in as_completed(futuros):
+                    i = futuros[futuro]
+                    try:
+                        resultado = futuro.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        resultado = e
+                    pendentes.discard(i)
+                    yield i, resultado
+                return
+            except BrokenProcessPool as e:
+                # Worker morreu: o que faltou é gerado aqui mesmo
+                logger.warning("⚠️ Pool de MPR quebrou (%s), gerando %d peças no processo", e, len(pendentes))
+                _descartar_pool()
+                pecas = {i: pecas[i] for i in pendentes}
+    else:
+        pecas = dict(enumerate(pecas))
+
+    for i, peca in sorted(pecas.items()):
+        try:
+            yield i, _gerar_peca(peca)
+        except Exception as e:
+            yield i, e
+
+
+def escrever_zip_mprs(pecas: Sequence[Dict], destino: BinaryIO,
+                      extras: Optional[Dict[str, Union[str, bytes]]] = None,
+                      parse_ms: Optional[float] = None) -> Dict:
+    """
+    Escreve no `destino` um ZIP com um .mpr por peça do parser (dicts com
+    nome, largura, comprimento, espessura, furos), os `extras` (nome ->
+    conteúdo) e o manifesto.json. Peça que falha entra só no manifesto.
+
+    Returns:
+        O manifesto (também gravado no ZIP)
+    """
+    import zipfile
+
+    inicio = time.perf_counter()
+
+    # Nomes dos arquivos definidos antes (repetidos ganham sufixo _2, _3...)
+    arquivos: List[str] = []
+    usados = set()
+    for idx, peca in enumerate(pecas, start=1):
+        base = nome_arquivo_mpr(peca.get("nome"), f"peca_{idx}")
+        nome, n = base, 1
+        while nome.lower() in usados:
+            n += 1
+            nome = f"{base}_{n}"
+        usados.add(nome.lower())
+        arquivos.append(f"{nome}.mpr")
+
+    itens: List[Optional[Dict]] = [None] * len(pecas)
+    falhas = []
+
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for i, resultado in gerar_mprs([dados_mpr(p) for p in pecas]):
+            peca = pecas[i]
+            if isinstance(resultado, Exception):
+                logger.error("❌ Erro ao gerar MPR da peça %s: %s", peca.get("nome"), resultado)
+                falhas.append({"nome": peca.get("nome"), "erro": str(resultado)})
+                continue
+
+            conteudo, ms = resultado
+            zipf.writestr(arquivos[i], conteudo)
+            furos = peca.get("furos", [])
+            itens[i] = {
+                "nome": peca.get("nome"),
+                "arquivo": arquivos[i],
+                "furos_verticais": sum(1 for f in furos if f.get("tipo") == "vertical"),
+                "furos_horizontais": sum(1 for f in furos if f.get("tipo") == "horizontal"),
+                "bytes": len(conteudo),
+                "ms": round(ms, 2),
+            }
+
+        for nome, conteudo in (extras or {}).items():
+            zipf.writestr(nome, conteudo)
+
+        manifesto = {
+            "pecas": [item for item in itens if item is not None],
+            "falhas": falhas,
+            "workers": numero_workers(),
+            "furos": sum(item["furos_verticais"] + item["furos_horizontais"] for item in itens if item),
+            "parse_ms": round(parse_ms, 2) if parse_ms is not None else None,
+            "geracao_ms": round((time.perf_counter() - inicio) * 1000, 2),
+        }
+        zipf.writestr(MANIFESTO, json.dumps(manifesto, ensure_ascii=False, indent=2))
+
+    logger.info("📦 %d MPRs no ZIP (%d falhas) em %.1fms",
+                len(manifesto["pecas"]), len(falhas), manifesto["geracao_ms"])
+    return manifesto
@@ -1,5 +1,218 @@
+import os
 from datetime import datetime
-from typing import List, Dict
+from typing import BinaryIO, List, Dict
+
+from ..core.cache import CacheLRU, hash_conteudo
+from ..models.peca import Peca, FuroVertical
+from .series_furos import agrupar_series
+
+# O WoodWop lê MPR em cp1252 com linhas CRLF
+ENCODING_MPR = 'cp1252'
+FIM_LINHA = '\r\n'
+
+# Campos de peca_data que entram no arquivo (o nome não entra)
+CAMPOS_MPR = ('largura', 'comprimento', 'espessura', 'furos', 'padroes', 'comentarios')
+
+# Arquivos já gerados, por hash exato do conteúdo da peça
+cache_mpr = CacheLRU(
+    max_itens=1024,
+    max_bytes=int(os.getenv("COREWOOD_CACHE_MPR_MB", "16")) * 1024 * 1024
+)
+
+
+def _compilar(*linhas: str) -> bytes:
+    """Linhas do MPR (cada uma terminada em CRLF) já codificadas em cp1252"""
+    return ''.join(linha + FIM_LINHA for linha in linhas).encode(ENCODING_MPR)
+
+
+def _texto(valor) -> bytes:
+    """Valor livre (lado, comentário) em cp1252; caractere sem equivalente vira '?'"""
+    return str(valor).encode(ENCODING_MPR, errors='replace')
+
+
+def _numero(valor: float) -> bytes:
+    """Valor numérico mantendo decimal só se necessário (32 -> 32, 32.5 -> 32.5)"""
+    if valor == int(valor):
+        return b'%d' % int(valor)
+    return b'%.1f' % valor
+
+
+# ===== MODELOS (compilados uma vez, preenchidos com bytes % valores) =====
+# Cada bloco começa pela linha em branco que o separa do anterior
+
+_CABECALHO = _compilar(
+    '[H',
+    'VERSION="%b"',
+    'WW="%b"',
+    'OP="1"',
+    'WRK2="0"',
+    'SCHN="0"',
+    'HSP="0"',
+    'O2="0"',
+    'O4="0"',
+    'O3="0"',
+    'O5="0"',
+    'SR="0"',
+    'FM="1"',
+    'ML="2000"',
+    'UF="STANDARD"',
+    'DN="STANDARD"',
+    'GP="0"',
+    'GY="0"',
+    'GXY="0"',
+    'NP="1"',
+    'NE="0"',
+    'NA="0"',
+    'BFS="1"',
+    'US="0"',
+    'CB="0"',
+    'UP="0"',
+    'DW="0"',
+    'MAT="HOMAG"',
+    'INCH="0"',
+    'VIEW="NOMIRROR"',
+    'ANZ="1"',
+    'BES="0"',
+    'ENT="0"',
+    '_BSX=%.6f',
+    '_BSY=%.6f',
+    '_BSZ=%.6f',
+    '_FNX=0.000000',
+    '_FNY=0.000000',
+    '_RNX=0.000000',
+    '_RNY=0.000000',
+    '_RNZ=0.000000',
+    '_RX=%.6f',
+    '_RY=%.6f',
+    # ===== PROGRAMA =====
+    '',
+    '[001',
+    'x="%d"',
+    'KM=""',
+    'y="%d"',
+    'KM=""',
+    'z="%d"',
+    'KM=""',
+    # ===== DEFINIÇÃO DA PEÇA =====
+    '',
+    '<100 \\WerkStck\\',
+    'LA="x"',
+    'BR="y"',
+    'DI="z"',
+    'FNX="0"',
+    'FNY="0"',
+    'AX="0"',
+    'AY="0"',
+)
+
+# %b do meio: linha TI (só se não for passante) ou vazio
+_FURO_VERTICAL = _compilar(
+    '',
+    '<102 \\BohrVert\\',
+    'XA="%b"',
+    'YA="%b"',
+    'BM="%b"',
+    'DU="%b"',
+) + b'%b' + _compilar(
+    'AN="%d"',
+    'MI="0"',
+    'S_="1"',
+    'AB="%b"',
+    'WI="%b"',
+    'ZT="0"',
+    'RM="0"',
+    'VW="0"',
+    'HP="0"',
+    'SP="0"',
+    'YVE="0"',
+    'WW="60,61,62,88,90,91,92,150"',
+    'ASG="2"',
+    'KAT="Bohren vertikal"',
+    'MNM="Furo vertical"',
+    'ORI=""',
+    'MX="0"',
+    'MY="0"',
+    'MZ="0"',
+    'MXF="1"',
+    'MYF="1"',
+    'MZF="1"',
+    'SYA="0"',
+    'SYV="0"',
+    'KO="00"',
+)
+_LINHA_TI = _compilar('TI="%b"')
+
+# %b do meio: linha WI (só em série) ou vazio
+_FURO_HORIZONTAL = _compilar(
+    '',
+    '<103 \\BohrHoriz\\',
+    'MI="0"',
+    'XA="%b"',
+    'YA="%b"',
+    'ZA="%b"',
+    'DU="%b"',
+    'TI="%b"',
+    'ANA="20"',
+    'BM="%b"',
+    'AN="%d"',
+    'AB="%b"',
+) + b'%b' + _compilar(
+    'BM2="STD"',
+    'ZT="0"',
+    'RM="0"',
+    'VW="0"',
+    'HP="0"',
+    'SP="0"',
+    'YVE="0"',
+    'WW="50,51,52,53,93,94,95,56,153,151"',
+    'ASG="2"',
+    'KAT="Horizontalbohren"',
+    'MNM="Furo horizontal"',
+    'ORI=""',
+    'MX="0"',
+    'MY="0"',
+    'MZ="0"',
+    'MXF="1"',
+    'MYF="1"',
+    'MZF="1"',
+    'SYA="0"',
+    'SYV="0"',
+    'KO="00"',
+)
+# Série: direção explícita (WI="90" = ao longo de Y)
+_LINHA_WI = {'x': _compilar('WI="0"'), 'y': _compilar('WI="90"')}
+
+_COMENTARIOS_INICIO = _compilar('', '<101 \\Kommentar\\')
+_COMENTARIO = _compilar('KM="%b"')
+_COMENTARIOS_FIM = _compilar(
+    'KAT="Kommentar"',
+    'MNM="Comentário"',
+    'ORI=""',
+)
+
+# ===== COMPONENTE MACRO + terminador =====
+_COMPONENTE = _compilar(
+    '',
+    '<139 \\Komponente\\',
+    'IN="ZP500.mpr"',
+    'XA="0.0"',
+    'YA="0.0"',
+    'ZA="0.0"',
+    'EM="0"',
+    'VA="X1 125"',
+    'VA="X2 _BSX-125"',
+    'VA="Y1 70"',
+    'VA="F1 0"',
+    'VA="F2 0"',
+    'VA="F21 0"',
+    'VA="F3 100"',
+    'VA="F4 100"',
+    'KAT="Komponentenmakro"',
+    'MNM="Macro Componentes"',
+    'ORI=""',
+    'KO="00"',
+) + b'!'
+
 
 class GeradorMPR:
     """Gera arquivos MPR no formato HOMAG"""
@@ -8,180 +221,85 @@ class GeradorMPR:
         self.version = "4.0 Alpha"
         self.ww = "6.0.18"
 
-    def _agrupar_furos_sequenciais(self, furos: List[Dict]) -> List[Dict]:
-        """Agrupa furos que estão em sequência"""
-        if not furos:
-            return []
-        
-        grupos = []
-        furos_ordenados = sorted(furos, key=lambda f: (f['y'], f['x']))
-        
-        i = 0
-        while i < len(furos_ordenados):
-            grupo = {
-                **furos_ordenados[i],
-                'quantidade': 1,
-                'distancia': 0,
-                'direcao_replicacao': 'x'
-            }
-            
-            # Verificar furos sequenciais
-            j = i + 1
-            while j < len(furos_ordenados):
-                f_atual = furos_ordenados[j-1]
-                f_prox = furos_ordenados[j]
-                
-                # Mesmo Y, X sequencial?
-                if (f_prox['y'] == f_atual['y'] and 
-                    f_prox['diametro'] == f_atual['diametro'] and
-                    f_prox['profundidade'] == f_atual['profundidade']):
-                    
-                    dist = f_prox['x'] - f_atual['x']
-                    if grupo['quantidade'] == 1:
-                        grupo['distancia'] = dist
-                        grupo['quantidade'] = 2
-                    elif abs(dist - grupo['distancia']) < 0.1:
-                        grupo['quantidade'] += 1
-                    else:
-                        break
-                    j += 1
-                else:
-                    break
-            
-            grupos.append(grupo)
-            i = j if j > i + 1 else i + 1
-        
-        return grupos    
-    
-    def gerar_mpr(self, peca_data: Dict) -> str:
-        """Gera conteúdo do arquivo MPR"""
-        
+    def gerar_mpr(self, peca_data: Dict, inverter_y: bool = True) -> str:
+        """
+        Gera conteúdo do arquivo MPR
+
+        peca_data pode trazer 'padroes': séries já agrupadas (com quantidade,
+        distancia e direcao_replicacao), escritas direto como AN/AB/WI.
+        inverter_y=False quando os Y já estão no sistema do WoodWop.
+
+        Para gravar ou enviar o arquivo use escrever_mpr/gerar_mpr_bytes,
+        que já saem em cp1252 sem passar por uma string intermediária.
+        """
+        return self.gerar_mpr_bytes(peca_data, inverter_y).decode(ENCODING_MPR)
+
+    def gerar_mpr_bytes(self, peca_data: Dict, inverter_y: bool = True) -> bytes:
+        """
+        Arquivo MPR completo em cp1252 (mesmo conteúdo de gerar_mpr).
+        Memoizado pelo hash exato dos campos que entram no arquivo: reexportar
+        uma peça sem alteração não remonta nada.
+        """
+        chave = hash_conteudo('mpr', self.version, self.ww, inverter_y,
+                              {campo: peca_data.get(campo) for campo in CAMPOS_MPR}, exato=True)
+        return cache_mpr.obter_ou_criar(
+            chave, lambda: b''.join(self._blocos_mpr(peca_data, inverter_y)))
+
+    def escrever_mpr(self, peca_data: Dict, destino: BinaryIO, inverter_y: bool = True) -> int:
+        """
+        Escreve o MPR em cp1252 direto em `destino`: arquivo aberto em 'wb',
+        membro de ZipFile.open(nome, 'w'), socket.makefile('wb'), BytesIO...
+
+        O arquivo é montado (ou vem do cache) antes da escrita, então uma peça
+        com dado inválido não deixa arquivo pela metade. Retorna os bytes escritos.
+        """
+        conteudo = self.gerar_mpr_bytes(peca_data, inverter_y)
+        destino.write(conteudo)
+        return len(conteudo)
+
+    def escrever_mpr_zip(self, zip_file, nome: str, peca_data: Dict, inverter_y: bool = True) -> int:
+        """Escreve o MPR como membro `nome` do ZipFile (só cria o membro se a peça for válida)"""
+        conteudo = self.gerar_mpr_bytes(peca_data, inverter_y)
+        with zip_file.open(nome, 'w') as destino:
+            destino.write(conteudo)
+        return len(conteudo)
+
+    def _blocos_mpr(self, peca_data: Dict, inverter_y: bool) -> List[bytes]:
+        """Fragmentos do arquivo (cabeçalho, um por operação, componente)"""
         largura = float(peca_data['largura'])
         comprimento = float(peca_data['comprimento'])
         espessura = float(peca_data['espessura'])
         furos = peca_data.get('furos', [])
+        padroes = peca_data.get('padroes', [])
         
         # Separar por tipo
         furos_verticais = [f for f in furos if f.get('tipo') == 'vertical']
         furos_horizontais = [f for f in furos if f.get('tipo') == 'horizontal']
-                
-        mpr = []
-        
-        # ===== HEADER =====
-        mpr.append('[H')
-        mpr.append(f'VERSION="{self.version}"')
-        mpr.append(f'WW="{self.ww}"')
-        mpr.append('OP="1"')
-        mpr.append('WRK2="0"')
-        mpr.append('SCHN="0"')
-        mpr.append('HSP="0"')
-        mpr.append('O2="0"')
-        mpr.append('O4="0"')
-        mpr.append('O3="0"')
-        mpr.append('O5="0"')
-        mpr.append('SR="0"')
-        mpr.append('FM="1"')
-        mpr.append('ML="2000"')
-        mpr.append('UF="STANDARD"')
-        mpr.append('DN="STANDARD"')
-        mpr.append('GP="0"')
-        mpr.append('GY="0"')
-        mpr.append('GXY="0"')
-        mpr.append('NP="1"')
-        mpr.append('NE="0"')
-        mpr.append('NA="0"')
-        mpr.append('BFS="1"')
-        mpr.append('US="0"')
-        mpr.append('CB="0"')
-        mpr.append('UP="0"')
-        mpr.append('DW="0"')
-        mpr.append('MAT="HOMAG"')
-        mpr.append('INCH="0"')
-        mpr.append('VIEW="NOMIRROR"')
-        mpr.append('ANZ="1"')
-        mpr.append('BES="0"')
-        mpr.append('ENT="0"')
-        mpr.append(f'_BSX={comprimento:.6f}')
-        mpr.append(f'_BSY={largura:.6f}')
-        mpr.append(f'_BSZ={espessura:.6f}')
-        mpr.append('_FNX=0.000000')
-        mpr.append('_FNY=0.000000')
-        mpr.append('_RNX=0.000000')
-        mpr.append('_RNY=0.000000')
-        mpr.append('_RNZ=0.000000')
-        mpr.append(f'_RX={comprimento:.6f}')
-        mpr.append(f'_RY={largura:.6f}')
-        
-        # ===== PROGRAMA =====
-        mpr.append('')  # Linha em branco
-        mpr.append('[001')
-        mpr.append(f'x="{int(comprimento)}"')
-        mpr.append('KM=""')
-        mpr.append(f'y="{int(largura)}"')
-        mpr.append('KM=""')
-        mpr.append(f'z="{int(espessura)}"')
-        mpr.append('KM=""')
-        
-        # ===== DEFINIÇÃO DA PEÇA =====
-        mpr.append('')  # Linha em branco
-        mpr.append('<100 \\WerkStck\\')
-        mpr.append('LA="x"')
-        mpr.append('BR="y"')
-        mpr.append('DI="z"')
-        mpr.append('FNX="0"')
-        mpr.append('FNY="0"')
-        mpr.append('AX="0"')
-        mpr.append('AY="0"')
-
-        # Agrupar furos sequenciais
-        furos_agrupados = self._agrupar_furos_sequenciais(furos_verticais)
-        
-        # ===== FUROS VERTICAIS =====
-        for furo in furos_agrupados:
-            mpr.append('')  # Linha em branco
-            mpr.extend(self._gerar_furo_vertical(furo, largura))
+
+        blocos = [_CABECALHO % (
+            _texto(self.version), _texto(self.ww),
+            comprimento, largura, espessura, comprimento, largura,
+            int(comprimento), int(largura), int(espessura),
+        )]
+
+        # Agrupar séries em X e em Y (séries já prontas vêm depois, sem reagrupar)
+        furos_agrupados = agrupar_series(furos_verticais, inverter_y, largura=largura)
+        furos_agrupados += [p for p in padroes if p.get('tipo') == 'vertical']
+        furos_horizontais = agrupar_series(furos_horizontais, inverter_y, largura=largura)
+        furos_horizontais += [p for p in padroes if p.get('tipo') == 'horizontal']
         
-        # ===== FUROS HORIZONTAIS =====
-        for furo in furos_horizontais:
-            mpr.append('')  # Linha em branco
-            mpr.extend(self._gerar_furo_horizontal(furo, largura))
+        blocos += [self._gerar_furo_vertical(furo, largura, inverter_y) for furo in furos_agrupados]
+        blocos += [self._gerar_furo_horizontal(furo, largura, inverter_y) for furo in furos_horizontais]
         
         # ===== COMENTÁRIOS (depois dos furos) =====
         comentarios = peca_data.get('comentarios', [])
         if comentarios:
-            mpr.append('')  # Linha em branco
-            mpr.append('<101 \\Kommentar\\')
-            for comentario in comentarios:
-                mpr.append(f'KM="{comentario}"')
-            mpr.append('KAT="Kommentar"')
-            mpr.append('MNM="Comentário"')
-            mpr.append('ORI=""')
-        
-        # ===== COMPONENTE MACRO =====
-        mpr.append('')  # Linha em branco
-        mpr.append('<139 \\Komponente\\')
-        mpr.append('IN="ZP500.mpr"')
-        mpr.append('XA="0.0"')
-        mpr.append('YA="0.0"')
-        mpr.append('ZA="0.0"')
-        mpr.append('EM="0"')
-        mpr.append('VA="X1 125"')
-        mpr.append('VA="X2 _BSX-125"')
-        mpr.append('VA="Y1 70"')
-        mpr.append('VA="F1 0"')
-        mpr.append('VA="F2 0"')
-        mpr.append('VA="F21 0"')
-        mpr.append('VA="F3 100"')
-        mpr.append('VA="F4 100"')
-        mpr.append('KAT="Komponentenmakro"')
-        mpr.append('MNM="Macro Componentes"')
-        mpr.append('ORI=""')
-        mpr.append('KO="00"')
+            blocos.append(_COMENTARIOS_INICIO)
+            blocos += [_COMENTARIO % _texto(comentario) for comentario in comentarios]
+            blocos.append(_COMENTARIOS_FIM)
         
-        # Adicionar terminador
-        mpr.append('!')
-
-        return '\r\n'.join(mpr)
+        blocos.append(_COMPONENTE)
+        return blocos
     
     def gerar_mpr_from_step(self, dados_step: Dict) -> str:
         """
@@ -217,6 +335,61 @@ class GeradorMPR:
         return "\r\n".join(mpr_total)
 
     
+    def gerar_mpr_peca(self, peca: Peca, inverter_y: bool = True) -> str:
+        """
+        Gera MPR a partir de um objeto Peca.
+        Séries de peca.padroes vão direto para AN/AB/WI, sem expandir e reagrupar.
+        Use inverter_y=False para peças lidas de MPR (parse_furacao), que já
+        estão com Y do WoodWop.
+        Para gravar ou enviar o arquivo use gerar_mpr_peca_bytes.
+        """
+        return self.gerar_mpr_peca_bytes(peca, inverter_y).decode(ENCODING_MPR)
+
+    def gerar_mpr_peca_bytes(self, peca: Peca, inverter_y: bool = True) -> bytes:
+        """
+        Arquivo MPR de uma Peca em cp1252 (mesmo conteúdo de gerar_mpr_peca).
+        Memoizado por peca.hash_conteudo() (sem montar os dicts de novo).
+        """
+        chave = ('peca', peca.hash_conteudo(), inverter_y, self.version, self.ww)
+        return cache_mpr.obter_ou_criar(
+            chave, lambda: b''.join(self._blocos_mpr(self._dados_peca(peca, inverter_y), inverter_y)))
+
+    def _dados_peca(self, peca: Peca, inverter_y: bool) -> Dict:
+        """peca_data do gerador a partir de uma Peca"""
+        largura = float(peca.dimensoes.largura)
+        
+        def furo_dict(furo) -> Dict:
+            if isinstance(furo, FuroVertical):
+                return {'tipo': 'vertical', 'x': furo.x, 'y': furo.y, 'diametro': furo.diametro,
+                        'profundidade': furo.profundidade, 'lado': furo.lado}
+            return {'tipo': 'horizontal', 'x': furo.x, 'y': furo.y, 'z': furo.z,
+                    'diametro': furo.diametro, 'profundidade': furo.profundidade, 'lado': furo.lado}
+        
+        padroes = []
+        for serie in peca.padroes:
+            padrao = furo_dict(serie.furo)
+            ao_longo_y = serie.angulo == 90
+            # Com Y invertido a série sobe a partir do último furo
+            if ao_longo_y and inverter_y:
+                padrao['y'] = serie.furo.y + (serie.quantidade - 1) * serie.passo
+            padrao.update({
+                'quantidade': serie.quantidade,
+                'distancia': serie.passo,
+                'direcao_replicacao': 'y' if ao_longo_y else 'x',
+            })
+            padroes.append(padrao)
+        
+        peca_data = {
+            'nome': peca.nome,
+            'largura': largura,
+            'comprimento': peca.dimensoes.comprimento,
+            'espessura': peca.dimensoes.espessura,
+            'furos': [furo_dict(f) for f in peca.furos_verticais + peca.furos_horizontais],
+            'padroes': padroes,
+            'comentarios': peca.comentarios,
+        }
+        return peca_data
+    
     def _determinar_tipo_furo(self, furo: Dict, peca: Dict) -> str:
         """Determina se o furo é vertical ou horizontal."""
         z = furo.get('z', 0)
@@ -259,9 +432,10 @@ class GeradorMPR:
         
         return "XP"
     
-    def _gerar_furo_vertical(self, furo: Dict, largura: float) -> List[str]:
+    def _gerar_furo_vertical(self, furo: Dict, largura: float, inverter_y: bool = True) -> bytes:
+        """Bloco de um furo vertical (operação 102)"""
         x = float(furo['x'])
-        y = largura - float(furo['y'])  # Inverter Y para WoodWop
+        y = largura - float(furo['y']) if inverter_y else float(furo['y'])  # Inverter Y para WoodWop
         diametro = float(furo['diametro'])
         profundidade = float(furo.get('profundidade', 0))
         lado = furo.get('lado', 'LS')  # ← pega o lado do furo
@@ -271,61 +445,20 @@ class GeradorMPR:
         distancia = float(furo.get('distancia', 0))
         direcao_replicacao = furo.get('direcao_replicacao', 'x')  # 'x' ou 'y'
         
-        wi = "0" if direcao_replicacao == 'x' else "90"
-        
-        # Formatar valores - manter decimal se necessário
-        def formatar(valor):
-            if valor == int(valor):
-                return str(int(valor))
-            else:
-                return f"{valor:.1f}"
-        
-        linhas = [
-            '<102 \\BohrVert\\',
-            f'XA="{formatar(x)}"',
-            f'YA="{formatar(y)}"',
-            f'BM="{lado}"',  # ← usa o lado passado
-            f'DU="{formatar(diametro)}"',
-        ]
+        wi = b"0" if direcao_replicacao == 'x' else b"90"
         
         # Adiciona profundidade se não for passante
-        if profundidade > 0:
-            linhas.append(f'TI="{formatar(profundidade)}"')
+        ti = _LINHA_TI % _numero(profundidade) if profundidade > 0 else b''
         
-        linhas.extend([
-            f'AN="{quantidade}"',
-            'MI="0"',
-            'S_="1"',
-            f'AB="{formatar(distancia)}"',
-            f'WI="{wi}"',
-            'ZT="0"',
-            'RM="0"',
-            'VW="0"',
-            'HP="0"',
-            'SP="0"',
-            'YVE="0"',
-            'WW="60,61,62,88,90,91,92,150"',
-            'ASG="2"',
-            'KAT="Bohren vertikal"',
-            'MNM="Furo vertical"',
-            'ORI=""',
-            'MX="0"',
-            'MY="0"',
-            'MZ="0"',
-            'MXF="1"',
-            'MYF="1"',
-            'MZF="1"',
-            'SYA="0"',
-            'SYV="0"',
-            'KO="00"',
-        ])
-        
-        return linhas
+        return _FURO_VERTICAL % (
+            _numero(x), _numero(y), _texto(lado), _numero(diametro), ti,
+            quantidade, _numero(distancia), wi,
+        )
     
-    def _gerar_furo_horizontal(self, furo: Dict, largura: float) -> List[str]:
-        """Gera linhas para um furo horizontal (operação 103)"""
+    def _gerar_furo_horizontal(self, furo: Dict, largura: float, inverter_y: bool = True) -> bytes:
+        """Bloco de um furo horizontal (operação 103)"""
         x = furo.get('x', 0)
-        y = largura - float(furo['y'])  # Inverter Y para WoodWop
+        y = largura - float(furo['y']) if inverter_y else float(furo['y'])  # Inverter Y para WoodWop
         z = float(furo.get('z', 7.5))
         diametro = float(furo['diametro'])
         profundidade = float(furo.get('profundidade', 22))
@@ -334,80 +467,42 @@ class GeradorMPR:
         # Suporte a replicação
         quantidade = int(furo.get('quantidade', 1))
         distancia = float(furo.get('distancia', 0))
-        
-        # Formatar valores - manter decimal se necessário
-        def formatar(valor):
-            if valor == int(valor):
-                return str(int(valor))
-            else:
-                return f"{valor:.1f}"
+        direcao_replicacao = furo.get('direcao_replicacao', 'x')
         
         # XA pode ser número ou "x" (lado oposto)
         if x == 'x':
-            xa_valor = 'x'
+            xa_valor = b'x'
         elif x == 0:
-            xa_valor = '0'
+            xa_valor = b'0'
         else:
-            xa_valor = formatar(float(x))
+            xa_valor = _numero(float(x))
         
-        linhas_furo = [
-            '<103 \\BohrHoriz\\',
-            'MI="0"',
-            f'XA="{xa_valor}"',
-            f'YA="{formatar(y)}"',
-            f'ZA="{formatar(z)}"',
-            f'DU="{formatar(diametro)}"',
-            f'TI="{formatar(profundidade)}"',
-            'ANA="20"',
-            f'BM="{lado}"',
-            f'AN="{quantidade}"',
-            f'AB="{formatar(distancia)}"',
-            'BM2="STD"',
-            'ZT="0"',
-            'RM="0"',
-            'VW="0"',
-            'HP="0"',
-            'SP="0"',
-            'YVE="0"',
-            'WW="50,51,52,53,93,94,95,56,153,151"',
-            'ASG="2"',
-            'KAT="Horizontalbohren"',
-            'MNM="Furo horizontal"',
-            'ORI=""',
-            'MX="0"',
-            'MY="0"',
-            'MZ="0"',
-            'MXF="1"',
-            'MYF="1"',
-            'MZF="1"',
-            'SYA="0"',
-            'SYV="0"',
-            'KO="00"',
-        ]
+        wi = _LINHA_WI['y' if direcao_replicacao == 'y' else 'x'] if quantidade > 1 else b''
         
-        return linhas_furo
+        return _FURO_HORIZONTAL % (
+            xa_valor, _numero(y), _numero(z), _numero(diametro), _numero(profundidade),
+            _texto(lado), quantidade, _numero(distancia), wi,
+        )
     
     def gerar_multiplos_mprs(self, dados_parser: dict):
-        arquivos = []
+        """Um MPR por peça do parser STEP, gerados em paralelo (ver lote_mpr)"""
+        from .lote_mpr import dados_mpr, gerar_mprs
 
-        for idx, peca in enumerate(dados_parser["pecas"], start=1):
-            nome = peca.get("nome", f"peca_{idx}")
+        pecas = dados_parser["pecas"]
+        arquivos = [None] * len(pecas)
 
-            conteudo = self.gerar_mpr({
-                "largura": peca["largura"],
-                "comprimento": peca["comprimento"],
-                "espessura": peca["espessura"],
-                "furos": peca.get("furos", [])
-            })
-
-            arquivos.append({
+        for i, resultado in gerar_mprs([dados_mpr(peca) for peca in pecas]):
+            if isinstance(resultado, Exception):
+                raise resultado
+            conteudo, _ = resultado
+            nome = pecas[i].get("nome", f"peca_{i + 1}")
+            arquivos[i] = {
                 "filename": f"{nome}.mpr",
-                "content": conteudo
-            })
+                "content": conteudo.decode(ENCODING_MPR)
+            }
 
         return arquivos
 
-
 if __name__ == "__main__":
     gerador = GeradorMPR()
 
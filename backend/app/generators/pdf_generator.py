@@ -1,8 +1,195 @@
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfdoc
 from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from ..models.peca import Peca, FuroVertical, FuroHorizontal
+from ..models.conjunto_furos import ConjuntoFuros, matriz_rotacao, matriz_espelho_vertical
+from ..core.spatial_index import IndiceEspacial
+from .planejador_furacao import PlanejadorFuracao
+from .layout_cotas import layout_vista_principal, layout_vista_lateral, desenhar_operacoes
+from ..core.instrumentacao import etapa, instrumentar_canvas, contar
+from ..core.cache import CacheLRU, hash_conteudo
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Callable, Sequence, Tuple
+import copy
+import hashlib
+import logging
+import math
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tolerância (mm) para casar um furo horizontal com seu par espelhado
+TOL_PAR_ESPELHADO = 0.01
+
+# Tabela de informações (rodapé): logo + 2 linhas de células
+LARGURA_LOGO = 80
+LARGURAS_LINHA_1 = [250, 100, 70, 70, 80, 60, 70]  # 7 colunas
+LARGURAS_LINHA_2 = [250, 65, 95, 100, 70, 120]       # 6 colunas
+LARGURA_TABELA = LARGURA_LOGO + max(sum(LARGURAS_LINHA_1), sum(LARGURAS_LINHA_2))
+
+# Menor fonte usada para encaixar valores nas células
+TAMANHO_FONTE_MINIMO = 7
+
+# Índice do pacote de impressão
+LINHAS_INDICE = 25
+ALTURA_LINHA_INDICE = 16
+
+
+# Caches entre documentos (por processo), por hash do conteúdo da peça:
+# geometria transformada -> distribuição/páginas -> operações de layout.
+# A tabela (título, revisão, observações...) é sempre redesenhada.
+cache_geometria = CacheLRU(max_itens=256)
+cache_distribuicao = CacheLRU(max_itens=256)
+cache_layout = CacheLRU(max_itens=1024)
+
+
+def _em_cache(cache: CacheLRU, nome: str, chave, calcular):
+    """cache.obter_ou_criar contando acertos/falhas nas métricas de render"""
+    if chave is None:
+        return calcular()
+    valor = cache.get(chave)
+    if valor is None:
+        contar(f'cache.{nome}.falha')
+        valor = calcular()
+        cache.set(chave, valor)
+    else:
+        contar(f'cache.{nome}.acerto')
+    return valor
+
+
+@lru_cache(maxsize=16)
+def _imagem_codificada(caminho: str, modificado: float, mask, nome: str):
+    """Imagem lida e comprimida para PDF uma vez por processo (por arquivo/data)"""
+    imagem = pdfdoc.PDFImageXObject(nome, caminho, mask=mask)
+    imagem.name = nome
+    return imagem
+
+
+def registrar_imagem(c: canvas.Canvas, caminho: str, mask=None):
+    """
+    Registra no documento uma cópia da imagem já codificada, com o mesmo nome
+    que o drawImage usaria: o drawImage seguinte a encontra e não relê/recomprime
+    o arquivo. Mesmo resultado byte a byte (mesmos passos do Canvas.drawImage).
+    """
+    from reportlab.pdfgen.canvas import _digester
+    import os
+    
+    nome = _digester(('%s%s' % (caminho, mask)).encode('utf-8'))
+    nome_registro = c._doc.getXObjectName(nome)
+    if nome_registro in c._doc.idToObject:
+        return
+    
+    modelo = _imagem_codificada(caminho, os.path.getmtime(caminho), mask, nome)
+    imagem = copy.copy(modelo)
+    c._setXObjects(imagem)
+    c._doc.Reference(imagem, nome_registro)
+    c._doc.addForm(nome, imagem)
+    mascara = getattr(modelo, '_smask', None)
+    if mascara:
+        nome_mascara = c._doc.getXObjectName(mascara.name)
+        if nome_mascara not in c._doc.idToObject:
+            mascara = copy.copy(mascara)
+            c._setXObjects(mascara)
+            imagem.smask = c._doc.Reference(mascara, nome_mascara)
+        else:
+            imagem.smask = pdfdoc.PDFObjectReference(nome_mascara)
+        del imagem._smask
+
+
+def _descartar_pagina(c: canvas.Canvas):
+    """
+    Apaga o que já foi desenhado na página atual sem fechá-la (os mesmos
+    passos do Canvas ao começar uma página), inclusive um Form XObject aberto.
+    """
+    while c._codeStack:
+        c._restartAccumulators()
+    c._restartAccumulators()
+    c.init_graphics_state()
+    c.state_stack = []
+
+
+@dataclass
+class ItemPacote:
+    """Peça de um pacote de impressão; carregar() só é chamado na hora de desenhar"""
+    rotulo: str
+    carregar: Callable[[], Tuple[Peca, dict]]
+
+
+# Medidas de furo -> valor quando vierem vazias (None: obrigatória)
+MEDIDAS_VERTICAL = {'x': None, 'y': None, 'diametro': None, 'profundidade': 0.0}
+MEDIDAS_HORIZONTAL = {'x': 0.0, 'y': None, 'z': 7.5, 'diametro': None, 'profundidade': 0.0}
+
+
+def _numero(valor, campo: str, padrao: float = None) -> float:
+    """Medida de furo como float; vazio usa o padrão do editor (se houver)"""
+    if valor is None or valor == '':
+        if padrao is None:
+            raise ValueError(f"{campo} vazio")
+        return padrao
+    if isinstance(valor, float) and math.isfinite(valor):
+        return valor
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        numero = math.nan
+    if isinstance(valor, bool) or not math.isfinite(numero):
+        raise ValueError(f"{campo} não é número: {valor!r}")
+    return numero
+
+
+def _furo_numerico(furo, campo: str, padroes: dict):
+    """Furo com as medidas em float (o mesmo objeto se já estiver assim)"""
+    valores = {}
+    for nome, padrao in padroes.items():
+        valor = getattr(furo, nome)
+        if isinstance(valor, float) and math.isfinite(valor):
+            continue
+        if nome == 'x' and valor == 'x' and isinstance(furo, FuroHorizontal):
+            continue  # lado oposto
+        numero = _numero(valor, f"{campo}: {nome}", padrao)
+        if numero is not valor:
+            valores[nome] = numero
+    return replace(furo, **valores) if valores else furo
+
+
+def furos_numericos(peca: Peca) -> Peca:
+    """
+    Peça com as medidas de todos os furos em float, antes de desenhar.
+    Profundidade e Z vazios ficam com o padrão do editor (0 e 7.5); X do
+    furo horizontal pode ser 'x' (lado oposto).
+
+    Raises:
+        ValueError: furo com medida vazia ou que não é número (diz qual)
+    """
+    verticais = [_furo_numerico(furo, f"Furo vertical {n}", MEDIDAS_VERTICAL)
+                 for n, furo in enumerate(peca.furos_verticais, 1)]
+    horizontais = [_furo_numerico(furo, f"Furo horizontal {n}", MEDIDAS_HORIZONTAL)
+                   for n, furo in enumerate(peca.furos_horizontais, 1)]
+    return replace(peca, furos_verticais=verticais, furos_horizontais=horizontais)
+
+
+@lru_cache(maxsize=1024)
+def _largura_unitaria(texto: str, fonte: str) -> float:
+    """Largura do texto em tamanho 1 (a largura cresce linearmente com o tamanho)"""
+    contar('stringWidth')
+    return stringWidth(texto, fonte, 1)
+
+
+@lru_cache(maxsize=4096)
+def tamanho_fonte_ajustado(texto: str, fonte: str, largura_max: float, tamanho_base: int) -> int:
+    """
+    Maior tamanho inteiro <= tamanho_base em que o texto cabe em largura_max
+    (mínimo TAMANHO_FONTE_MINIMO). Uma divisão em vez de testar tamanho a tamanho;
+    os mesmos rótulos se repetem em todas as páginas e PDFs do lote.
+    """
+    largura = _largura_unitaria(texto, fonte)
+    if largura <= 0:
+        return tamanho_base
+    return max(TAMANHO_FONTE_MINIMO, min(tamanho_base, math.floor(largura_max / largura)))
 
 
 
@@ -146,129 +333,19 @@ class GeradorDesenhoTecnico:
         """
         Distribui furos entre INFERIOR e SUPERIOR respeitando regra dos 100mm.
         
-        Lógica:
+        Lógica (ver PlanejadorFuracao):
         1. Agrupar furos por características (diâmetro + profundidade)
-        2. Para cada grupo, verificar se cabe sozinho (sem conflito interno)
-        3. Distribuir grupos entre INFERIOR e SUPERIOR
-        4. Se não couber, criar 2ª PASSADA
+        2. Cada grupo vai inteiro para um lado (INFERIOR até 6 linhas, SUPERIOR até 4)
+        3. Buscar a distribuição com menos passadas / menos furos fora da 1ª
+        4. O que não couber na 1ª passada vira 2ª PASSADA (ou seguintes)
         
         Args:
             furos_verticais: lista de FuroVertical
             
         Returns:
-            dict com distribuição dos furos
+            dict com distribuição dos furos (inclui 'passadas')
         """
-        if not furos_verticais:
-            return {
-                'inferior': [],
-                'superior': [],
-                'segunda_furacao': [],
-                'precisa_segunda_furacao': False
-            }
-        
-        # Verificar se tem conflito geral
-        linhas_todas = self.agrupar_por_linha_furacao(furos_verticais)
-        if not self.verificar_conflito_100mm(list(linhas_todas.keys())):
-            # Sem conflito - tudo vai para inferior
-            return {
-                'inferior': furos_verticais,
-                'superior': [],
-                'segunda_furacao': [],
-                'precisa_segunda_furacao': False
-            }
-        
-        # TEM CONFLITO - Agrupar por características (diâmetro + profundidade)
-        grupos = {}
-        for furo in furos_verticais:
-            chave = (round(float(furo.diametro), 1), round(float(furo.profundidade), 1))
-            if chave not in grupos:
-                grupos[chave] = []
-            grupos[chave].append(furo)
-        
-        # Para cada grupo, pegar as linhas X
-        grupos_com_linhas = []
-        for chave, furos_grupo in grupos.items():
-            linhas_grupo = self.agrupar_por_linha_furacao(furos_grupo)
-            linhas_x = sorted(linhas_grupo.keys())
-            tem_conflito_interno = self.verificar_conflito_100mm(linhas_x)
-            
-            diametro = chave[0]  # chave = (diâmetro, profundidade)
-            
-            grupos_com_linhas.append({
-                'chave': chave,
-                'furos': furos_grupo,
-                'linhas_x': linhas_x,
-                'tem_conflito_interno': tem_conflito_interno,
-                'diametro': diametro
-            })
-
-        # Ordenar grupos: primeiro os sem conflito interno, depois por DIÂMETRO (menor primeiro)
-        grupos_com_linhas.sort(key=lambda g: (g['tem_conflito_interno'], g['diametro']))
-        
-        # Distribuir grupos entre INFERIOR e SUPERIOR
-        linhas_inferior = []
-        linhas_superior = []
-        linhas_segunda = []
-        
-        furos_inferior = []
-        furos_superior = []
-        furos_segunda = []
-        
-        for grupo in grupos_com_linhas:
-            linhas_x = grupo['linhas_x']
-            furos_grupo = grupo['furos']
-            
-            # Tentar colocar o grupo inteiro em INFERIOR
-            pode_inferior = self._grupo_cabe_no_lado(linhas_x, linhas_inferior, max_linhas=6)
-            
-            if pode_inferior:
-                linhas_inferior.extend(linhas_x)
-                furos_inferior.extend(furos_grupo)
-                continue
-            
-            # Tentar colocar o grupo inteiro em SUPERIOR
-            pode_superior = self._grupo_cabe_no_lado(linhas_x, linhas_superior, max_linhas=4)
-            
-            if pode_superior:
-                linhas_superior.extend(linhas_x)
-                furos_superior.extend(furos_grupo)
-                continue
-            
-            # Não coube inteiro - vai para 2ª PASSADA
-            linhas_segunda.extend(linhas_x)
-            furos_segunda.extend(furos_grupo)
-        
-        return {
-            'inferior': furos_inferior,
-            'superior': furos_superior,
-            'segunda_furacao': furos_segunda,
-            'precisa_segunda_furacao': len(furos_segunda) > 0
-        }
-
-
-    def _grupo_cabe_no_lado(self, linhas_novas: list, linhas_existentes: list, max_linhas: int) -> bool:
-        """
-        Verifica se um grupo de linhas cabe em um lado (inferior/superior).
-        
-        Args:
-            linhas_novas: linhas X do grupo a adicionar
-            linhas_existentes: linhas X já no lado
-            max_linhas: máximo de linhas permitidas (6 inferior, 4 superior)
-            
-        Returns:
-            True se cabe, False se não cabe
-        """
-        # Verificar limite de linhas
-        if len(linhas_existentes) + len(linhas_novas) > max_linhas:
-            return False
-        
-        # Verificar conflito de 100mm com linhas existentes
-        for x_nova in linhas_novas:
-            for x_existente in linhas_existentes:
-                if abs(x_nova - x_existente) < 100:
-                    return False
-        
-        return True
+        return PlanejadorFuracao().planejar(furos_verticais)
 
     def formatar_cota(self, valor):
         """
@@ -319,38 +396,32 @@ class GeradorDesenhoTecnico:
         Espelha a peça verticalmente (inverte de cima para baixo)
         Borda inferior vai para cima
         """
-        from copy import deepcopy
+        comprimento = float(peca.dimensoes.comprimento)
         
-        peca_espelhada = deepcopy(peca)
+        horizontais = ConjuntoFuros(peca.furos_horizontais)
+        if not len(horizontais):
+            return replace(peca)
         
-        comprimento = float(peca.dimensoes.comprimento)
-        espessura = float(peca.dimensoes.espessura)
-        
-        # Criar dicionário: Y_original → lista de furos
-        furos_por_y_original = {}
-        for furo in peca.furos_horizontais:  # ← Usar ORIGINAL, não espelhada
-            y_orig = float(furo.y)
-            if y_orig not in furos_por_y_original:
-                furos_por_y_original[y_orig] = []
-            furos_por_y_original[y_orig].append(furo)
-        
-        # Para cada Y original, inverter e manter as propriedades
-        for y_original, furos_grupo in furos_por_y_original.items():
-            y_invertido = comprimento - y_original
-            
-            # Achar furos na lista espelhada com esse Y invertido
-            for furo_espelhado in peca_espelhada.furos_horizontais:
-                if abs(float(furo_espelhado.y) - y_invertido) < 0.01:  # Tolerância float
-                    # Encontrar o furo correspondente no grupo original
-                    for furo_orig in furos_grupo:
-                        if (abs(float(furo_orig.x if isinstance(furo_orig.x, float) else 0) - 
-                                float(furo_espelhado.x if isinstance(furo_espelhado.x, float) else 0)) < 0.01 and
-                            furo_orig.lado == furo_espelhado.lado):
-                            # Copiar profundidade do original
-                            furo_espelhado.profundidade = furo_orig.profundidade
-                            break
-        
-        return peca_espelhada   
+        # Posição do par de cada furo: Y espelhado (Y -> comprimento - Y)
+        # X textual ('x' = lado oposto) ou inteiro entra como 0, igual à comparação anterior
+        x_chave = [float(f.x) if isinstance(f.x, float) else 0.0 for f in peca.furos_horizontais]
+        _, y_par = ConjuntoFuros.transformar_pontos(
+            matriz_espelho_vertical(comprimento), np.array(x_chave), horizontais.y
+        )
+        
+        originais = IndiceEspacial(TOL_PAR_ESPELHADO)
+        for i, (x, y) in enumerate(zip(x_chave, horizontais.y.tolist())):
+            originais.inserir((x, y), i, horizontais.lado[i])
+        
+        # Cada furo espelhado herda a profundidade do par com Y invertido
+        furos_horizontais = []
+        for i, furo in enumerate(peca.furos_horizontais):
+            par = originais.mais_proximo((x_chave[i], y_par[i]), TOL_PAR_ESPELHADO, horizontais.lado[i])
+            if par is not None and peca.furos_horizontais[par].profundidade != furo.profundidade:
+                furo = replace(furo, profundidade=peca.furos_horizontais[par].profundidade)
+            furos_horizontais.append(furo)
+        
+        return replace(peca, furos_horizontais=furos_horizontais)
     
     def aplicar_rotacao(self, peca: Peca, angulo: int) -> Peca:
         """
@@ -365,97 +436,26 @@ class GeradorDesenhoTecnico:
         Returns:
             Peça rotacionada com nova origem
         """
-        from copy import deepcopy
-        
-        if angulo == 0:
+        if angulo not in (90, 180, 270):
             return peca  # Sem rotação
         
-        peca_rotacionada = deepcopy(peca)
-        
         largura = float(peca.dimensoes.largura)
         comprimento = float(peca.dimensoes.comprimento)
-        
-        if angulo == 90:
-            # 90° horário
-            peca_rotacionada.dimensoes.largura = comprimento
-            peca_rotacionada.dimensoes.comprimento = largura
-            
-            # Rotacionar furos verticais
-            for furo in peca_rotacionada.furos_verticais:
-                try:
-                    x_original = float(furo.x)
-                    y_original = float(furo.y)
-                    furo.x = comprimento - y_original
-                    furo.y = x_original
-                except:
-                    continue
-            
-            # Rotacionar furos horizontais
-            for furo in peca_rotacionada.furos_horizontais:
-                try:
-                    if isinstance(furo.x, str):
-                        continue
-                    x_original = float(furo.x)
-                    y_original = float(furo.y)
-                    furo.x = comprimento - y_original
-                    furo.y = x_original
-                except:
-                    continue
-                    
-        elif angulo == 180:
-            # 180°
-            # Dimensões não mudam
-            
-            # Rotacionar furos verticais
-            for furo in peca_rotacionada.furos_verticais:
-                try:
-                    x_original = float(furo.x)
-                    y_original = float(furo.y)
-                    furo.x = largura - x_original
-                    furo.y = comprimento - y_original
-                except:
-                    continue
-            
-            # Rotacionar furos horizontais
-            for furo in peca_rotacionada.furos_horizontais:
-                try:
-                    if isinstance(furo.x, str):
-                        continue
-                    x_original = float(furo.x)
-                    y_original = float(furo.y)
-                    furo.x = largura - x_original
-                    furo.y = comprimento - y_original
-                except:
-                    continue
-                    
-        elif angulo == 270:
-            # 270° horário (90° anti-horário)
-            peca_rotacionada.dimensoes.largura = comprimento
-            peca_rotacionada.dimensoes.comprimento = largura
-            
-            # Rotacionar furos verticais
-            for furo in peca_rotacionada.furos_verticais:
-                try:
-                    x_original = float(furo.x)
-                    y_original = float(furo.y)
-                    furo.x = y_original
-                    furo.y = largura - x_original
-                except:
-                    continue
-            
-            # Rotacionar furos horizontais
-            for furo in peca_rotacionada.furos_horizontais:
-                try:
-                    if isinstance(furo.x, str):
-                        continue
-                    x_original = float(furo.x)
-                    y_original = float(furo.y)
-                    furo.x = y_original
-                    furo.y = largura - x_original
-                except:
-                    continue
-        
-        return peca_rotacionada
+        matriz = matriz_rotacao(angulo, largura, comprimento)
+        
+        # 90°/270° trocam largura e comprimento
+        dimensoes = replace(peca.dimensoes)
+        if angulo in (90, 270):
+            dimensoes.largura = comprimento
+            dimensoes.comprimento = largura
+        
+        # Furos com X textual ("x") ou coordenada inválida ficam onde estão
+        return replace(
+            peca,
+            dimensoes=dimensoes,
+            furos_verticais=ConjuntoFuros(peca.furos_verticais).furos_transformados(matriz),
+            furos_horizontais=ConjuntoFuros(peca.furos_horizontais).furos_transformados(matriz)
+        )
     
     def desenhar_retangulo_peca(self, c: canvas.Canvas, x_origem: float, y_origem: float,
                                 largura: float, altura: float):
@@ -464,177 +464,10 @@ class GeradorDesenhoTecnico:
         c.setLineWidth(1)
         c.rect(x_origem, y_origem, largura, altura, stroke=1, fill=0)
     
-    def desenhar_cota_furo(self, c: canvas.Canvas, x_origem_peca: float, y_origem_peca: float,
-                      x_furo: float, y_furo: float, distancia_x: float, distancia_y: float,
-                      largura_peca: float, altura_peca: float, escala: float, 
-                      mostrar_x: bool = True, mostrar_y: bool = True,
-                      offset_externo_x: float = 25, offset_externo_y: float = 25):
-        """
-        Desenha cotas de posição do furo em relação às bordas
-        Cotas saem DO FURO para FORA da peça
-        
-        Args:
-            x_origem_peca, y_origem_peca: origem do desenho da peça
-            x_furo, y_furo: posição do furo no desenho (já em escala)
-            distancia_x, distancia_y: distâncias reais em mm
-            largura_peca, altura_peca: dimensões da peça desenhada
-            escala: escala do desenho
-            mostrar_x, mostrar_y: quais cotas mostrar
-        """
-        c.setStrokeColor(colors.HexColor("#A5A6A68A"))
-        c.setLineWidth(0.3)
-        
-        # COTA HORIZONTAL (X) - sai do furo para CIMA
-        if mostrar_x and distancia_x > 0:
-            # Borda superior da peça
-            y_borda_superior = y_origem_peca + altura_peca
-            
-            # Linha do furo até fora da peça
-            c.line(x_furo, y_furo, x_furo, y_borda_superior + offset_externo_x)
-            c.setDash()  # Sólida
-            
-            # Texto VERTICAL acima
-            c.setFont("Helvetica", 11)
-            c.setFillColor(colors.HexColor("#000000"))
-            c.saveState()
-            x_texto = x_furo - 3
-            y_texto = y_borda_superior + offset_externo_x + 10
-            c.translate(x_texto, y_texto)
-            c.rotate(90)
-            c.drawCentredString(0, 0, self.formatar_cota(distancia_x))
-            c.restoreState()
-
-        # COTA VERTICAL (Y) - sai do furo para a ESQUERDA
-        if mostrar_y and distancia_y > 0:
-            # Borda esquerda da peça
-            x_borda_esquerda = x_origem_peca
-            
-            # Linha do furo até fora da peça
-            c.line(x_furo, y_furo, x_borda_esquerda - offset_externo_y, y_furo)
-            c.setDash()  # Sólida
-            
-            # Texto HORIZONTAL à esquerda
-            c.setFont("Helvetica", 11)
-            c.setFillColor(colors.HexColor("#000000"))
-            y_texto = y_furo
-            x_texto = x_borda_esquerda - offset_externo_y - 10
-            c.drawRightString(x_texto, y_texto - 3, self.formatar_cota(distancia_y))
-
-        c.setFillColor(colors.black)  # Restaura cor
-    
-    def desenhar_furo_vertical(self, c: canvas.Canvas, x_origem: float, y_origem: float,
-                       furo: FuroVertical, escala: float, altura_peca: float,
-                       mandril: int = None):
-        """
-        Desenha marcação de furo vertical (vista de topo)
-        
-        Args:
-            x_origem, y_origem: origem do desenho da peça
-            furo: dados do furo
-            escala: escala do desenho
-        """
-        # Posição do furo no desenho
-        x_furo = x_origem + (furo.x * mm * escala)
-        y_furo = y_origem + altura_peca - (furo.y * mm * escala)
-        raio = (furo.diametro / 2) * mm * escala
-        # Com limites para não ficar muito pequeno ou grande
-        raio = max(1.5, min(6, raio))
-        
-        # Desenhar círculo do furo
-        c.setStrokeColor(colors.black)
-        c.setLineWidth(0.5)
-        c.circle(x_furo, y_furo, raio, stroke=1, fill=0)
-        
-        # # Desenhar linhas cruzadas no centro
-        # c.setLineWidth(0.2)
-        # c.line(x_furo - raio * 1.5, y_furo, x_furo + raio * 1.5, y_furo)
-        # c.line(x_furo, y_furo - raio * 1.5, x_furo, y_furo + raio * 1.5)
-        
-        # Adicionar texto com especificações
-        c.setFont("Helvetica", 10)
-        if furo.profundidade == 0:
-            texto = f"Ø{self.formatar_cota(furo.diametro)}"
-        else:
-            texto = f"Ø{self.formatar_cota(furo.diametro)}X{self.formatar_cota(furo.profundidade)}"
-
-        # Adicionar mandril se disponível
-        if mandril:
-            texto = f"{texto},M{mandril}"
-        
-        # Posicionar texto ao lado do furo
-        offset_x = raio * 8.5
-        offset_y = raio * 0.2
-        x_texto_inicio = x_furo + offset_x
-        y_texto = y_furo + offset_y
-
-        # Linha discreta do furo até o texto
-        c.setStrokeColor(colors.grey)
-        c.setLineWidth(0.5)
-        c.line(x_furo + raio, y_furo, x_texto_inicio - 2, y_furo)
-
-        # Setinha pequena no final
-        tamanho_seta = 2
-        c.line(x_texto_inicio - 2, y_furo, x_texto_inicio - 2 - tamanho_seta, y_furo + tamanho_seta)
-        c.line(x_texto_inicio - 2, y_furo, x_texto_inicio - 2 - tamanho_seta, y_furo - tamanho_seta)
-
-        # Restaurar cor preta para o texto
-        c.setStrokeColor(colors.black)
-
-        # Desenhar texto
-        c.setFillColor(colors.black)
-        c.drawString(x_texto_inicio, y_texto, texto)
-        
-        # Retornar posição para desenhar cotas depois
-        return (x_furo, y_furo)
-    
-    def desenhar_cota_principal(self, c: canvas.Canvas, x_origem: float, y_origem: float,
-                           largura: float, altura: float, largura_real: float, 
-                           altura_real: float, offset: float):
-        """
-        Desenha cotas principais da peça (MESMO ESTILO das cotas dos furos)
-        """
-        
-        c.setStrokeColor(colors.HexColor('#A5A6A68A'))
-        c.setLineWidth(0.3)
-        
-        offset_externo = 15  # Distância para fora da peça (um pouco mais que os furos)
-        
-        # COTA 1: VERTICAL (297) - linha sai para CIMA do canto direito
-        x_borda_direita = x_origem + largura
-        y_topo = y_origem + altura
-
-        # Linha tracejada para cima
-        c.line(x_borda_direita, y_topo, x_borda_direita, y_topo + offset_externo)
-        c.setDash()
-
-        # Texto VERTICAL (rotacionado) - COTA DE 297
-        c.setFont("Helvetica", 11)
-        c.setFillColor(colors.HexColor("#000000"))
-        c.saveState()
-        c.translate(x_borda_direita, y_topo + offset_externo + 8)
-        c.rotate(90)
-        c.drawCentredString(0, 0, f"{largura_real:.0f}")  # ← 297
-        c.restoreState()
-
-        # COTA 2: HORIZONTAL (269) - linha sai para BAIXO da esquerda
-        x_esquerda = x_origem
-        y_base = y_origem  # ← BASE (ponto zero)
-        
-        # Linha tracejada para baixo
-        c.line(x_esquerda, y_base, x_esquerda - offset_externo, y_base)
-        c.setDash()
-        
-        # Texto HORIZONTAL à esquerda - COTA DE 269
-        c.setFont("Helvetica", 11)
-        c.setFillColor(colors.HexColor("#000000"))
-        c.drawRightString(x_esquerda - offset_externo - 8, y_base - 3, f"{altura_real:.0f}")
-        
-        c.setFillColor(colors.black)  # Restaura cor
-    
     def desenhar_vista_lateral(self, c: canvas.Canvas, x_origem: float, y_origem: float,
                         peca: Peca, lado: str, largura_disponivel: float, 
                         altura_disponivel: float, espelhado: bool = False,
-                        batente: float = None):
+                        batente: float = None, chave=None):
         """
         Desenha vista lateral da peça mostrando furos horizontais
         AGORA COM ESCALA DINÂMICA E MANDRIL!
@@ -647,8 +480,16 @@ class GeradorDesenhoTecnico:
             altura_disponivel: espaço vertical disponível
             espelhado: se a peça foi espelhada
             batente: valor Y do batente para cálculo do mandril
+            chave: identifica peça+página (liga o cache de layout)
         """
-
+        self._desenhar_vista_lateral(c, *self._layout_vista_lateral(
+            x_origem, y_origem, peca, lado, largura_disponivel, altura_disponivel,
+            espelhado, batente, chave))
+
+    def _layout_vista_lateral(self, x_origem: float, y_origem: float, peca: Peca, lado: str,
+                              largura_disponivel: float, altura_disponivel: float,
+                              espelhado: bool = False, batente: float = None, chave=None):
+        """(retângulo da vista, operações de cota) da vista lateral, sem desenhar"""
         espessura_peca = float(peca.dimensoes.espessura)
         altura_peca = float(peca.dimensoes.comprimento)
         
@@ -674,57 +515,8 @@ class GeradorDesenhoTecnico:
         
         offset_y = (altura_disponivel - altura_vista) / 2
         y_origem_centralizado = y_origem + offset_y
-                
-        # Desenhar retângulo da vista
-        c.setStrokeColor(colors.black)
-        c.setLineWidth(1)
-        c.rect(x_origem_centralizado, y_origem_centralizado, largura_vista, altura_vista, stroke=1, fill=0)
-        
-        # ===== COTA DA ESPESSURA =====
-        if lado == 'esquerda':
-            x_inicio = x_origem_centralizado + largura_vista
-            y_inicio = y_origem_centralizado + altura_vista
-            x_texto_final = x_inicio + 15
-            altura_linha_vertical = 15
-            
-            c.setStrokeColor(colors.HexColor("#A5A6A68A"))
-            c.setLineWidth(0.5)
-            c.setDash()
-            c.line(x_inicio, y_inicio, x_inicio, y_inicio + altura_linha_vertical)
-            c.line(x_inicio, y_inicio + altura_linha_vertical, x_texto_final, y_inicio + altura_linha_vertical)
-            c.setDash()
-            
-            c.setFont("Helvetica", 11)
-            c.setFillColor(colors.HexColor("#000000"))
-            c.saveState()
-            c.translate(x_texto_final, y_inicio + altura_linha_vertical + 8)
-            c.rotate(90)
-            c.drawCentredString(0, 0, self.formatar_cota(espessura_peca))
-            c.restoreState()
-
-        elif lado == 'direita':
-            # Cota da espessura à DIREITA
-            x_inicio = x_origem_centralizado + largura_vista
-            y_inicio = y_origem_centralizado + altura_vista
-            x_texto_final = x_inicio + 15
-            altura_linha_vertical = 15
-            
-            c.setStrokeColor(colors.HexColor('#A5A6A68A'))
-            c.setLineWidth(0.5)
-            c.setDash()
-            c.line(x_inicio, y_inicio, x_inicio, y_inicio + altura_linha_vertical)
-            c.line(x_inicio, y_inicio + altura_linha_vertical, x_texto_final, y_inicio + altura_linha_vertical)
-            c.setDash()
-            
-            c.setFont("Helvetica", 11)
-            c.setFillColor(colors.HexColor("#000000"))
-            c.saveState()
-            c.translate(x_texto_final, y_inicio + altura_linha_vertical + 8)
-            c.rotate(90)
-            c.drawCentredString(0, 0, self.formatar_cota(espessura_peca))
-            c.restoreState()
         
-        # ===== FILTRAR E DESENHAR FUROS =====
+        # ===== FUROS, COTAS Y/Z, ESPESSURA E ESPECIFICAÇÕES =====
         furos_lado = [f for f in peca.furos_horizontais
                     if (lado == 'esquerda' and f.lado in ['XM', 'YM']) or
                         (lado == 'direita' and f.lado in ['XP', 'YP'])]
@@ -732,126 +524,24 @@ class GeradorDesenhoTecnico:
         # Ordenar por Y decrescente
         furos_lado = sorted(furos_lado, key=lambda f: float(f.y), reverse=True)
         
-        # Agrupar por Z para cotas
-        furos_por_x = {}
-        for furo in furos_lado:
-            x_key = round(float(furo.z), 1)
-            if x_key not in furos_por_x:
-                furos_por_x[x_key] = []
-            furos_por_x[x_key].append(furo)
-
-        furos_com_cota_z = set()
-        for x_pos, furos_na_coluna in furos_por_x.items():
-            furo_mais_proximo_topo = min(furos_na_coluna, key=lambda f: float(f.y))
-            furos_com_cota_z.add(id(furo_mais_proximo_topo))
-        
-        # Desenhar furos
-        for furo in furos_lado:
-            y_furo_real = float(furo.y)
-            z_furo_real = float(furo.z)
-            
-            y_furo_desenho = y_origem_centralizado + altura_vista - (y_furo_real * mm * escala)
-            x_furo_desenho = x_origem_centralizado + (z_furo_real * mm * escala)
-            
-            # Raio proporcional ao diâmetro real do furo
-            raio_furo = (furo.diametro / 2) * mm * escala
-            # Com limites para não ficar muito pequeno ou grande
-            raio_furo = max(1.5, min(6, raio_furo))
-            
-            c.setStrokeColor(colors.black)
-            c.setFillColor(colors.black)
-            c.circle(x_furo_desenho, y_furo_desenho, raio_furo, stroke=1, fill=0)
-            
-            # ===== COTA Y - DEPENDE DO LADO =====
-            offset_externo = 15
-            c.setStrokeColor(colors.HexColor('#A5A6A68A'))
-            c.setLineWidth(0.5)
-            c.setDash()
-            
-            if lado == 'esquerda':
-                # Cota Y à ESQUERDA
-                c.line(x_furo_desenho - raio_furo, y_furo_desenho, x_origem_centralizado - offset_externo, y_furo_desenho)
-                c.setDash()
-                
-                c.setFont("Helvetica", 11)
-                c.setFillColor(colors.HexColor("#000000"))
-                c.drawRightString(x_origem_centralizado - offset_externo - 8, y_furo_desenho - 2, self.formatar_cota(y_furo_real))
-            else:
-                # Cota Y à DIREITA
-                x_borda_direita = x_origem_centralizado + largura_vista
-                c.line(x_furo_desenho + raio_furo, y_furo_desenho, x_borda_direita + offset_externo, y_furo_desenho)
-                c.setDash()
-                
-                c.setFont("Helvetica", 11)
-                c.setFillColor(colors.HexColor("#000000"))
-                c.drawString(x_borda_direita + offset_externo + 8, y_furo_desenho - 2, self.formatar_cota(y_furo_real))
-            
-            # ===== COTA Z (só para furo mais próximo do topo) =====
-            if id(furo) in furos_com_cota_z:
-                offset_topo = 15
-                c.setStrokeColor(colors.HexColor('#A5A6A68A'))
-                c.setLineWidth(0.5)
-                c.setDash()
-                c.line(x_furo_desenho, y_furo_desenho + raio_furo, x_furo_desenho, y_origem_centralizado + altura_vista + offset_topo)
-                c.setDash()
-                
-                c.setFont("Helvetica", 11)
-                c.setFillColor(colors.HexColor("#000000"))
-                c.saveState()
-                c.translate(x_furo_desenho, y_origem_centralizado + altura_vista + offset_topo + 8)
-                c.rotate(90)
-                c.drawCentredString(0, 0, self.formatar_cota(z_furo_real))
-                c.restoreState()
-            
-            # ===== CALCULAR MANDRIL =====
-            mandril = self.calcular_mandril(y_furo_real, batente)
-            
-            # Especificação do furo COM MANDRIL
-            if furo.profundidade == 0:
-                texto_spec = f"Ø{self.formatar_cota(furo.diametro)} M{mandril}"
-            else:
-                texto_spec = f"Ø{self.formatar_cota(furo.diametro)}X{self.formatar_cota(furo.profundidade)},M{mandril}"
-            
-            y_texto = y_furo_desenho - 2
-            
-            # ===== ESPECIFICAÇÕES - DIREÇÃO DEPENDE DO LADO =====
-            c.setStrokeColor(colors.grey)
-            c.setLineWidth(0.5)
-            
-            if lado == 'esquerda':
-                # Especificações à DIREITA da vista
-                offset_x_spec = largura_vista + 10
-                x_texto_inicio = x_origem_centralizado + offset_x_spec
-                
-                c.line(x_furo_desenho + raio_furo, y_furo_desenho, x_texto_inicio - 2, y_furo_desenho)
-                
-                tamanho_seta = 2
-                c.line(x_texto_inicio - 2, y_furo_desenho, x_texto_inicio - 2 - tamanho_seta, y_furo_desenho + tamanho_seta)
-                c.line(x_texto_inicio - 2, y_furo_desenho, x_texto_inicio - 2 - tamanho_seta, y_furo_desenho - tamanho_seta)
-                
-                c.setStrokeColor(colors.black)
-                c.setFillColor(colors.black)
-                c.setFont("Helvetica", 11)
-                c.drawString(x_texto_inicio, y_texto, texto_spec)
-            
-            else:
-                # Especificações à ESQUERDA da vista (lado == 'direita')
-                offset_x_spec = 10
-                x_texto_fim = x_origem_centralizado - offset_x_spec
-                
-                c.line(x_furo_desenho - raio_furo, y_furo_desenho, x_texto_fim + 2, y_furo_desenho)
-                
-                tamanho_seta = 2
-                c.line(x_texto_fim + 2, y_furo_desenho, x_texto_fim + 2 + tamanho_seta, y_furo_desenho + tamanho_seta)
-                c.line(x_texto_fim + 2, y_furo_desenho, x_texto_fim + 2 + tamanho_seta, y_furo_desenho - tamanho_seta)
-                
-                c.setStrokeColor(colors.black)
-                c.setFillColor(colors.black)
-                c.setFont("Helvetica", 11)
-                c.drawRightString(x_texto_fim, y_texto, texto_spec)
-        
-        c.setFillColor(colors.black)
+        with etapa('layout_cotas'):
+            operacoes = _em_cache(
+                cache_layout, 'layout',
+                chave and (chave, lado, x_origem, y_origem, largura_disponivel, altura_disponivel,
+                           espelhado, batente),
+                lambda: layout_vista_lateral(
+                    furos_lado, [self.calcular_mandril(float(furo.y), batente) for furo in furos_lado], lado,
+                    x_origem_centralizado, y_origem_centralizado, largura_vista, altura_vista, escala,
+                    espessura_peca, self.formatar_cota
+                ))
+        return (x_origem_centralizado, y_origem_centralizado, largura_vista, altura_vista), operacoes
+
+    def _desenhar_vista_lateral(self, c: canvas.Canvas, retangulo: tuple, operacoes):
+        """Retângulo da vista lateral + operações de cota já calculadas"""
         c.setStrokeColor(colors.black)
+        c.setLineWidth(1)
+        c.rect(*retangulo, stroke=1, fill=0)
+        desenhar_operacoes(c, operacoes)
     
     def desenhar_alerta_atencao(self, c: canvas.Canvas, x: float, y: float, 
                             texto_atencao: str = None):
@@ -882,11 +572,13 @@ class GeradorDesenhoTecnico:
                 x_ajustado = x - 15
                 y_ajustado = y - 15 
 
-                c.drawImage(caminho_triangulo, x_ajustado, y_ajustado, 
-                        width=tamanho_triangulo, 
-                        height=tamanho_triangulo,
-                        preserveAspectRatio=True, 
-                        mask='auto')
+                with etapa('imagens'):
+                    registrar_imagem(c, caminho_triangulo, mask='auto')
+                    c.drawImage(caminho_triangulo, x_ajustado, y_ajustado, 
+                            width=tamanho_triangulo, 
+                            height=tamanho_triangulo,
+                            preserveAspectRatio=True, 
+                            mask='auto')
             except Exception as e:
                 # Fallback: desenha texto se não carregar
                 c.setFillColor(colors.black)
@@ -906,20 +598,20 @@ class GeradorDesenhoTecnico:
         c.setFillColor(colors.black)
 
     def calcular_tamanho_fonte_dinamico(self, c, texto: str, largura_max: float, fonte: str, tamanho_base: int = 12) -> int:
-        """Reduz fonte até caber na célula"""
-        tamanho = tamanho_base
-        while tamanho > 7:
-            if c.stringWidth(texto, fonte, tamanho) <= largura_max:
-                return tamanho
-            tamanho -= 1
-        return 7    
+        """Reduz fonte até caber na célula (cache em tamanho_fonte_ajustado)"""
+        return tamanho_fonte_ajustado(texto, fonte, largura_max, tamanho_base)
     
     def desenhar_tabela_horizontal(self, c: canvas.Canvas, x: float, y: float, 
                                 largura: float, altura: float, peca: Peca, 
-                                config: dict, dados_adicionais: dict = None):
+                                config: dict, dados_adicionais: dict = None,
+                                y_margem_superior: float = None, dados_tabela: list = None):
         """
         Desenha tabela HORIZONTAL com informações técnicas (abaixo do desenho)
         
+        A parte fixa (grade, labels, logo, legenda de borda e margem da página)
+        é gravada uma vez por documento como Form XObject e só referenciada
+        nas páginas seguintes; cada página desenha apenas os valores.
+        
         Args:
             c: Canvas do ReportLab
             x, y: posição inferior esquerda da tabela
@@ -927,22 +619,40 @@ class GeradorDesenhoTecnico:
             peca: objeto Peca com dados
             config: configurações do arquivo JSON
             dados_adicionais: dados extras passados manualmente
+            y_margem_superior: se informado, a margem externa da página
+                (da tabela até esta altura) entra na parte fixa
+            dados_tabela: células já montadas (_dados_tabela), se houver
         """
-        from datetime import datetime
-        from reportlab.lib.utils import ImageReader
-        import os
-        
         if dados_adicionais is None:
             dados_adicionais = {}
         
-        # Configurações visuais
-        visual = config.get('visual', {})
-        fonte = visual.get('fonte_tabela', 'Helvetica')
+        fonte = config.get('visual', {}).get('fonte_tabela', 'Helvetica')
+        if dados_tabela is None:
+            dados_tabela = self._dados_tabela(peca, config, dados_adicionais)
+        labels = tuple(label for label, _ in dados_tabela)
+        
+        chave = (labels, fonte, config.get('visual', {}).get('logo', 'logo.png'),
+                 round(y, 3), round(altura, 3), y_margem_superior)
+        self._usar_moldura(c, chave, lambda: self._desenhar_moldura_tabela(
+            c, y, altura, labels, config, y_margem_superior))
+        self._desenhar_valores_tabela(c, y, altura, dados_tabela, fonte)
+
+    def _usar_moldura(self, c: canvas.Canvas, chave: tuple, desenhar):
+        """Desenha via Form XObject: grava na primeira vez (por documento), depois só referencia"""
+        nome = "Moldura" + hashlib.sha1(repr(chave).encode('utf-8')).hexdigest()[:16]
+        if not c.hasForm(nome):
+            c.beginForm(nome)
+            desenhar()
+            c.endForm()
+        c.doForm(nome)
+
+    def _dados_tabela(self, peca: Peca, config: dict, dados_adicionais: dict) -> list:
+        """Pares (label, valor) das células da tabela, na ordem do config (só campos com valor)"""
+        from datetime import datetime
         
         campos_padrao = config.get('campos_padrao', {})
         campos_config = config.get('campos_tabela', [])
         
-        # PREPARAR DADOS
         dados_tabela = []
         
         for campo in campos_config:
@@ -996,37 +706,39 @@ class GeradorDesenhoTecnico:
             if valor:  # Só adiciona se tiver valor
                 dados_tabela.append((label, str(valor)))
         
-        # CALCULAR LAYOUT - Dividir em colunas
-        num_campos = len(dados_tabela)
-        
-        largura_logo = 80
-
-        # ===== CONFIGURAÇÃO DE COLUNAS POR LINHA =====
-        # Defina quantas colunas cada linha tem
-        colunas_linha_1 = 7
-        colunas_linha_2 = 6
-
-        # Defina as larguras para cada linha separadamente
-        larguras_linha_1 = [250, 100, 70, 70, 80, 60, 70]  # 7 colunas
-        larguras_linha_2 = [250, 65, 95, 100, 70, 120]       # 6 colunas     
+        return dados_tabela
 
-        # Dimensões
-        num_linhas = 2
-        altura_linha = altura / num_linhas
-
-        # Calcular largura total usando a linha mais larga
-        largura_conteudo = max(sum(larguras_linha_1), sum(larguras_linha_2))
-        largura_total = largura_logo + largura_conteudo
+    def _celulas_tabela(self, y: float, altura: float, quantidade: int):
+        """
+        Geometria das células: (índice, linha, coluna, x, y, largura, altura) de
+        cada campo. Linha 1 tem 7 colunas e linha 2 tem 6, logo à esquerda.
+        """
+        altura_linha = altura / 2
+        x_conteudo = (841.89 - LARGURA_TABELA) / 2 + LARGURA_LOGO
+        
+        indice = 0
+        for linha, larguras in enumerate((LARGURAS_LINHA_1, LARGURAS_LINHA_2)):
+            y_celula = y + altura - (linha + 1) * altura_linha
+            for coluna, largura_celula in enumerate(larguras):
+                if indice >= quantidade:
+                    return
+                x_celula = x_conteudo + sum(larguras[:coluna])
+                yield indice, linha, coluna, x_celula, y_celula, largura_celula, altura_linha
+                indice += 1
+
+    def _desenhar_moldura_tabela(self, c: canvas.Canvas, y: float, altura: float,
+                                 labels: tuple, config: dict, y_margem_superior: float = None):
+        """Parte fixa da tabela: borda, logo, grade, labels, legenda de borda e margem da página"""
+        import os
         
-        # Margem a esquerda
-        largura_total = largura_logo + max(sum(larguras_linha_1), sum(larguras_linha_2))
-        x = (841.89 - largura_total) / 2
-        x_conteudo = x + largura_logo
+        fonte = config.get('visual', {}).get('fonte_tabela', 'Helvetica')
+        x = (841.89 - LARGURA_TABELA) / 2
+        largura_logo = LARGURA_LOGO
 
         # DESENHAR BORDA EXTERNA
         c.setStrokeColor(colors.black)
         c.setLineWidth(1)
-        c.rect(x, y, largura_total, altura, stroke=1, fill=0)
+        c.rect(x, y, LARGURA_TABELA, altura, stroke=1, fill=0)
 
         # ===== ÁREA DO LOGO =====
         # Desenhar borda da área do logo
@@ -1052,9 +764,11 @@ class GeradorDesenhoTecnico:
                 logo_altura = altura - (2 * margem_logo)
                 
                 # Desenhar imagem mantendo proporção
-                c.drawImage(caminho_logo, logo_x, logo_y, 
-                        width=logo_largura, height=logo_altura, 
-                        preserveAspectRatio=True, mask='auto')
+                with etapa('imagens'):
+                    registrar_imagem(c, caminho_logo, mask='auto')
+                    c.drawImage(caminho_logo, logo_x, logo_y, 
+                            width=logo_largura, height=logo_altura, 
+                            preserveAspectRatio=True, mask='auto')
             except Exception as e:
                 # Se der erro ao carregar, desenha um texto placeholder
                 c.setFillColor(colors.grey)
@@ -1070,24 +784,10 @@ class GeradorDesenhoTecnico:
             c.drawCentredString(x + largura_logo/2, y + altura/2, "LOGO")
             c.setFillColor(colors.black)
         
-        # DESENHAR CÉLULAS
-        y_atual = y + altura
-        c.setStrokeColor(colors.black)
-        c.setLineWidth(0.5)
-
-        indice_dados = 0  # Controla qual dado estamos desenhando
-
-        # LINHA 1 - 7 colunas
-        for coluna in range(colunas_linha_1):
-            if indice_dados >= len(dados_tabela):
-                break
-            
-            label, valor = dados_tabela[indice_dados]
-            
-            # Calcular X da célula (após o logo)
-            x_celula = x_conteudo + sum(larguras_linha_1[:coluna])
-            largura_celula = larguras_linha_1[coluna]
-            y_celula = y_atual - altura_linha
+        # DESENHAR CÉLULAS (grade + labels)
+        for indice, linha, coluna, x_celula, y_celula, largura_celula, altura_linha in \
+                self._celulas_tabela(y, altura, len(labels)):
+            label = labels[indice]
             
             # Linhas da grade
             c.setStrokeColor(colors.black)
@@ -1097,7 +797,8 @@ class GeradorDesenhoTecnico:
             c.line(x_celula, y_celula, x_celula + largura_celula, y_celula)
             
             # Linha vertical direita (exceto última coluna)
-            if coluna < colunas_linha_1 - 1:
+            total_colunas = len(LARGURAS_LINHA_1) if linha == 0 else len(LARGURAS_LINHA_2)
+            if coluna < total_colunas - 1:
                 c.line(x_celula + largura_celula, y_celula, 
                     x_celula + largura_celula, y_celula + altura_linha)
 
@@ -1109,7 +810,7 @@ class GeradorDesenhoTecnico:
             c.setFillColor(colors.HexColor("#000000"))
 
             # Aumentar fonte de uma célula específica
-            if label == "PLANO DE FURAÇÃO":
+            if linha == 0 and label == "PLANO DE FURAÇÃO":
                 c.setFont(f"{fonte}-Bold", 12) 
                 y_label = y_celula + altura_linha - 15
                 x_centro = x_celula + largura_celula / 2
@@ -1119,138 +820,111 @@ class GeradorDesenhoTecnico:
                 y_label = y_celula + altura_linha - 9
                 c.drawString(x_celula + 4, y_label, label_exibido)
 
-            
-            # DESENHAR VALOR (normal, maior, embaix)
-            c.setFillColor(colors.black)
-
-            # Fonte varia por campo
-            if label == "PLANO DE FURAÇÃO":
-                tamanho_fonte = self.calcular_tamanho_fonte_dinamico(c, valor, largura_celula - 8, "Helvetica", tamanho_base=10)
-                c.setFont("Helvetica", tamanho_fonte)
-            elif label == "Página":
-                c.setFont("Helvetica", 12)    
-            else:
-                c.setFont(fonte, 12)
-            
-            # Centralizar valor horizontal e verticalmente
-            x_centro_valor = x_celula + largura_celula / 2
-            y_centro_valor = y_celula + (altura_linha / 4)  # Ajuste fino da altura
-            c.drawCentredString(x_centro_valor, y_centro_valor, valor)
-            
-            indice_dados += 1
+            if linha == 1 and label == "Borda":
+                # Legenda colorida para bordas (fixa: não depende do valor)
+                self._desenhar_legenda_borda(c, x_celula, y_celula, largura_celula, altura_linha, fonte)
 
-        # LINHA 2 - 6 colunas
-        y_atual -= altura_linha
-
-        for coluna in range(colunas_linha_2):
-            if indice_dados >= len(dados_tabela):
-                break
-            
-            label, valor = dados_tabela[indice_dados]
-            
-            # Calcular X da célula (após o logo)
-            x_celula = x_conteudo + sum(larguras_linha_2[:coluna])
-            largura_celula = larguras_linha_2[coluna]
-            y_celula = y_atual - altura_linha
-            
-            # Linhas da grade
+        # ===== MARGEM EXTERNA =====
+        if y_margem_superior is not None:
             c.setStrokeColor(colors.black)
             c.setLineWidth(0.5)
-            
-            # Linha horizontal inferior
-            c.line(x_celula, y_celula, x_celula + largura_celula, y_celula)
-            
-            # Linha vertical direita (exceto última coluna)
-            if coluna < colunas_linha_2 - 1:
-                c.line(x_celula + largura_celula, y_celula, 
-                    x_celula + largura_celula, y_celula + altura_linha)
-            
-            # DESENHAR LABEL (negrito, pequeno, em cima)
-            c.setFillColor(colors.HexColor("#000000"))
-            c.setFont(f"{fonte}-Bold", 9)
-            
-            # Calcular quantos caracteres cabem na célula
-            max_chars_label = int((largura_celula - 8) / 4)
-            label_exibido = label[:max_chars_label] + "..." if len(label) > max_chars_label else label
-            c.drawString(x_celula + 4, y_celula + altura_linha - 9, label_exibido)
+            c.rect(x, y, LARGURA_TABELA, y_margem_superior - y, stroke=1, fill=0)
+
+        c.setFillColor(colors.black)  # Restaura cor
+
+    def _desenhar_legenda_borda(self, c: canvas.Canvas, x_celula: float, y_celula: float,
+                                largura_celula: float, altura_linha: float, fonte: str):
+        """Legenda "COR" (traço verde) e "PARDO" (traço laranja) na célula Borda"""
+        c.setFont(fonte, 11)
+        
+        # Textos
+        texto_cor = "COR"
+        texto_pardo = "PARDO"
+        espaco_entre = 20
+        
+        # Calcular larguras
+        largura_cor = c.stringWidth(texto_cor, fonte, 11)
+        largura_pardo = c.stringWidth(texto_pardo, fonte, 11)
+        largura_total = largura_cor + espaco_entre + largura_pardo
+        
+        # Posição inicial centralizada
+        x_inicio = x_celula + (largura_celula - largura_total) / 2
+        y_texto = y_celula + (altura_linha / 4)
+        
+        # Desenhar "COR"
+        c.setFillColor(colors.black)
+        c.drawString(x_inicio, y_texto, texto_cor)
+        
+        # Traço verde abaixo de "COR"
+        c.setStrokeColor(colors.HexColor("#32CD32"))  # Verde limão
+        c.setLineWidth(3)
+        c.line(x_inicio, y_texto - 5, x_inicio + largura_cor, y_texto - 5)
+        
+        # Desenhar "PARDO"
+        x_pardo = x_inicio + largura_cor + espaco_entre
+        c.setFillColor(colors.black)
+        c.drawString(x_pardo, y_texto, texto_pardo)
+        
+        # Traço laranja abaixo de "PARDO"
+        c.setStrokeColor(colors.HexColor("#FF8C00"))  # Laranja
+        c.setLineWidth(3)
+        c.line(x_pardo, y_texto - 5, x_pardo + largura_pardo, y_texto - 5)
+        
+        # Resetar cores e linha
+        c.setStrokeColor(colors.black)
+        c.setLineWidth(0.5)
+        c.setFillColor(colors.black)
+
+    def _desenhar_valores_tabela(self, c: canvas.Canvas, y: float, altura: float,
+                                 dados_tabela: list, fonte: str):
+        """Parte variável da tabela: o valor de cada célula"""
+        for indice, linha, coluna, x_celula, y_celula, largura_celula, altura_linha in \
+                self._celulas_tabela(y, altura, len(dados_tabela)):
+            label, valor = dados_tabela[indice]
             
             # DESENHAR VALOR (normal, maior, embaixo)
             c.setFillColor(colors.black)
             
-            # Fonte varia por campo
-            if label == "Código/Descrição Peça":
-                tamanho_fonte = self.calcular_tamanho_fonte_dinamico(c, valor, largura_celula - 5, "Helvetica")
-                c.setFont("Helvetica", tamanho_fonte)
-            elif label == "Responsável":
-                tamanho_fonte = self.calcular_tamanho_fonte_dinamico(c, valor, largura_celula - 3, "Helvetica", tamanho_base=11)
-                c.setFont("Helvetica", tamanho_fonte)
-            elif label == "Conferente":
-                c.setFont("Helvetica", 10)
-            elif label == "Status":
-                tamanho_fonte = self.calcular_tamanho_fonte_dinamico(c, valor, largura_celula - 3, "Helvetica", tamanho_base=11)
-                c.setFont("Helvetica", tamanho_fonte)
-                if valor == "CÓPIA CONTROLADA":
-                    c.setFillColor(colors.HexColor("#0000FF"))  # Azul
+            if linha == 0:
+                # Fonte varia por campo
+                if label == "PLANO DE FURAÇÃO":
+                    tamanho_fonte = self.calcular_tamanho_fonte_dinamico(c, valor, largura_celula - 8, "Helvetica", tamanho_base=10)
+                    c.setFont("Helvetica", tamanho_fonte)
+                elif label == "Página":
+                    c.setFont("Helvetica", 12)    
                 else:
-                    c.setFillColor(colors.HexColor("#FF0000"))  # Vermelho              
-            elif label == "Borda":
-                # Desenhar legenda colorida para bordas
-                c.setFont(fonte, 11)
-                
-                # Textos
-                texto_cor = "COR"
-                texto_pardo = "PARDO"
-                espaco_entre = 20
-                
-                # Calcular larguras
-                largura_cor = c.stringWidth(texto_cor, fonte, 11)
-                largura_pardo = c.stringWidth(texto_pardo, fonte, 11)
-                largura_total = largura_cor + espaco_entre + largura_pardo
-                
-                # Posição inicial centralizada
-                x_inicio = x_celula + (largura_celula - largura_total) / 2
-                y_texto = y_celula + (altura_linha / 4)
-                
-                # Desenhar "COR"
-                c.setFillColor(colors.black)
-                c.drawString(x_inicio, y_texto, texto_cor)
-                
-                # Traço verde abaixo de "COR"
-                c.setStrokeColor(colors.HexColor("#32CD32"))  # Verde limão
-                c.setLineWidth(3)
-                c.line(x_inicio, y_texto - 5, x_inicio + largura_cor, y_texto - 5)
-                
-                # Desenhar "PARDO"
-                x_pardo = x_inicio + largura_cor + espaco_entre
-                c.setFillColor(colors.black)
-                c.drawString(x_pardo, y_texto, texto_pardo)
-                
-                # Traço laranja abaixo de "PARDO"
-                c.setStrokeColor(colors.HexColor("#FF8C00"))  # Laranja
-                c.setLineWidth(3)
-                c.line(x_pardo, y_texto - 5, x_pardo + largura_pardo, y_texto - 5)
-                
-                # Resetar cores e linha
-                c.setStrokeColor(colors.black)
-                c.setLineWidth(0.5)
-                c.setFillColor(colors.black)
-                
-                # Pular o desenho normal do valor (já foi desenhado acima)
-                indice_dados += 1
-                continue
+                    c.setFont(fonte, 12)
+                valor_exibido = valor
             else:
-                c.setFont(fonte, 12)
-            
-            # Calcular quantos caracteres cabem na célula
-            max_chars_valor = int((largura_celula - 8) / 5)
-            valor_exibido = valor[:max_chars_valor] + "..." if len(valor) > max_chars_valor else valor
+                # Fonte varia por campo
+                if label == "Código/Descrição Peça":
+                    tamanho_fonte = self.calcular_tamanho_fonte_dinamico(c, valor, largura_celula - 5, "Helvetica")
+                    c.setFont("Helvetica", tamanho_fonte)
+                elif label == "Responsável":
+                    tamanho_fonte = self.calcular_tamanho_fonte_dinamico(c, valor, largura_celula - 3, "Helvetica", tamanho_base=11)
+                    c.setFont("Helvetica", tamanho_fonte)
+                elif label == "Conferente":
+                    c.setFont("Helvetica", 10)
+                elif label == "Status":
+                    tamanho_fonte = self.calcular_tamanho_fonte_dinamico(c, valor, largura_celula - 3, "Helvetica", tamanho_base=11)
+                    c.setFont("Helvetica", tamanho_fonte)
+                    if valor == "CÓPIA CONTROLADA":
+                        c.setFillColor(colors.HexColor("#0000FF"))  # Azul
+                    else:
+                        c.setFillColor(colors.HexColor("#FF0000"))  # Vermelho              
+                elif label == "Borda":
+                    continue  # Legenda já está na parte fixa
+                else:
+                    c.setFont(fonte, 12)
+                
+                # Calcular quantos caracteres cabem na célula
+                max_chars_valor = int((largura_celula - 8) / 5)
+                valor_exibido = valor[:max_chars_valor] + "..." if len(valor) > max_chars_valor else valor
             
             # Centralizar valor horizontal e verticalmente
             x_centro_valor = x_celula + largura_celula / 2
             y_centro_valor = y_celula + (altura_linha / 4)  # Ajuste fino da altura
             c.drawCentredString(x_centro_valor, y_centro_valor, valor_exibido)            
-            
-            indice_dados += 1
 
         c.setFillColor(colors.black)  # Restaura cor
     
@@ -1324,35 +998,15 @@ class GeradorDesenhoTecnico:
 
     
     
-    def gerar_pdf(self, peca: Peca, arquivo_saida: str, dados_adicionais: dict = None):
+    def _preparar_peca(self, peca: Peca, dados_adicionais: dict) -> Peca:
         """
-        Gera PDF com desenho técnico da peça.
-        Pode gerar múltiplas páginas se houver conflitos de furação.
-        
-        Args:
-            peca: objeto Peca com os dados
-            arquivo_saida: caminho do arquivo PDF a ser criado
-            dados_adicionais: dados extras como código, revisão, etc
+        Peça como vai para o papel: séries expandidas, medidas numéricas,
+        rotacionada e espelhada. Furo com medida inválida levanta ValueError
+        aqui, antes de qualquer página ser desenhada.
         """
-        import json
-        import os
-        from copy import deepcopy
-        
-        # Carregar configurações
-        config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.json')
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-        except:
-            config = {
-                'campos_padrao': {'borda': 'Cor PARDO', 'responsavel': 'ENZO PEDRICA'},
-                'visual': {'cor_tabela': '#0066CC', 'fonte_tabela': 'Helvetica'},
-                'campos_tabela': []
-            }
-        
-        if dados_adicionais is None:
-            dados_adicionais = {}
-        
+        # O desenho precisa de cada furo: expandir séries (AN/AB) ainda compactadas
+        peca = furos_numericos(peca.expandir_padroes())
+
         # Rotacionar peça baseado no ângulo escolhido
         angulo = dados_adicionais.get('angulo_rotacao', 0)
         if angulo != 0:
@@ -1361,49 +1015,37 @@ class GeradorDesenhoTecnico:
         # Espelhar se necessário
         if dados_adicionais.get('espelhar_peca', False) and angulo == 0:
             peca = self.espelhar_verticalmente(peca)
+        return peca
 
-        # ===== ANALISAR DISTRIBUIÇÃO DE FUROS =====
-        distribuicao = self.distribuir_furos_superior_inferior(peca.furos_verticais)
-        
-        furos_inferior = distribuicao['inferior']
-        furos_superior = distribuicao['superior']
-        furos_segunda = distribuicao['segunda_furacao']
-        
-        # Função para determinar título baseado no lado dos furos
-        def determinar_titulo_pagina(furos_lista):
-            if not furos_lista:
-                return "INFERIOR"
-            
-            # Verificar se TODOS os furos são LS
-            todos_ls = True
-            for furo in furos_lista:
-                lado = getattr(furo, 'lado', 'LS')
-                if lado != 'LS':
-                    todos_ls = False
-                    break
-            
-            # Só é SUPERIOR se TODOS forem LS
-            # Caso contrário, força INFERIOR
-            if todos_ls:
-                return "SUPERIOR"
-            else:
-                return "INFERIOR"
+    def _titulo_lado(self, furos_lista: list) -> str:
+        """SUPERIOR só se TODOS os furos forem LS; caso contrário, força INFERIOR"""
+        if not furos_lista:
+            return "INFERIOR"
+        if all(getattr(furo, 'lado', 'LS') == 'LS' for furo in furos_lista):
+            return "SUPERIOR"
+        return "INFERIOR"
 
-        # Determinar quais páginas gerar
+    def _montar_paginas(self, distribuicao: dict) -> list:
+        """
+        Páginas do PDF a partir da distribuição de furos verticais.
+        
+        Returns:
+            lista de {'tipo', 'titulo_lado', 'titulo', 'furos'}
+        """
         paginas = []
 
-        if furos_inferior:
+        if distribuicao['inferior']:
             paginas.append({
                 'tipo': 'INFERIOR',
-                'titulo_lado': determinar_titulo_pagina(furos_inferior),
-                'furos': furos_inferior
+                'titulo_lado': self._titulo_lado(distribuicao['inferior']),
+                'furos': distribuicao['inferior']
             })
 
-        if furos_superior:
+        if distribuicao['superior']:
             paginas.append({
                 'tipo': 'SUPERIOR',
-                'titulo_lado': determinar_titulo_pagina(furos_superior),
-                'furos': furos_superior
+                'titulo_lado': self._titulo_lado(distribuicao['superior']),
+                'furos': distribuicao['superior']
             })
 
         # Se não tem furos verticais, gera página única
@@ -1414,93 +1056,409 @@ class GeradorDesenhoTecnico:
                 'furos': []
             })
 
-        # Agrupar por título_lado para numerar
-        contagem_titulos = {}
+        # Títulos finais (sem numeração)
         for pagina in paginas:
-            titulo_lado = pagina['titulo_lado']
-            if titulo_lado not in contagem_titulos:
-                contagem_titulos[titulo_lado] = 0
-            contagem_titulos[titulo_lado] += 1
+            pagina['titulo'] = f"FURAÇÃO {pagina['titulo_lado']}"
+        return paginas
+
+    def _alerta_passadas(self, distribuicao: dict) -> str:
+        """Texto do alerta com os furos de cada passada extra"""
+        return ' | '.join(
+            f"{passada['numero']}ª PASSADA NECESSÁRIA: " +
+            ', '.join([f"X={int(f.x)}" for f in passada['furos']])
+            for passada in distribuicao['passadas'][1:]
+        )
 
-        # Atribuir títulos finais (sem numeração)
-        for pagina in paginas:
-            titulo_lado = pagina['titulo_lado']
-            pagina['titulo'] = f"FURAÇÃO {titulo_lado}"
+    def _mostra_vistas_laterais(self, peca: Peca, tipo_furacao: str, total_paginas: int) -> bool:
+        """
+        Se tem múltiplas páginas, vistas laterais (furos horizontais) só na SUPERIOR.
+        Se tem só 1 página, mostra normalmente.
+        """
+        if total_paginas > 1:
+            return len(peca.furos_horizontais) > 0 and tipo_furacao == 'SUPERIOR'
+        return len(peca.furos_horizontais) > 0
 
-        # Se tiver 2ª passada, adicionar ao alerta em vez de criar nova página
-        if furos_segunda:
-            # Adicionar furos da 2ª passada aos inferiores e marcar alerta
-            if dados_adicionais is None:
-                dados_adicionais = {}
+    def planejar_furacao(self, peca: Peca, dados_adicionais: dict = None) -> dict:
+        """
+        Plano de furação sem desenhar nada: o que o PDF mostraria em cada página.
+        
+        Args:
+            peca: objeto Peca com os dados
+            dados_adicionais: mesmo formato do gerar_pdf (angulo_rotacao, espelhar_peca)
+            
+        Returns:
+            dict com 'dimensoes', 'paginas' (furos com mandril e batente por página),
+            'passadas', 'precisa_segunda_furacao', 'conflitos_100mm' e 'alerta'
+        """
+        dados_adicionais = dados_adicionais or {}
+        peca = self._preparar_peca(peca, dados_adicionais)
+
+        distribuicao = self.distribuir_furos_superior_inferior(peca.furos_verticais)
+        paginas = self._montar_paginas(distribuicao)
+        indice_vertical = {id(f): i for i, f in enumerate(peca.furos_verticais)}
+        indice_horizontal = {id(f): i for i, f in enumerate(peca.furos_horizontais)}
+
+        def furo_plano(furo, indice, batente):
+            return {
+                'indice': indice[id(furo)],
+                'x': furo.x,
+                'y': furo.y,
+                'diametro': furo.diametro,
+                'profundidade': furo.profundidade,
+                'lado': furo.lado,
+                'mandril': self.calcular_mandril(furo.y, batente),
+            }
+
+        paginas_plano = []
+        for numero, pagina in enumerate(paginas, 1):
+            peca_pagina = replace(peca, furos_verticais=pagina['furos'])
+            batente = self.calcular_batente(peca_pagina)
+            horizontais = []
+            if self._mostra_vistas_laterais(peca_pagina, pagina['tipo'], len(paginas)):
+                horizontais = [furo_plano(f, indice_horizontal, batente) for f in peca.furos_horizontais]
+            paginas_plano.append({
+                'numero': numero,
+                'tipo': pagina['tipo'],
+                'titulo': pagina['titulo'],
+                'batente': batente,
+                'furos_verticais': [furo_plano(f, indice_vertical, batente) for f in pagina['furos']],
+                'furos_horizontais': horizontais,
+            })
+
+        conflitos = self.detectar_conflitos_100mm(peca.furos_verticais)
+        return {
+            'dimensoes': {
+                'largura': peca.dimensoes.largura,
+                'comprimento': peca.dimensoes.comprimento,
+                'espessura': peca.dimensoes.espessura,
+            },
+            'paginas': paginas_plano,
+            'passadas': [
+                {
+                    'numero': passada['numero'],
+                    'inferior': [indice_vertical[id(f)] for f in passada['inferior']],
+                    'superior': [indice_vertical[id(f)] for f in passada['superior']],
+                }
+                for passada in distribuicao['passadas']
+            ],
+            'precisa_segunda_furacao': distribuicao['precisa_segunda_furacao'],
+            'conflitos_100mm': [sorted({round(float(f.x), 1) for f in grupo})
+                                for grupo in conflitos['grupos']],
+            'alerta': self._alerta_passadas(distribuicao) if distribuicao['segunda_furacao'] else None,
+        }
+
+    def _carregar_config(self) -> dict:
+        """Configurações da tabela (config.json), com padrão se não existir"""
+        import json
+        import os
+        
+        config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.json')
+        with etapa('config'):
+            try:
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except:
+                return {
+                    'campos_padrao': {'borda': 'Cor PARDO', 'responsavel': 'ENZO PEDRICA'},
+                    'visual': {'cor_tabela': '#0066CC', 'fonte_tabela': 'Helvetica'},
+                    'campos_tabela': []
+                }
+
+    def _preparar_documento(self, peca: Peca, dados_adicionais: dict):
+        """
+        Peça transformada + páginas de furação de um documento.
+        Alerta de passadas extras vai para dados_adicionais['alerta'].
+        As duas etapas ficam em cache pelo hash da peça + rotação/espelho;
+        salvar só metadados (observações, bordas...) não refaz nenhuma.
+        
+        Returns:
+            (peca, paginas, chave) - chave identifica a geometria (cache de layout)
+        """
+        with etapa('hash'):
+            chave = hash_conteudo(peca, dados_adicionais.get('angulo_rotacao', 0),
+                                  bool(dados_adicionais.get('espelhar_peca', False)))
+        
+        with etapa('preparar'):
+            peca = _em_cache(cache_geometria, 'geometria', chave,
+                             lambda: self._preparar_peca(peca, dados_adicionais))
+
+        # ===== ANALISAR DISTRIBUIÇÃO DE FUROS =====
+        with etapa('distribuicao'):
+            def distribuir():
+                distribuicao = self.distribuir_furos_superior_inferior(peca.furos_verticais)
+                return distribuicao, self._montar_paginas(distribuicao)
             
+            distribuicao, paginas = _em_cache(cache_distribuicao, 'distribuicao', chave, distribuir)
+
+        # Se tiver 2ª passada, adicionar ao alerta em vez de criar nova página
+        if distribuicao['segunda_furacao']:
             alerta_existente = dados_adicionais.get('alerta', '')
-            coords_segunda = ', '.join([f"X={int(f.x)}" for f in furos_segunda])
-            novo_alerta = f"2ª PASSADA NECESSÁRIA: {coords_segunda}"
+            novo_alerta = self._alerta_passadas(distribuicao)
             
             if alerta_existente:
                 dados_adicionais['alerta'] = f"{alerta_existente} | {novo_alerta}"
             else:
                 dados_adicionais['alerta'] = novo_alerta
-        
-        # Se não tem furos verticais, gera página única
-        if not paginas:
-            paginas.append({
-                'tipo': 'NORMAL',
-                'titulo': 'PLANO DE FURAÇÃO',
-                'furos': []
-            })
-        
-        # Criar canvas
-        c = canvas.Canvas(arquivo_saida, pagesize=landscape(A4))
+
+        return peca, paginas, chave
+
+    def _desenhar_documento(self, c: canvas.Canvas, peca: Peca, paginas: list,
+                            config: dict, dados_adicionais: dict, ao_iniciar_pagina=None,
+                            chave: str = None):
+        """
+        Desenha as páginas de uma peça no canvas (showPage entre elas, não depois da última).
+        ao_iniciar_pagina(indice, pagina_info) é chamado antes de cada página (marcadores).
+        chave (de _preparar_documento) liga o cache de layout das vistas.
+        O layout de todas as páginas é calculado antes da primeira: peça que
+        não dá para desenhar falha sem deixar página nenhuma no canvas.
+        """
         largura_pagina, altura_pagina = landscape(A4)
         
         total_paginas = len(paginas)
         
-        # Gerar cada página
+        # Peça e dados de cada página, com o layout já calculado
+        preparadas = []
         for idx, pagina_info in enumerate(paginas):
-            pagina_atual = idx + 1
+            # Peça da página: mesmos furos (sem cópia), só os verticais desta página
+            peca_pagina = replace(peca, furos_verticais=pagina_info['furos'])
             
-            # Criar cópia da peça com apenas os furos desta página
-            peca_pagina = deepcopy(peca)
-            peca_pagina.furos_verticais = pagina_info['furos']
-            
-            # Dados adicionais com info da página
-            dados_pagina = deepcopy(dados_adicionais)
-            dados_pagina['pagina_atual'] = pagina_atual
+            # Dados adicionais com info da página (cópia rasa; o desenho só lê)
+            dados_pagina = dict(dados_adicionais)
+            dados_pagina['pagina_atual'] = idx + 1
             dados_pagina['total_paginas'] = total_paginas
             dados_pagina['tipo_furacao'] = pagina_info['tipo']
+            dados_pagina['chave_layout'] = (chave, idx) if chave else None
+            
+            layout = self._layout_pagina(peca_pagina, config, dados_pagina, largura_pagina, altura_pagina)
+            preparadas.append((peca_pagina, dados_pagina, layout))
+        
+        # Gerar cada página
+        for idx, (pagina_info, (peca_pagina, dados_pagina, layout)) in enumerate(zip(paginas, preparadas)):
+            if ao_iniciar_pagina:
+                ao_iniciar_pagina(idx, pagina_info)
             
             # Desenhar a página
             self._desenhar_pagina_furacao(
                 c, peca_pagina, pagina_info['titulo'], 
-                config, dados_pagina, largura_pagina, altura_pagina
+                config, dados_pagina, largura_pagina, altura_pagina, layout
             )
             
             # Nova página se não for a última
             if idx < len(paginas) - 1:
                 c.showPage()
-        
-        c.save()
 
+    def gerar_pdf(self, peca: Peca, arquivo_saida: str, dados_adicionais: dict = None):
+        """
+        Gera PDF com desenho técnico da peça.
+        Pode gerar múltiplas páginas se houver conflitos de furação.
+        
+        Args:
+            peca: objeto Peca com os dados
+            arquivo_saida: caminho do arquivo PDF a ser criado
+            dados_adicionais: dados extras como código, revisão, etc
+        """
+        # Carregar configurações
+        config = self._carregar_config()
+        
+        if dados_adicionais is None:
+            dados_adicionais = {}
+        
+        peca, paginas, chave = self._preparar_documento(peca, dados_adicionais)
+        
+        # Criar canvas
+        c = instrumentar_canvas(canvas.Canvas(arquivo_saida, pagesize=landscape(A4)))
+        self._desenhar_documento(c, peca, paginas, config, dados_adicionais, chave=chave)
+        
+        with etapa('save'):
+            c.save()
 
-    def _desenhar_pagina_furacao(self, c: canvas.Canvas, peca: Peca, titulo: str,
-                              config: dict, dados_adicionais: dict,
-                              largura_pagina: float, altura_pagina: float):
+    def gerar_pacote_pdf(self, itens: Sequence[ItemPacote], arquivo_saida: str,
+                         titulo: str = "") -> dict:
         """
-        Desenha uma página de furação completa.
-        Layout: [Vista Esquerda] [Vista Principal] [Vista Direita] - alinhados horizontalmente
+        Gera um único PDF com várias peças (pacote de impressão de um produto).
+        
+        - Página(s) de índice no início, com link para cada peça
+        - Marcadores (bookmarks) por peça e por página de furação
+        - Recursos compartilhados no documento: logo, ícone e moldura da tabela
+          entram uma vez só
+        - As peças são carregadas uma por vez (item.carregar()) e descartadas
+          depois de desenhadas; peça que falhar (ao carregar, preparar ou
+          desenhar) ganha uma página de aviso e fica marcada no índice
+        
+        O índice é um Form XObject desenhado no fim, quando as páginas
+        de cada peça já são conhecidas.
+        
+        Args:
+            itens: ItemPacote(rotulo, carregar) na ordem do pacote
+            arquivo_saida: caminho do PDF
+            titulo: título do pacote (ex: código/nome do produto)
+        
+        Returns:
+            dict com 'pecas' (geradas), 'falhas' (rótulos) e 'paginas' (total)
         """
+        if not itens:
+            raise ValueError("Pacote sem peças")
+        
+        config = self._carregar_config()
+        largura_pagina, altura_pagina = landscape(A4)
+        
+        c = instrumentar_canvas(canvas.Canvas(arquivo_saida, pagesize=landscape(A4)))
+        c.setTitle(f"Pacote de impressão - {titulo}" if titulo else "Pacote de impressão")
+        c.showOutline()
+        
+        # ===== ÍNDICE (conteúdo definido no fim) =====
+        paginas_indice = max(1, math.ceil(len(itens) / LINHAS_INDICE))
+        for numero in range(paginas_indice):
+            if numero == 0:
+                c.bookmarkPage("indice")
+                c.addOutlineEntry("Índice", "indice", level=0)
+            c.doForm(f"Indice{numero}")
+            self._links_indice(c, numero, len(itens), altura_pagina)
+            c.showPage()
+        
+        # ===== PEÇAS =====
+        entradas = []  # (rotulo, primeira página, gerada)
+        for numero, item in enumerate(itens):
+            chave = f"peca{numero}"
+
+            def falhar(e, chave=chave, rotulo=item.rotulo):
+                """Aviso na página atual (marcador e índice apontam para ele)"""
+                logger.exception("❌ Peça '%s' fora do pacote: %s", rotulo, e)
+                entradas.append((rotulo, c.getPageNumber(), False))
+                c.bookmarkPage(chave)
+                c.addOutlineEntry(f"{rotulo} (não gerada)", chave, level=0)
+                self._desenhar_falha_pacote(c, rotulo, str(e), altura_pagina)
+                c.showPage()
+
+            try:
+                peca, dados_adicionais = item.carregar()
+                dados_adicionais = dict(dados_adicionais or {})
+                peca, paginas, chave_peca = self._preparar_documento(peca, dados_adicionais)
+            except Exception as e:
+                falhar(e)
+                continue
+            
+            # Entradas do sumário só depois da peça inteira desenhada
+            sumario = []
+            
+            def marcar(idx, pagina_info, chave=chave, rotulo=item.rotulo, total=len(paginas)):
+                if idx == 0:
+                    c.bookmarkPage(chave)
+                    sumario.append((rotulo, chave, 0, True))
+                if total > 1:
+                    c.bookmarkPage(f"{chave}_{idx}")
+                    sumario.append((pagina_info['titulo'], f"{chave}_{idx}", 1, None))
+            
+            primeira = c.getPageNumber()
+            try:
+                # Layout de todas as páginas sai antes de qualquer desenho: o que
+                # falhar com os dados da peça falha aqui sem deixar página no pacote
+                self._desenhar_documento(c, peca, paginas, config, dados_adicionais, marcar, chave_peca)
+            except Exception as e:
+                # Falha já no desenho: o aviso usa a página começada (sem página vazia)
+                _descartar_pagina(c)
+                falhar(e)
+                continue
+            c.showPage()
+            
+            for rotulo, destino, nivel, fechado in sumario:
+                c.addOutlineEntry(rotulo, destino, level=nivel, closed=fechado)
+            entradas.append((item.rotulo, primeira, True))
+        pagina_atual = c.getPageNumber()
+        
+        # ===== CONTEÚDO DO ÍNDICE =====
+        for numero in range(paginas_indice):
+            c.beginForm(f"Indice{numero}")
+            self._desenhar_indice(c, numero, paginas_indice, entradas, titulo,
+                                  largura_pagina, altura_pagina)
+            c.endForm()
+        
+        with etapa('save'):
+            c.save()
+        
+        falhas = [rotulo for rotulo, _, gerada in entradas if not gerada]
+        return {
+            'pecas': len(entradas) - len(falhas),
+            'falhas': falhas,
+            'paginas': pagina_atual - 1,
+        }
+
+    def _linha_indice(self, linha: int, altura_pagina: float) -> float:
+        """Y da linha `linha` do índice"""
+        return altura_pagina - self.margem - 70 - linha * ALTURA_LINHA_INDICE
+
+    def _links_indice(self, c: canvas.Canvas, numero: int, total: int, altura_pagina: float):
+        """Área clicável de cada linha da página `numero` do índice"""
+        largura_pagina = landscape(A4)[0]
+        inicio = numero * LINHAS_INDICE
+        for linha, indice in enumerate(range(inicio, min(inicio + LINHAS_INDICE, total))):
+            y = self._linha_indice(linha, altura_pagina)
+            c.linkAbsolute("", f"peca{indice}",
+                           Rect=(self.margem, y - 4, largura_pagina - self.margem, y + ALTURA_LINHA_INDICE - 4))
+
+    def _desenhar_indice(self, c: canvas.Canvas, numero: int, total_paginas: int,
+                         entradas: list, titulo: str, largura_pagina: float, altura_pagina: float):
+        """Página `numero` do índice: nº, peça e página inicial"""
+        from datetime import datetime
         
+        x_esquerda = self.margem
+        x_direita = largura_pagina - self.margem
+        y_titulo = altura_pagina - self.margem
+        
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(x_esquerda, y_titulo, "PACOTE DE IMPRESSÃO")
+        c.setFont("Helvetica", 12)
+        if titulo:
+            c.drawString(x_esquerda, y_titulo - 20, titulo)
+        c.drawRightString(x_direita, y_titulo, datetime.now().strftime("%d/%m/%Y"))
+        if total_paginas > 1:
+            c.drawRightString(x_direita, y_titulo - 20, f"Índice {numero + 1}/{total_paginas}")
+        
+        # Cabeçalho
+        y_cabecalho = self._linha_indice(-1, altura_pagina)
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(x_esquerda, y_cabecalho, "Nº")
+        c.drawString(x_esquerda + 40, y_cabecalho, "Peça")
+        c.drawRightString(x_direita, y_cabecalho, "Página")
+        c.setLineWidth(0.5)
+        c.line(x_esquerda, y_cabecalho - 4, x_direita, y_cabecalho - 4)
+        
+        c.setFont("Helvetica", 10)
+        inicio = numero * LINHAS_INDICE
+        for linha, (rotulo, pagina, gerada) in enumerate(entradas[inicio:inicio + LINHAS_INDICE]):
+            y = self._linha_indice(linha, altura_pagina)
+            c.setFillColor(colors.black if gerada else colors.red)
+            c.drawString(x_esquerda, y, str(inicio + linha + 1))
+            c.drawString(x_esquerda + 40, y, rotulo if gerada else f"{rotulo} (não gerada)")
+            c.drawRightString(x_direita, y, str(pagina))
+        
+        c.setFillColor(colors.black)
+
+    def _desenhar_falha_pacote(self, c: canvas.Canvas, rotulo: str, erro: str, altura_pagina: float):
+        """Página de aviso no lugar de uma peça que não pôde ser desenhada"""
+        c.setFillColor(colors.red)
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(self.margem, altura_pagina - self.margem, f"PEÇA NÃO GERADA: {rotulo}")
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica", 10)
+        c.drawString(self.margem, altura_pagina - self.margem - 20, erro[:150])
+
+    def _layout_pagina(self, peca: Peca, config: dict, dados_adicionais: dict,
+                       largura_pagina: float, altura_pagina: float) -> dict:
+        """
+        Tudo o que uma página de furação calcula a partir da peça (escalas,
+        posições, bordas, operações de cota das vistas e células da tabela),
+        sem desenhar nada.
+        Uma peça com dado que não dá para desenhar falha aqui, antes da página.
+        """
         # Verificar se tem furos horizontais E se é a página SUPERIOR (ou NORMAL se só tem 1 página)
         tipo_furacao = dados_adicionais.get('tipo_furacao', 'NORMAL')
         total_paginas = dados_adicionais.get('total_paginas', 1)
 
         # Se tem múltiplas páginas, vistas laterais só na SUPERIOR (página 2)
-        # Se tem só 1 página, mostra normalmente
-        if total_paginas > 1:
-            tem_furos_horizontais = len(peca.furos_horizontais) > 0 and tipo_furacao == 'SUPERIOR'
-        else:
-            tem_furos_horizontais = len(peca.furos_horizontais) > 0
+        tem_furos_horizontais = self._mostra_vistas_laterais(peca, tipo_furacao, total_paginas)
+        chave_layout = dados_adicionais.get('chave_layout')
         
         # ===== CALCULAR ESPAÇOS =====
         altura_tabela = 80
@@ -1511,22 +1469,15 @@ class GeradorDesenhoTecnico:
         
         largura_disponivel = largura_pagina - 2 * self.margem
         
-        # ===== TÍTULO =====
-        c.setFont("Helvetica-Bold", 12)
-        c.setFillColor(colors.black)
-        titulo_y = altura_pagina - self.margem + 15
-        c.drawCentredString(largura_pagina / 2, titulo_y, titulo)
-        
         # Calcular batente (precisa antes das vistas)
         batente = self.calcular_batente(peca)
+        laterais = []
         
         if tem_furos_horizontais:
             # ===== LAYOUT COM VISTAS LATERAIS (horizontal) =====
             
             # Calcular proporção ideal baseado nas dimensões da peça
             espessura = float(peca.dimensoes.espessura)
-            largura = float(peca.dimensoes.largura)
-            comprimento = float(peca.dimensoes.comprimento)
             
             # Largura mínima para vistas laterais (proporcional à espessura)
             largura_vista_lateral = max(80, min(120, espessura * 6))
@@ -1550,13 +1501,14 @@ class GeradorDesenhoTecnico:
             altura_vistas = altura_area_vistas - 50
             
             # ===== VISTA PRINCIPAL (centro) =====
-            escala = self.calcular_escala(
-                peca.dimensoes.largura,
-                peca.dimensoes.comprimento,
-                largura_vista_principal,
-                altura_vistas,
-                margem_seguranca=0.55
-            )
+            with etapa('escala'):
+                escala = self.calcular_escala(
+                    peca.dimensoes.largura,
+                    peca.dimensoes.comprimento,
+                    largura_vista_principal,
+                    altura_vistas,
+                    margem_seguranca=0.55
+                )
             
             largura_desenhada = peca.dimensoes.largura * mm * escala
             altura_desenhada = peca.dimensoes.comprimento * mm * escala
@@ -1565,119 +1517,103 @@ class GeradorDesenhoTecnico:
             x_origem = x_vista_principal + (largura_vista_principal - largura_desenhada) / 2
             y_origem = y_base_vistas + (altura_vistas - altura_desenhada) / 2
             
-            # Desenhar peça (vista de topo)
-            self.desenhar_retangulo_peca(c, x_origem, y_origem, largura_desenhada, altura_desenhada)
-            
-            # Bordas coloridas
-            if dados_adicionais:
-                bordas_originais = dados_adicionais.get('bordas', {
-                    'top': None, 'bottom': None, 'left': None, 'right': None
-                })
-                if not isinstance(bordas_originais, dict):
-                    bordas_originais = {'top': None, 'bottom': None, 'left': None, 'right': None}
-                
-                angulo = dados_adicionais.get('angulo_rotacao', 0)
-                espelhado = dados_adicionais.get('espelhar_peca', False)
-                bordas_config = self.transformar_bordas(bordas_originais, angulo, espelhado)
-                
-                if any([bordas_config.get('top'), bordas_config.get('bottom'),
-                        bordas_config.get('left'), bordas_config.get('right')]):
-                    self.desenhar_bordas_batente(c, x_origem, y_origem,
-                                                largura_desenhada, altura_desenhada, bordas_config)
-            
-            # Cotas principais
-            offset_cota = 40
-            largura_real_atual = float(peca.dimensoes.largura)
-            comprimento_real_atual = float(peca.dimensoes.comprimento)
-            self.desenhar_cota_principal(c, x_origem, y_origem, largura_desenhada, altura_desenhada,
-                                        largura_real_atual, comprimento_real_atual, offset_cota)
-            
-            # ===== FUROS VERTICAIS =====
-            if peca.furos_verticais:
-                self._desenhar_furos_verticais(c, peca, x_origem, y_origem, 
-                                            largura_desenhada, altura_desenhada, escala, batente)
-            
-            # ===== VISTAS LATERAIS =====
+            # ===== VISTAS LATERAIS (esquerda, direita) =====
             foi_espelhado = dados_adicionais.get('espelhar_peca', False) if dados_adicionais else False
-            
-            # Vista esquerda
-            self.desenhar_vista_lateral(c, x_vista_esquerda, y_base_vistas, 
-                                        peca, 'esquerda', largura_vista_lateral, 
-                                        altura_vistas, foi_espelhado, batente)
-            
-            # Vista direita
-            self.desenhar_vista_lateral(c, x_vista_direita, y_base_vistas, 
-                                        peca, 'direita', largura_vista_lateral,
-                                        altura_vistas, foi_espelhado, batente)
+            for x_vista, lado in ((x_vista_esquerda, 'esquerda'), (x_vista_direita, 'direita')):
+                laterais.append(self._layout_vista_lateral(
+                    x_vista, y_base_vistas, peca, lado, largura_vista_lateral,
+                    altura_vistas, foi_espelhado, batente, chave_layout))
         
         else:
             # ===== LAYOUT SEM VISTAS LATERAIS (vista principal centralizada) =====
-            escala = self.calcular_escala(
-                peca.dimensoes.largura,
-                peca.dimensoes.comprimento,
-                largura_disponivel,
-                altura_area_vistas,
-                margem_seguranca=0.65
-            )
+            with etapa('escala'):
+                escala = self.calcular_escala(
+                    peca.dimensoes.largura,
+                    peca.dimensoes.comprimento,
+                    largura_disponivel,
+                    altura_area_vistas,
+                    margem_seguranca=0.65
+                )
             
             largura_desenhada = peca.dimensoes.largura * mm * escala
             altura_desenhada = peca.dimensoes.comprimento * mm * escala
             
             x_origem = self.margem + (largura_disponivel - largura_desenhada) / 2
             y_origem = y_tabela + altura_tabela + 30 + (altura_area_vistas - altura_desenhada) / 2
+        
+        # Bordas coloridas
+        bordas_config = None
+        if dados_adicionais:
+            bordas_originais = dados_adicionais.get('bordas', {
+                'top': None, 'bottom': None, 'left': None, 'right': None
+            })
+            if not isinstance(bordas_originais, dict):
+                bordas_originais = {'top': None, 'bottom': None, 'left': None, 'right': None}
             
-            # Desenhar peça
-            self.desenhar_retangulo_peca(c, x_origem, y_origem, largura_desenhada, altura_desenhada)
-            
-            # Bordas coloridas
-            if dados_adicionais:
-                bordas_originais = dados_adicionais.get('bordas', {
-                    'top': None, 'bottom': None, 'left': None, 'right': None
-                })
-                if not isinstance(bordas_originais, dict):
-                    bordas_originais = {'top': None, 'bottom': None, 'left': None, 'right': None}
-                
-                angulo = dados_adicionais.get('angulo_rotacao', 0)
-                espelhado = dados_adicionais.get('espelhar_peca', False)
-                bordas_config = self.transformar_bordas(bordas_originais, angulo, espelhado)
-                
-                if any([bordas_config.get('top'), bordas_config.get('bottom'),
-                        bordas_config.get('left'), bordas_config.get('right')]):
-                    self.desenhar_bordas_batente(c, x_origem, y_origem,
-                                                largura_desenhada, altura_desenhada, bordas_config)
-            
-            # Cotas principais
-            offset_cota = 40
-            largura_real_atual = float(peca.dimensoes.largura)
-            comprimento_real_atual = float(peca.dimensoes.comprimento)
-            self.desenhar_cota_principal(c, x_origem, y_origem, largura_desenhada, altura_desenhada,
-                                        largura_real_atual, comprimento_real_atual, offset_cota)
-            
-            # Furos verticais
-            if peca.furos_verticais:
-                self._desenhar_furos_verticais(c, peca, x_origem, y_origem,
-                                            largura_desenhada, altura_desenhada, escala, batente)
+            angulo = dados_adicionais.get('angulo_rotacao', 0)
+            espelhado = dados_adicionais.get('espelhar_peca', False)
+            bordas_config = self.transformar_bordas(bordas_originais, angulo, espelhado)
         
-        # ===== TABELA =====
-        largura_tabela = largura_pagina - 2 * self.margem
-        x_tabela = self.margem
-        self.desenhar_tabela_horizontal(c, x_tabela, y_tabela, largura_tabela, altura_tabela,
-                                        peca, config, dados_adicionais)
+        # Cotas principais + furos verticais
+        retangulo = (x_origem, y_origem, largura_desenhada, altura_desenhada)
+        principal = self._layout_vista_principal(peca, *retangulo, escala, batente, chave_layout)
         
-        # ===== MARGEM EXTERNA =====
-        largura_logo = 80
-        larguras_linha_1 = [250, 100, 70, 70, 80, 60, 70]
-        larguras_linha_2 = [250, 65, 95, 100, 70, 120]  
-        largura_total_tabela = largura_logo + max(sum(larguras_linha_1), sum(larguras_linha_2))
-        x_margem = (841.89 - largura_total_tabela) / 2
-
-        y_margem_inferior = y_tabela
-        y_margem_superior = titulo_y + 20
+        return {
+            'altura_tabela': altura_tabela,
+            'y_tabela': y_tabela,
+            'tabela': self._dados_tabela(peca, config, dados_adicionais),
+            'retangulo': retangulo,
+            'bordas': bordas_config,
+            'principal': principal,
+            'laterais': laterais,
+        }
 
-        c.setStrokeColor(colors.black)
-        c.setLineWidth(0.5)
-        c.rect(x_margem, y_margem_inferior, largura_total_tabela, 
-            y_margem_superior - y_margem_inferior, stroke=1, fill=0)
+    def _desenhar_pagina_furacao(self, c: canvas.Canvas, peca: Peca, titulo: str,
+                              config: dict, dados_adicionais: dict,
+                              largura_pagina: float, altura_pagina: float, layout: dict = None):
+        """
+        Desenha uma página de furação completa.
+        Layout: [Vista Esquerda] [Vista Principal] [Vista Direita] - alinhados horizontalmente
+        layout (de _layout_pagina) é calculado aqui se não vier pronto.
+        """
+        if layout is None:
+            layout = self._layout_pagina(peca, config, dados_adicionais, largura_pagina, altura_pagina)
+        altura_tabela = layout['altura_tabela']
+        y_tabela = layout['y_tabela']
+        
+        # ===== TÍTULO =====
+        c.setFont("Helvetica-Bold", 12)
+        c.setFillColor(colors.black)
+        titulo_y = altura_pagina - self.margem + 15
+        c.drawCentredString(largura_pagina / 2, titulo_y, titulo)
+        
+        # Desenhar peça (vista de topo)
+        self.desenhar_retangulo_peca(c, *layout['retangulo'])
+        
+        # Bordas coloridas
+        bordas_config = layout['bordas']
+        if bordas_config and any([bordas_config.get('top'), bordas_config.get('bottom'),
+                                  bordas_config.get('left'), bordas_config.get('right')]):
+            self.desenhar_bordas_batente(c, *layout['retangulo'], bordas_config)
+        
+        # ===== COTAS PRINCIPAIS + FUROS VERTICAIS =====
+        with etapa('vista_principal'):
+            desenhar_operacoes(c, layout['principal'])
+        
+        # ===== VISTAS LATERAIS =====
+        if layout['laterais']:
+            with etapa('vistas_laterais'):
+                for retangulo, operacoes in layout['laterais']:
+                    self._desenhar_vista_lateral(c, retangulo, operacoes)
+        
+        # ===== TABELA + MARGEM EXTERNA =====
+        largura_tabela = largura_pagina - 2 * self.margem
+        x_tabela = self.margem
+        with etapa('tabela'):
+            self.desenhar_tabela_horizontal(c, x_tabela, y_tabela, largura_tabela, altura_tabela,
+                                            peca, config, dados_adicionais,
+                                            y_margem_superior=titulo_y + 20,
+                                            dados_tabela=layout['tabela'])
         
         # ===== ALERTA =====
         texto_alerta = dados_adicionais.get('observacoes', '')
@@ -1685,102 +1621,30 @@ class GeradorDesenhoTecnico:
         if mostrar_alerta:
             x_alerta = x_tabela
             y_alerta = y_tabela + altura_tabela + 10
-            self.desenhar_alerta_atencao(c, x_alerta, y_alerta, texto_alerta)
+            with etapa('alerta'):
+                self.desenhar_alerta_atencao(c, x_alerta, y_alerta, texto_alerta)
 
 
-    def _desenhar_furos_verticais(self, c: canvas.Canvas, peca: Peca, 
+    def _layout_vista_principal(self, peca: Peca,
                                 x_origem: float, y_origem: float,
                                 largura_desenhada: float, altura_desenhada: float,
-                                escala: float, batente: float):
+                                escala: float, batente: float, chave=None):
         """
-        Desenha os furos verticais com cotas e mandris.
-        Função auxiliar para evitar duplicação de código.
+        Operações de cotas principais e furos verticais (com cotas e mandris) da
+        vista de topo, calculadas pelo layout_cotas (em cache por chave).
         """
-        # Agrupar furos por Y
-        furos_por_y = {}
-        for furo in peca.furos_verticais:
-            y_key = round(float(furo.y), 1)
-            if y_key not in furos_por_y:
-                furos_por_y[y_key] = []
-            furos_por_y[y_key].append(furo)
-
-        # Agrupar furos por X
-        furos_por_x = {}
-        for furo in peca.furos_verticais:
-            x_key = round(float(furo.x), 1)
-            if x_key not in furos_por_x:
-                furos_por_x[x_key] = []
-            furos_por_x[x_key].append(furo)
-
-        # Furos com cota Y (mais à esquerda de cada linha)
-        furos_com_cota_y = set()
-        for y_pos, furos_na_linha in furos_por_y.items():
-            furo_mais_esquerda = min(furos_na_linha, key=lambda f: float(f.x))
-            furos_com_cota_y.add(id(furo_mais_esquerda))
-
-        # Furos com cota X (mais próximo do topo de cada coluna)
-        furos_com_cota_x = set()
-        for x_pos, furos_na_coluna in furos_por_x.items():
-            furo_mais_proximo_topo = max(furos_na_coluna, key=lambda f: float(f.y))
-            furos_com_cota_x.add(id(furo_mais_proximo_topo))
-
-        # Escalonar offsets Y
-        furos_com_cota_y_lista = [f for f in peca.furos_verticais if id(f) in furos_com_cota_y]
-        furos_com_cota_y_lista = sorted(furos_com_cota_y_lista, key=lambda f: float(f.y))
-
-        offset_cota_y = {}
-        distancia_minima = 15
-        offset_base = 15
-        offset_incremento = 12
-
-        for i, furo in enumerate(furos_com_cota_y_lista):
-            if i == 0:
-                offset_cota_y[id(furo)] = offset_base
-            else:
-                furo_anterior = furos_com_cota_y_lista[i - 1]
-                diferenca_y = abs(float(furo.y) - float(furo_anterior.y))
-                
-                if diferenca_y < distancia_minima:
-                    offset_anterior = offset_cota_y[id(furo_anterior)]
-                    offset_cota_y[id(furo)] = offset_anterior + offset_incremento
-                else:
-                    offset_cota_y[id(furo)] = offset_base
-
-        # Escalonar offsets X
-        furos_com_cota_x_lista = [f for f in peca.furos_verticais if id(f) in furos_com_cota_x]
-        furos_com_cota_x_lista = sorted(furos_com_cota_x_lista, key=lambda f: float(f.x))
-
-        offset_cota_x = {}
-
-        for i, furo in enumerate(furos_com_cota_x_lista):
-            if i == 0:
-                offset_cota_x[id(furo)] = offset_base
-            else:
-                furo_anterior = furos_com_cota_x_lista[i - 1]
-                diferenca_x = abs(float(furo.x) - float(furo_anterior.x))
-                
-                if diferenca_x < distancia_minima:
-                    offset_anterior = offset_cota_x[id(furo_anterior)]
-                    offset_cota_x[id(furo)] = offset_anterior + offset_incremento
-                else:
-                    offset_cota_x[id(furo)] = offset_base    
-
-        # Desenhar furos verticais
-        for furo in peca.furos_verticais:
-            mandril = self.calcular_mandril(furo.y, batente)
-            x_furo, y_furo = self.desenhar_furo_vertical(c, x_origem, y_origem, furo, escala, altura_desenhada, mandril)
-            
-            mostrar_x = id(furo) in furos_com_cota_x
-            mostrar_y = id(furo) in furos_com_cota_y
-            
-            offset_x = offset_cota_x.get(id(furo), 25)
-            offset_y = offset_cota_y.get(id(furo), 25)
-            
-            self.desenhar_cota_furo(c, x_origem, y_origem, x_furo, y_furo, 
-                                    furo.x, furo.y,
-                                    largura_desenhada, altura_desenhada,
-                                    escala, mostrar_x, mostrar_y,
-                                    offset_x, offset_y)
+        furos = peca.furos_verticais
+        with etapa('layout_cotas'):
+            return _em_cache(
+                cache_layout, 'layout',
+                chave and (chave, 'principal', x_origem, y_origem, largura_desenhada,
+                           altura_desenhada, escala, batente),
+                lambda: layout_vista_principal(
+                    furos, [self.calcular_mandril(furo.y, batente) for furo in furos],
+                    x_origem, y_origem, largura_desenhada, altura_desenhada, escala,
+                    float(peca.dimensoes.largura), float(peca.dimensoes.comprimento),
+                    self.formatar_cota
+                ))
 
     def transformar_bordas(self, bordas: dict, angulo: int, espelhado: bool) -> dict:
         """
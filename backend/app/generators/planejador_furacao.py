@@ -0,0 +1,257 @@
+"""
+Planejador de passadas de furação vertical
+
+Regras da furadeira:
+- Furos com mesmo diâmetro + profundidade formam um grupo (mesmo mandril),
+  que vai inteiro para um lado
+- Cada passada tem INFERIOR (até 6 linhas X) e SUPERIOR (até 4 linhas X)
+- Num mesmo lado, linhas de grupos diferentes precisam de 100mm de distância
+- Grupo com mais linhas do que cabe num lado é dividido em pedaços de linhas
+  X vizinhas do tamanho dos lados (6, 4, 6, ...), que entram na distribuição
+  como grupos do mesmo mandril
+
+A distribuição é uma busca (branch and bound com limite de tempo) que
+minimiza o número de passadas e, depois, os furos fora da 1ª passada.
+A solução gulosa antiga é o ponto de partida, então o resultado nunca é pior.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence
+
+INFERIOR = 'INFERIOR'
+SUPERIOR = 'SUPERIOR'
+
+
+def tem_conflito_entre(linhas_a: Sequence[float], linhas_b: Sequence[float],
+                       distancia_minima: float = 100) -> bool:
+    """
+    True se alguma linha de A fica a menos de distancia_minima de alguma linha de B.
+    linhas_b precisa estar ordenada (busca binária: O(|A| log |B|)).
+    """
+    if not linhas_a or not linhas_b:
+        return False
+    for x in linhas_a:
+        i = bisect_left(linhas_b, x)
+        if i < len(linhas_b) and linhas_b[i] - x < distancia_minima:
+            return True
+        if i > 0 and x - linhas_b[i - 1] < distancia_minima:
+            return True
+    return False
+
+
+def tem_conflito_interno(linhas: Sequence[float], distancia_minima: float = 100) -> bool:
+    """True se duas linhas consecutivas (ordenadas) estão a menos de distancia_minima"""
+    return any(b - a < distancia_minima for a, b in zip(linhas, linhas[1:]))
+
+
+class PlanejadorFuracao:
+    """Distribui grupos de furos verticais entre lados e passadas"""
+
+    def __init__(self, max_linhas_inferior: int = 6, max_linhas_superior: int = 4,
+                 distancia_minima: float = 100, tempo_limite: float = 0.05):
+        self.capacidade = {INFERIOR: max_linhas_inferior, SUPERIOR: max_linhas_superior}
+        self.distancia_minima = distancia_minima
+        self.tempo_limite = tempo_limite  # segundos para a busca
+
+    # ------------------------------------------------------------------
+    # Preparação
+    # ------------------------------------------------------------------
+    def _montar_grupos(self, furos_verticais: list) -> List[Dict]:
+        """
+        Grupos (diâmetro, profundidade) com suas linhas X, na ordem de prioridade.
+        Grupo maior que o maior lado vira pedaços com o tamanho de cada lado
+        (INFERIOR, SUPERIOR, INFERIOR...), para encher uma passada inteira.
+        """
+        grupos = {}
+        for furo in furos_verticais:
+            chave = (round(float(furo.diametro), 1), round(float(furo.profundidade), 1))
+            grupos.setdefault(chave, []).append(furo)
+
+        maximo = max(self.capacidade.values())
+        tamanhos = (self.capacidade[INFERIOR], self.capacidade[SUPERIOR])
+        resultado = []
+        for chave, furos_grupo in grupos.items():
+            linhas_grupo = sorted({round(float(f.x), 1) for f in furos_grupo})
+            pedacos = [linhas_grupo]
+            if len(linhas_grupo) > maximo:
+                pedacos, inicio = [], 0
+                while inicio < len(linhas_grupo):
+                    tamanho = tamanhos[len(pedacos) % 2]
+                    pedacos.append(linhas_grupo[inicio:inicio + tamanho])
+                    inicio += tamanho
+            for linhas_x in pedacos:
+                if len(pedacos) > 1:
+                    faixa = set(linhas_x)
+                    furos = [f for f in furos_grupo if round(float(f.x), 1) in faixa]
+                else:
+                    furos = furos_grupo
+                resultado.append({
+                    'chave': chave,
+                    'furos': furos,
+                    'linhas_x': linhas_x,
+                    'tem_conflito_interno': tem_conflito_interno(linhas_x, self.distancia_minima),
+                    'diametro': chave[0],
+                })
+
+        # Primeiro os sem conflito interno, depois por DIÂMETRO (menor primeiro)
+        resultado.sort(key=lambda g: (g['tem_conflito_interno'], g['diametro']))
+        return resultado
+
+    def _matriz_conflitos(self, grupos: List[Dict]) -> List[List[bool]]:
+        n = len(grupos)
+        conflito = [[False] * n for _ in range(n)]
+        for i in range(n):
+            for j in range(i + 1, n):
+                if grupos[i]['chave'] == grupos[j]['chave']:
+                    continue  # Pedaços do mesmo grupo: mesmo mandril, sem regra dos 100mm
+                c = tem_conflito_entre(grupos[i]['linhas_x'], grupos[j]['linhas_x'],
+                                       self.distancia_minima)
+                conflito[i][j] = conflito[j][i] = c
+        return conflito
+
+    # ------------------------------------------------------------------
+    # Solução gulosa (regra antiga) e custo
+    # ------------------------------------------------------------------
+    def _cabe(self, g: int, lado: str, ocupacao: Dict, grupos: List[Dict], conflito) -> bool:
+        linhas, membros = ocupacao[lado]
+        if linhas + len(grupos[g]['linhas_x']) > self.capacidade[lado]:
+            return False
+        return not any(conflito[g][m] for m in membros)
+
+    def _guloso(self, grupos: List[Dict], conflito, candidatos: List[int]) -> List[Dict]:
+        """Enche uma passada por vez na ordem de prioridade (INFERIOR, depois SUPERIOR)"""
+        passadas = []
+        restantes = list(candidatos)
+        while restantes:
+            ocupacao = {INFERIOR: [0, []], SUPERIOR: [0, []]}
+            sobra = []
+            for g in restantes:
+                for lado in (INFERIOR, SUPERIOR):
+                    if self._cabe(g, lado, ocupacao, grupos, conflito):
+                        ocupacao[lado][0] += len(grupos[g]['linhas_x'])
+                        ocupacao[lado][1].append(g)
+                        break
+                else:
+                    sobra.append(g)
+            passadas.append({lado: membros for lado, (_, membros) in ocupacao.items()})
+            restantes = sobra
+        return passadas
+
+    def _custo(self, passadas: List[Dict], grupos: List[Dict]) -> tuple:
+        """(nº de passadas, furos fora da 1ª passada)"""
+        fora = sum(len(grupos[g]['furos'])
+                   for passada in passadas[1:] for membros in passada.values() for g in membros)
+        return (len(passadas), fora)
+
+    # ------------------------------------------------------------------
+    # Busca
+    # ------------------------------------------------------------------
+    def _buscar(self, grupos: List[Dict], conflito, candidatos: List[int], melhor: List[Dict]) -> List[Dict]:
+        """Branch and bound: cada grupo vai para um lado de uma passada existente ou abre uma nova"""
+        melhor_custo = self._custo(melhor, grupos)
+        if melhor_custo[0] <= 1 and melhor_custo[1] == 0:
+            return melhor  # Já é ótimo
+
+        # Grupos mais "largos" primeiro: podam a árvore mais cedo
+        ordem = sorted(candidatos, key=lambda g: (-len(grupos[g]['linhas_x']), g))
+        prazo = time.perf_counter() + self.tempo_limite
+        estado = {'melhor': melhor, 'custo': melhor_custo, 'nos': 0, 'esgotado': False}
+
+        passadas: List[Dict] = []  # [{INFERIOR: [0, [g...]], SUPERIOR: [...]}]
+
+        def fora_da_primeira():
+            return sum(len(grupos[g]['furos'])
+                       for passada in passadas[1:] for _, membros in passada.values() for g in membros)
+
+        def visitar(k: int):
+            estado['nos'] += 1
+            if estado['nos'] % 256 == 0 and time.perf_counter() > prazo:
+                estado['esgotado'] = True
+            if estado['esgotado']:
+                return
+
+            custo_parcial = (len(passadas), fora_da_primeira())
+            if custo_parcial >= estado['custo']:
+                return
+
+            if k == len(ordem):
+                estado['custo'] = custo_parcial
+                estado['melhor'] = [{lado: list(membros) for lado, (_, membros) in p.items()}
+                                    for p in passadas]
+                return
+
+            g = ordem[k]
+            tamanho = len(grupos[g]['linhas_x'])
+            for passada in passadas + [None]:
+                nova = passada is None
+                if nova:
+                    passada = {INFERIOR: [0, []], SUPERIOR: [0, []]}
+                    passadas.append(passada)
+                for lado in (INFERIOR, SUPERIOR):
+                    if self._cabe(g, lado, passada, grupos, conflito):
+                        passada[lado][0] += tamanho
+                        passada[lado][1].append(g)
+                        visitar(k + 1)
+                        passada[lado][1].pop()
+                        passada[lado][0] -= tamanho
+                if nova:
+                    passadas.pop()
+
+        visitar(0)
+        return estado['melhor']
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def planejar(self, furos_verticais: list) -> dict:
+        """
+        Distribui furos entre INFERIOR e SUPERIOR respeitando regra dos 100mm.
+
+        Returns:
+            dict com 'inferior', 'superior', 'segunda_furacao' (furos de todas as
+            passadas extras), 'precisa_segunda_furacao' e 'passadas'
+            ([{'numero', 'inferior', 'superior', 'furos'}], uma por passada)
+        """
+        if not furos_verticais:
+            return self._resultado([], [], [])
+
+        # Sem conflito geral e cabendo no lado: tudo vai para inferior
+        linhas_todas = sorted({round(float(f.x), 1) for f in furos_verticais})
+        if (len(linhas_todas) <= self.capacidade[INFERIOR]
+                and not tem_conflito_interno(linhas_todas, self.distancia_minima)):
+            return self._resultado(list(furos_verticais), [], [])
+
+        # Todo grupo (ou pedaço de grupo) cabe sozinho num lado: nenhuma
+        # passada sai com mais linhas que a capacidade ou fora da regra dos 100mm
+        grupos = self._montar_grupos(furos_verticais)
+        conflito = self._matriz_conflitos(grupos)
+        candidatos = list(range(len(grupos)))
+
+        passadas = self._guloso(grupos, conflito, candidatos)
+        passadas = self._buscar(grupos, conflito, candidatos, passadas)
+
+        # Furos de cada lado na ordem de prioridade dos grupos
+        def furos_de(membros):
+            return [f for g in sorted(membros) for f in grupos[g]['furos']]
+
+        lista = [{'numero': n,
+                  'inferior': furos_de(p[INFERIOR]),
+                  'superior': furos_de(p[SUPERIOR]),
+                  'furos': furos_de(p[INFERIOR] + p[SUPERIOR])}
+                 for n, p in enumerate(passadas, 1)]
+        if not lista:
+            return self._resultado([], [], [])
+        return self._resultado(lista[0]['inferior'], lista[0]['superior'], lista[1:])
+
+    def _resultado(self, inferior: list, superior: list, extras: List[Dict]) -> dict:
+        segunda = [f for p in extras for f in p['furos']]
+        primeira = {'numero': 1, 'inferior': inferior, 'superior': superior,
+                    'furos': inferior + superior}
+        return {
+            'inferior': inferior,
+            'superior': superior,
+            'segunda_furacao': segunda,
+            'precisa_segunda_furacao': len(segunda) > 0,
+            'passadas': [primeira] + extras,
+        }
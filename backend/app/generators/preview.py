@@ -0,0 +1,242 @@
+"""
+Miniaturas (PNG/SVG) da vista principal da peça
+
+Usa a mesma geometria do PDF (GeradorDesenhoTecnico: rotação, espelho,
+escala, batente/mandris) e as mesmas operações do layout_cotas; só troca o
+destino: em vez do canvas A4 do ReportLab, as operações viram SVG (texto)
+ou PNG (Pillow, desenhado em 2x e reduzido para suavizar).
+
+As miniaturas ficam num CacheLRU por hash do conteúdo da peça.
+"""
+import io
+import os
+from functools import lru_cache
+from typing import List, Tuple
+
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from ..core.cache import CacheLRU, hash_conteudo
+from .layout_cotas import Circulo, Linha, Operacao, _resolver_cor, layout_vista_principal
+from .pdf_generator import GeradorDesenhoTecnico
+
+# Sobe quando o desenho mudar (invalida miniaturas antigas)
+VERSAO_PREVIEW = 1
+
+FORMATOS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+LARGURA_PADRAO = 320
+ALTURA_PADRAO = 240
+LARGURA_MAXIMA = 1600
+
+MARGEM = 4           # pt em volta do desenho (inclui rótulos)
+SUPERAMOSTRAGEM = 2  # PNG desenhado em 2x e reduzido
+TEXTO_MINIMO_PX = 6  # abaixo disso o texto some do PNG (ilegível)
+
+cache_previews = CacheLRU(
+    max_itens=2048,
+    max_bytes=int(os.getenv("COREWOOD_CACHE_PREVIEW_MB", "32")) * 1024 * 1024
+)
+
+
+def _rgba(cor) -> Tuple[int, int, int]:
+    cor = _resolver_cor(cor)
+    return tuple(int(round(v * 255)) for v in (cor.red, cor.green, cor.blue))
+
+
+def _hex(cor) -> str:
+    return "#%02x%02x%02x" % _rgba(cor)
+
+
+def _limitar(tamanho) -> int:
+    """Tamanho em px entre 16 e LARGURA_MAXIMA"""
+    return max(16, min(int(tamanho), LARGURA_MAXIMA))
+
+
+@lru_cache(maxsize=64)
+def _fonte_png(tamanho: int):
+    """Vera (vem com o ReportLab, tem Ø); fonte padrão do Pillow se não achar"""
+    from PIL import ImageFont
+    import reportlab
+
+    caminho = os.path.join(os.path.dirname(reportlab.__file__), 'fonts', 'Vera.ttf')
+    try:
+        return ImageFont.truetype(caminho, tamanho)
+    except OSError:
+        return ImageFont.load_default(size=tamanho)
+
+
+class GeradorPreview:
+    """Gera miniaturas PNG/SVG da vista de topo (cotas + furos verticais)"""
+
+    def __init__(self):
+        self.gerador = GeradorDesenhoTecnico()
+
+    # ------------------------------------------------------------------
+    # Geometria
+    # ------------------------------------------------------------------
+    def operacoes(self, peca, dados_adicionais: dict = None) -> List[Operacao]:
+        """
+        Operações da vista principal com a escala da página sem vistas
+        laterais do PDF (mesmas cotas e afastamentos do desenho impresso)
+        """
+        g = self.gerador
+        dados = dict(dados_adicionais or {})
+        peca = g._preparar_peca(peca, dados)
+
+        largura_pagina, altura_pagina = landscape(A4)
+        largura_disponivel = largura_pagina - 2 * g.margem
+        altura_disponivel = altura_pagina - g.margem - 80 - 60  # área acima da tabela
+
+        largura_real = float(peca.dimensoes.largura)
+        altura_real = float(peca.dimensoes.comprimento)
+        escala = g.calcular_escala(largura_real, altura_real, largura_disponivel,
+                                   altura_disponivel, margem_seguranca=0.65)
+        largura = largura_real * mm * escala
+        altura = altura_real * mm * escala
+
+        contorno = [
+            Linha(0, 0, largura, 0, cor="#000000", espessura=1),
+            Linha(largura, 0, largura, altura, cor="#000000", espessura=1),
+            Linha(largura, altura, 0, altura, cor="#000000", espessura=1),
+            Linha(0, altura, 0, 0, cor="#000000", espessura=1),
+        ]
+        batente = g.calcular_batente(peca)
+        furos = peca.furos_verticais
+        return contorno + layout_vista_principal(
+            furos, [g.calcular_mandril(furo.y, batente) for furo in furos],
+            0, 0, largura, altura, escala, largura_real, altura_real, g.formatar_cota
+        )
+
+    @staticmethod
+    def _caixa(operacoes: List[Operacao]) -> Tuple[float, float, float, float]:
+        """(x_min, y_min, x_max, y_max) de todas as operações, com margem"""
+        xs, ys = [], []
+        for op in operacoes:
+            if isinstance(op, Linha):
+                xs += [op.x1, op.x2]
+                ys += [op.y1, op.y2]
+            elif isinstance(op, Circulo):
+                xs += [op.x - op.raio, op.x + op.raio]
+                ys += [op.y - op.raio, op.y + op.raio]
+            else:
+                # Folga de 10%: a Vera do PNG é um pouco mais larga que a Helvetica
+                largura = stringWidth(op.texto, op.fonte, op.tamanho) * 1.1
+                if op.rotacao:
+                    xs += [op.x - op.tamanho, op.x]
+                    ys += [op.y, op.y + largura]
+                else:
+                    xs += [op.x, op.x + largura]
+                    ys += [op.y - op.tamanho * 0.25, op.y + op.tamanho]
+        return (min(xs) - MARGEM, min(ys) - MARGEM, max(xs) + MARGEM, max(ys) + MARGEM)
+
+    @staticmethod
+    def _encaixar(caixa, largura_max: int, altura_max: int) -> Tuple[int, int, float]:
+        """Tamanho em px que cabe em largura_max x altura_max mantendo a proporção"""
+        x0, y0, x1, y1 = caixa
+        fator = min(largura_max / (x1 - x0), altura_max / (y1 - y0))
+        return max(1, round((x1 - x0) * fator)), max(1, round((y1 - y0) * fator)), fator
+
+    # ------------------------------------------------------------------
+    # Saídas
+    # ------------------------------------------------------------------
+    def gerar_svg(self, peca, dados_adicionais: dict = None,
+                  largura: int = LARGURA_PADRAO, altura: int = ALTURA_PADRAO) -> bytes:
+        """SVG com viewBox em pontos (Y invertido), escalado para caber em largura x altura"""
+        from xml.sax.saxutils import escape
+
+        operacoes = self.operacoes(peca, dados_adicionais)
+        x0, y0, x1, y1 = caixa = self._caixa(operacoes)
+        largura_px, altura_px, _ = self._encaixar(caixa, largura, altura)
+
+        def y(valor):
+            return round(y1 - valor, 2)
+
+        partes = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{largura_px}" height="{altura_px}" '
+            f'viewBox="{round(x0, 2)} 0 {round(x1 - x0, 2)} {round(y1 - y0, 2)}">',
+            f'<rect x="{round(x0, 2)}" y="0" width="{round(x1 - x0, 2)}" height="{round(y1 - y0, 2)}" fill="#ffffff"/>',
+        ]
+        for op in operacoes:
+            if isinstance(op, Linha):
+                partes.append(f'<line x1="{round(op.x1, 2)}" y1="{y(op.y1)}" x2="{round(op.x2, 2)}" '
+                              f'y2="{y(op.y2)}" stroke="{_hex(op.cor)}" stroke-width="{op.espessura}"/>')
+            elif isinstance(op, Circulo):
+                partes.append(f'<circle cx="{round(op.x, 2)}" cy="{y(op.y)}" r="{round(op.raio, 2)}" '
+                              f'fill="none" stroke="{_hex(op.cor)}" stroke-width="{op.espessura}"/>')
+            else:
+                rotacao = f' transform="rotate({-op.rotacao} {round(op.x, 2)} {y(op.y)})"' if op.rotacao else ''
+                partes.append(f'<text x="{round(op.x, 2)}" y="{y(op.y)}" font-family="Helvetica, Arial, sans-serif" '
+                              f'font-size="{op.tamanho}" fill="{_hex(op.cor)}"{rotacao}>{escape(op.texto)}</text>')
+        partes.append('</svg>')
+        return "\n".join(partes).encode('utf-8')
+
+    def gerar_png(self, peca, dados_adicionais: dict = None,
+                  largura: int = LARGURA_PADRAO, altura: int = ALTURA_PADRAO) -> bytes:
+        """PNG que cabe em largura x altura (desenhado em SUPERAMOSTRAGEM x e reduzido)"""
+        from PIL import Image, ImageDraw
+
+        operacoes = self.operacoes(peca, dados_adicionais)
+        x0, y0, x1, y1 = caixa = self._caixa(operacoes)
+        largura_px, altura_px, fator = self._encaixar(caixa, largura, altura)
+        fator *= SUPERAMOSTRAGEM
+
+        imagem = Image.new('RGB', (largura_px * SUPERAMOSTRAGEM, altura_px * SUPERAMOSTRAGEM), 'white')
+        desenho = ImageDraw.Draw(imagem)
+
+        def ponto(x, y):
+            return ((x - x0) * fator, (y1 - y) * fator)
+
+        for op in operacoes:
+            if isinstance(op, Linha):
+                desenho.line([ponto(op.x1, op.y1), ponto(op.x2, op.y2)], fill=_rgba(op.cor),
+                             width=max(1, round(op.espessura * fator)))
+            elif isinstance(op, Circulo):
+                cx, cy = ponto(op.x, op.y)
+                r = op.raio * fator
+                desenho.ellipse([cx - r, cy - r, cx + r, cy + r], outline=_rgba(op.cor),
+                                width=max(1, round(op.espessura * fator)))
+            else:
+                tamanho = round(op.tamanho * fator)
+                if tamanho < TEXTO_MINIMO_PX * SUPERAMOSTRAGEM:
+                    continue
+                fonte = _fonte_png(tamanho)
+                x, y = ponto(op.x, op.y)
+                if op.rotacao:
+                    caixa_texto = desenho.textbbox((0, 0), op.texto, font=fonte, anchor='ls')
+                    rotulo = Image.new('RGBA', (caixa_texto[2] + 2, tamanho * 2), (255, 255, 255, 0))
+                    ImageDraw.Draw(rotulo).text((0, tamanho * 1.5), op.texto, font=fonte,
+                                                fill=_rgba(op.cor), anchor='ls')
+                    rotulo = rotulo.rotate(op.rotacao, expand=True)
+                    imagem.paste(rotulo, (round(x - tamanho * 1.5), round(y - rotulo.height)), rotulo)
+                else:
+                    desenho.text((x, y), op.texto, font=fonte, fill=_rgba(op.cor), anchor='ls')
+
+        imagem = imagem.resize((largura_px, altura_px), Image.LANCZOS)
+        saida = io.BytesIO()
+        imagem.save(saida, format='PNG', optimize=True)
+        return saida.getvalue()
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+    @staticmethod
+    def chave(peca, dados_adicionais: dict, formato: str, largura: int, altura: int) -> str:
+        """Hash do conteúdo que muda o desenho (peça, rotação, espelho, formato, tamanho)"""
+        dados = dados_adicionais or {}
+        largura, altura = _limitar(largura), _limitar(altura)
+        return hash_conteudo(VERSAO_PREVIEW, peca, dados.get('angulo_rotacao', 0),
+                             bool(dados.get('espelhar_peca', False)), formato, largura, altura)
+
+    def gerar(self, peca, dados_adicionais: dict = None, formato: str = 'png',
+              largura: int = LARGURA_PADRAO, altura: int = ALTURA_PADRAO) -> Tuple[str, bytes]:
+        """(chave, conteúdo) da miniatura, do cache se já existir"""
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato inválido: {formato} (use {', '.join(FORMATOS)})")
+        largura, altura = _limitar(largura), _limitar(altura)
+
+        chave = self.chave(peca, dados_adicionais, formato, largura, altura)
+        gerar = self.gerar_png if formato == 'png' else self.gerar_svg
+        conteudo = cache_previews.obter_ou_criar(
+            chave, lambda: gerar(peca, dados_adicionais, largura, altura))
+        return chave, conteudo
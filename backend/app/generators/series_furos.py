@@ -0,0 +1,161 @@
+"""
+Detecção de séries de furos para o MPR (blocos AN/AB/WI)
+
+Furos iguais (mesmo tipo, diâmetro, profundidade, lado e, nos horizontais,
+mesma altura Z) igualmente espaçados viram um bloco só:
+- WI="0":  série ao longo de X (furos com o mesmo Y)
+- WI="90": série ao longo de Y (furos com o mesmo X)
+
+Para cada conjunto de furos iguais as séries são montadas nas duas direções
+(ordenação + run-length) e fica a direção com menos blocos. Um furo só entra
+numa série se, com as coordenadas como saem no arquivo (1 casa), estiver
+exatamente (a menos de ruído de float) na linha e na posição que a máquina
+calcula com o AB: a série reproduz os mesmos furos que blocos avulsos.
+Uma grade de pinos de prateleira de 5 colunas x 32 furos vira 5 blocos.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+TOLERANCIA = 1e-6  # mm: só ruído de float (mesma linha / posição da série)
+CASAS_PASSO = 1   # AB sai com 1 casa decimal
+
+
+def _numero(valor) -> Optional[float]:
+    """Coordenada numérica, ou None (XA="x" = lado oposto)"""
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _posicao(furo: Dict, eixo: str, largura: Optional[float] = None) -> Optional[float]:
+    """
+    Coordenada como o MPR a escreve (1 casa, ver mpr_generator._numero), ou None.
+    Com `largura` o Y sai invertido (largura - y), como no gerador.
+    """
+    valor = _numero(furo.get(eixo, 0))
+    if valor is None:
+        return None
+    if eixo == 'y' and largura is not None:
+        valor = largura - valor
+    return float('%.1f' % valor)
+
+
+def _chave(furo: Dict) -> Tuple:
+    """Propriedades que precisam ser iguais para os furos entrarem na mesma série"""
+    x = furo.get('x', 0)
+    return (furo.get('tipo'), furo.get('diametro'), furo.get('profundidade'),
+            furo.get('lado'), furo.get('z'), x if _numero(x) is None else None)
+
+
+def _linhas(furos: Sequence[Dict], eixo: str, tolerancia: float,
+            decrescente: bool = False, largura: Optional[float] = None) -> List[List[Dict]]:
+    """
+    Furos agrupados pela coordenada transversal (dentro da tolerância) e
+    ordenados ao longo de `eixo`. Furos sem coordenada numérica no eixo
+    ficam sozinhos.
+    """
+    transversal = 'y' if eixo == 'x' else 'x'
+    validos = [f for f in furos
+               if _posicao(f, eixo, largura) is not None and _posicao(f, transversal, largura) is not None]
+    avulsos = [[f] for f in furos
+               if _posicao(f, eixo, largura) is None or _posicao(f, transversal, largura) is None]
+
+    linhas = []
+    atual, inicio = [], None
+    for furo in sorted(validos, key=lambda f: _posicao(f, transversal, largura)):
+        valor = _posicao(furo, transversal, largura)
+        if atual and valor - inicio > tolerancia:
+            linhas.append(atual)
+            atual = []
+        if not atual:
+            inicio = valor
+        atual.append(furo)
+    if atual:
+        linhas.append(atual)
+
+    return [sorted(linha, key=lambda f: _posicao(f, eixo, largura), reverse=decrescente)
+            for linha in linhas] + avulsos
+
+
+def _series_da_linha(linha: List[Dict], eixo: str, tolerancia: float,
+                     decrescente: bool = False,
+                     largura: Optional[float] = None) -> List[Tuple[List[Dict], float]]:
+    """
+    Run-length: corta a linha ordenada em trechos de passo constante.
+    Posições como saem no arquivo (1 casa). O passo é o que vai no AB e cada
+    furo é conferido contra a posição que a máquina calcula a partir do
+    primeiro: furo fora dela (mesmo por 0,1mm) começa outra série em vez de
+    ser movido.
+    """
+    sinal = -1 if decrescente else 1
+    posicoes = [sinal * _posicao(f, eixo, largura) for f in linha]
+    series = []
+    i = 0
+    while i < len(linha):
+        j = i + 1
+        passo = 0.0
+        if j < len(linha) and posicoes[j] - posicoes[i] > tolerancia:
+            passo = round(posicoes[j] - posicoes[i], CASAS_PASSO)
+            while j < len(linha) and abs(posicoes[j] - (posicoes[i] + (j - i) * passo)) < tolerancia:
+                j += 1
+        series.append((linha[i:j], passo if j - i > 1 else 0.0))
+        i = j
+    return series
+
+
+def _series(furos: Sequence[Dict], eixo: str, tolerancia: float,
+            decrescente: bool = False,
+            largura: Optional[float] = None) -> List[Tuple[List[Dict], float]]:
+    """Séries ao longo de `eixo`; o primeiro furo de cada uma é a origem"""
+    series = []
+    for linha in _linhas(furos, eixo, tolerancia, decrescente, largura):
+        if len(linha) == 1:
+            series.append((linha, 0.0))  # inclui os furos sem coordenada numérica
+        else:
+            series += _series_da_linha(linha, eixo, tolerancia, decrescente, largura)
+    return series
+
+
+def _ordem(furo: Dict) -> Tuple[float, float]:
+    x = _numero(furo.get('x', 0))
+    return (_numero(furo.get('y', 0)) or 0.0, float('inf') if x is None else x)
+
+
+def agrupar_series(furos: Sequence[Dict], inverter_y: bool = True,
+                   tolerancia: float = TOLERANCIA,
+                   largura: Optional[float] = None) -> List[Dict]:
+    """
+    Agrupa furos (dicts do gerador MPR) em séries ao longo de X ou de Y.
+
+    Cada item devolvido é o furo de origem da série com 'quantidade',
+    'distancia' e 'direcao_replicacao' ('x' ou 'y'). A série sempre cresce
+    no sentido positivo do WoodWop: com inverter_y=True a série em Y é
+    montada de cima para baixo e a origem é o furo de maior Y da peça
+    (menor Y depois de invertido). Passe a `largura` da peça para conferir
+    os Y já invertidos, como vão para o arquivo (arredondar y e depois
+    inverter nem sempre dá o mesmo que inverter e arredondar).
+    Em empate entre as direções fica X.
+    """
+    conjuntos: Dict[Tuple, List[Dict]] = {}
+    for furo in furos:
+        conjuntos.setdefault(_chave(furo), []).append(furo)
+
+    espelho = largura if inverter_y else None
+    grupos = []
+    for iguais in conjuntos.values():
+        series_x = _series(iguais, 'x', tolerancia, largura=espelho)
+        series_y = _series(iguais, 'y', tolerancia, decrescente=inverter_y and espelho is None,
+                           largura=espelho)
+        direcao, series = ('x', series_x) if len(series_x) <= len(series_y) else ('y', series_y)
+
+        for membros, passo in series:
+            grupos.append((_ordem(membros[0]), {
+                **membros[0],
+                'quantidade': len(membros),
+                'distancia': passo,
+                'direcao_replicacao': direcao if len(membros) > 1 else 'x',
+            }))
+
+    grupos.sort(key=lambda item: item[0])
+    return [grupo for _, grupo in grupos]
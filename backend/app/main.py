@@ -1,31 +1,45 @@
 """
 CoreWood API - FastAPI Application
+
+Só o necessário para responder /health vai no import: ReportLab/numpy
+(geração de PDF) e pandas (importação de planilhas) são carregados na
+primeira rota que os usa, e o pythonOCC só no worker com as rotas /api/step.
+Orçamento de inicialização: python -m benchmarks.inicializacao
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Form, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, StreamingResponse, Response
-from typing import List
+from typing import List, Optional
+import importlib.util
 import tempfile
 import os
 import re
-import zipfile, io
-from pathlib import Path
+import io
+import time
 from .parser.mpr_parser import parse_furacao
-from .generators.pdf_generator import GeradorDesenhoTecnico
 from .database import engine, Base, get_db
 from sqlalchemy.orm import Session
-from .routes import auth
+from .routes import auth, editor, pecas
 from .core.auth import get_current_active_user
 from .models.user import User
 import json
-import tempfile
-from app.routes import editor, pecas
+import logging
 from .generators.mpr_generator import GeradorMPR
-from .parser.step_parser import parse_step_multipart
+from .parser.step_parser import parse_step_multipart, StepMultiPartParser, TXTReportGenerator
+from .generators.lote_mpr import escrever_zip_mprs, aquecer_pool
+from starlette.concurrency import run_in_threadpool
+from .core.logging_config import configurar_logging
+from .core.instrumentacao import medir_render, perfil_ativado
+from .core.monitor_loop import monitor_ativado, monitor_loop
+
+configurar_logging()
+logger = logging.getLogger(__name__)
 
-# Criar tabelas no banco
-Base.metadata.create_all(bind=engine)
+# Criar tabelas no banco (COREWOOD_CRIAR_TABELAS=0 quando o schema já existe:
+# poupa as consultas de metadados a cada worker que sobe)
+if os.getenv("COREWOOD_CRIAR_TABELAS", "1").lower() not in ("0", "false", "nao"):
+    Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="CoreWood API",
@@ -44,30 +58,54 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Render-Metrics", "X-Pack-Pecas", "X-Pack-Falhas"],
 )
 
-# Imports de rotas
-from app.routes import editor, pecas
-
 # Incluir rotas
 app.include_router(auth.router)
 app.include_router(editor.router)
 app.include_router(pecas.router)
 
-# pythonOCC - só carrega se disponível
-try:
-    from app.routes import step_occ
+
+def rotas_occ_ativadas() -> bool:
+    """
+    COREWOOD_OCC=0 desliga as rotas /api/step (workers web), =1 exige o
+    pythonOCC; sem a variável, liga se o pacote estiver instalado. O OCC em si
+    só é importado na primeira requisição dessas rotas.
+    """
+    opcao = os.getenv("COREWOOD_OCC", "").lower()
+    if opcao in ("0", "false", "nao"):
+        return False
+    disponivel = importlib.util.find_spec("OCC") is not None
+    if opcao in ("1", "true", "sim") and not disponivel:
+        raise RuntimeError("COREWOOD_OCC=1 mas o pythonOCC não está instalado")
+    return disponivel
+
+
+if rotas_occ_ativadas():
+    from .routes import step_occ
     app.include_router(step_occ.router)
-    print("✅ pythonOCC disponível - rotas /api/step habilitadas")
-except ImportError:
-    print("⚠️ pythonOCC não disponível - rotas /api/step desabilitadas")
+    logger.info("✅ pythonOCC disponível - rotas /api/step habilitadas")
+else:
+    logger.warning("⚠️ pythonOCC não disponível ou desligado - rotas /api/step desabilitadas")
 
 
+@app.on_event("startup")
+def iniciar_pool_mpr():
+    """Workers da geração de MPR em lote sobem em segundo plano (COREWOOD_MPR_AQUECER=1)"""
+    aquecer_pool()
 
-# Incluir rotas de autenticação
-app.include_router(auth.router)
-app.include_router(editor.router)
-app.include_router(pecas.router)
+
+@app.on_event("startup")
+async def iniciar_monitor_loop():
+    """Monitor de atraso do event loop (COREWOOD_MONITOR_LOOP=1)"""
+    if monitor_ativado():
+        monitor_loop.iniciar()
+
+
+@app.on_event("shutdown")
+async def parar_monitor_loop():
+    monitor_loop.parar()
 
 
 @app.get("/")
@@ -90,6 +128,12 @@ def health():
     return {"status": "healthy"}
 
 
+@app.get("/health/loop")
+def health_loop(zerar: bool = False):
+    """Atraso do event loop (p50/p95/p99/máx em ms) desde a última zerada"""
+    return monitor_loop.estatisticas(zerar=zerar)
+
+
 @app.post("/parse-mpr")
 async def parse_mpr(
     file: UploadFile = File(...),
@@ -107,11 +151,10 @@ async def parse_mpr(
     try:
         # Ler conteúdo do arquivo
         content = await file.read()
-        content_str = content.decode('utf-8', errors='ignore')
         
         # Parse
         nome_peca = file.filename.replace('.mpr', '').replace('.MPR', '')
-        peca = parse_furacao(content_str, nome_peca)
+        peca = parse_furacao(content, nome_peca)
         
         # Converter para dict
         return {
@@ -149,6 +192,35 @@ async def parse_mpr(
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro ao processar arquivo: {str(e)}")
+
+
+@app.post("/mpr-to-mpr")
+async def convert_mpr_to_mpr(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Regrava um MPR no formato do gerador (versão/cabeçalho atuais).
+    As séries AN/AB/WI do arquivo voltam como séries, sem expandir e
+    reagrupar, e os Y já estão no sistema do WoodWop (sem inverter).
+    """
+    content = await file.read()
+    nome_peca = file.filename.replace('.mpr', '').replace('.MPR', '')
+    try:
+        peca = parse_furacao(content, nome_peca, expandir_padroes=False)
+        mpr_content = GeradorMPR().gerar_mpr_peca_bytes(peca, inverter_y=False)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erro ao processar arquivo: {str(e)}")
+
+    logger.info("🔁 MPR regravado: %s (%d séries, usuário: %s)",
+                file.filename, len(peca.padroes), current_user.username)
+    nome_limpo = re.sub(r'[^\w\s-]', '', nome_peca).strip().replace(' ', '_') or "peca"
+    return Response(
+        content=mpr_content,
+        media_type='application/octet-stream',
+        headers={'Content-Disposition': f'attachment; filename="{nome_limpo}.mpr"'}
+    )
+
     
 @app.post("/generate-pdf-batch")
 async def generate_pdf_batch(
@@ -159,9 +231,9 @@ async def generate_pdf_batch(
     """
     Gera múltiplos PDFs em lote e retorna um arquivo ZIP
     """
-    import json
     import zipfile
     from io import BytesIO
+    from .generators.pdf_generator import GeradorDesenhoTecnico
     
     try:
         # Parse das configurações
@@ -181,15 +253,14 @@ async def generate_pdf_batch(
             for idx, (file, config_dict) in enumerate(zip(files, configs_list), 1):                
                 try:
                     # if config_dict is None or not isinstance(config_dict, dict):
-                    #     print(f"   ⚠️ Config inválida, usando padrão")
+                    #     logger.warning("   ⚠️ Config inválida, usando padrão")
                     #     config_dict = {}
                     # Ler arquivo
                     content = await file.read()
-                    content_str = content.decode('utf-8', errors='ignore')
                     nome_peca = file.filename.replace('.mpr', '').replace('.MPR', '')
                     
                     # Parse da peça
-                    peca = parse_furacao(content_str, nome_peca)
+                    peca = parse_furacao(content, nome_peca, expandir_padroes=False)
                     
                     # Parse das bordas
                     bordas_dict = config_dict.get('bordas', {})
@@ -212,14 +283,15 @@ async def generate_pdf_batch(
                         pdf_temp_path = tmp_pdf.name
 
                     # Gerar PDF
-                    gerador.gerar_pdf(peca, pdf_temp_path, dados_adicionais)
+                    with medir_render() as metricas:
+                        gerador.gerar_pdf(peca, pdf_temp_path, dados_adicionais)
+                    metricas.registrar(arquivo=file.filename)
 
                     # Ler conteúdo do PDF
                     with open(pdf_temp_path, 'rb') as pdf_file:
                         pdf_content = pdf_file.read()
 
                     # Limpar arquivo temporário
-                    import os
                     os.unlink(pdf_temp_path)
 
                     # Adicionar ao ZIP
@@ -227,7 +299,7 @@ async def generate_pdf_batch(
                     zip_file.writestr(nome_pdf, pdf_content)
                     
                 except Exception as e:
-                    print(f"   ❌ Erro ao processar {file.filename}: {str(e)}")
+                    logger.error("   ❌ Erro ao processar %s: %s", file.filename, e)
                     # Continuar processando os outros arquivos
                     continue
         
@@ -246,7 +318,7 @@ async def generate_pdf_batch(
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Configurações inválidas")
     except Exception as e:
-        print(f"❌ Erro no processamento em lote: {str(e)}")
+        logger.exception("❌ Erro no processamento em lote: %s", e)
         raise HTTPException(status_code=500, detail=f"Erro ao processar lote: {str(e)}")    
 
 @app.post("/generate-pdf")
@@ -258,26 +330,27 @@ async def generate_pdf(
     alerta: str = None,
     revisao: str = None,
     status: str = "CÓPIA CONTROLADA",
+    x_render_profile: Optional[str] = Header(None),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)  # ← ADICIONA
 ):
     """
     Gera PDF técnico a partir de arquivo MPR
+    Tempos por etapa vão nos headers Server-Timing / X-Render-Metrics;
+    X-Render-Profile: 1 liga o cProfile se COREWOOD_PERFIL_HEADER=1 (resumo no log app.metrics)
     """
     try:
         from app.models.peca_db import PecaDB  # ← ADICIONA
         from app.models.produto import Produto  # ← ADICIONA
+        from .generators.pdf_generator import GeradorDesenhoTecnico
         
         # Parse do arquivo
         content = await file.read()
-        content_str = content.decode('utf-8', errors='ignore')
         nome_peca = file.filename.replace('.mpr', '').replace('.MPR', '')
-        peca = parse_furacao(content_str, nome_peca)
+        peca = parse_furacao(content, nome_peca, expandir_padroes=False)
         
-        print(f"\n📄 ===== GERANDO PDF INDIVIDUAL =====")
-        print(f"👤 Usuário: {current_user.username}")
-        print(f"📦 Arquivo: {file.filename}")
-        print(f"🔑 Nome extraído: {nome_peca}")
+        logger.info("📄 Gerando PDF individual: %s (usuário: %s, nome extraído: %s)",
+                    file.filename, current_user.username, nome_peca)
         
         # NOVO: Buscar dados da peça pelo código (nome do arquivo)
         codigo_peca = None
@@ -296,13 +369,10 @@ async def generate_pdf(
             codigo_produto = produto.codigo if produto else None
             nome_produto = produto.nome if produto else None
             
-            print(f"✅ Peça encontrada no banco:")
-            print(f"   Código Peça: {codigo_peca}")
-            print(f"   Nome Peça: {nome_peca_db}")
-            print(f"   Código Produto: {codigo_produto}")
-            print(f"   Nome Produto: {nome_produto}")
+            logger.debug("✅ Peça encontrada no banco: %s - %s (produto %s - %s)",
+                         codigo_peca, nome_peca_db, codigo_produto, nome_produto)
         else:
-            print(f"⚠️ Peça '{nome_peca}' não encontrada no banco")
+            logger.warning("⚠️ Peça '%s' não encontrada no banco", nome_peca)
         
         # Parse das bordas JSON
         try:
@@ -330,22 +400,23 @@ async def generate_pdf(
             pdf_path = tmp_file.name
         
         gerador = GeradorDesenhoTecnico()
-        gerador.gerar_pdf(peca, pdf_path, dados_adicionais)
+        with medir_render(perfil=perfil_ativado(x_render_profile)) as metricas:
+            gerador.gerar_pdf(peca, pdf_path, dados_adicionais)
+        metricas.registrar(arquivo=file.filename, usuario=current_user.username)
         
-        print(f"✅ PDF gerado: {pdf_path}")
+        logger.info("✅ PDF gerado: %s", pdf_path)
         
         # Retornar arquivo
         return FileResponse(
             pdf_path,
             media_type='application/pdf',
             filename=f"{nome_peca}_furacao.pdf",
+            headers=metricas.headers(),
             background=None
         )
         
     except Exception as e:
-        print(f"❌ Erro ao gerar PDF: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Erro ao gerar PDF: %s", e)
         raise HTTPException(status_code=500, detail=f"Erro ao gerar PDF: {str(e)}")
     
 @app.post("/parse-step")
@@ -363,8 +434,7 @@ async def parse_step_file(
         nome_base = file.filename.rsplit(".", 1)[0]
 
         dados = parse_step_multipart(content_str)
-        print(type(dados))
-        print(dados)
+        logger.debug("Resultado do parse STEP: %s", dados)
 
         pecas = dados.get("pecas", [])
 
@@ -407,7 +477,9 @@ async def convert_step_to_mpr(
     try:
         content = (await file.read()).decode("utf-8", errors="ignore")
 
+        inicio = time.perf_counter()
         dados = parse_step_multipart(content)
+        parse_ms = (time.perf_counter() - inicio) * 1000
 
         gerador = GeradorMPR()
 
@@ -417,7 +489,7 @@ async def convert_step_to_mpr(
             nome = peca.get("nome") or "peca"
             nome_limpo = re.sub(r'[^\w\s-]', '', nome).strip().replace(' ', '_')
             
-            mpr_content = gerador.gerar_mpr({
+            mpr_content = gerador.gerar_mpr_bytes({
                 "largura": peca["largura"],
                 "comprimento": peca["comprimento"],
                 "espessura": peca["espessura"],
@@ -426,43 +498,31 @@ async def convert_step_to_mpr(
             
             # Retornar como arquivo MPR direto
             return Response(
-                content=mpr_content.encode('cp1252', errors='replace'),
+                content=mpr_content,
                 media_type='application/octet-stream',
                 headers={
                     'Content-Disposition': f'attachment; filename="{nome_limpo}.mpr"'
                 }
             )
         
-        # Múltiplas peças - retorna ZIP
+        # Múltiplas peças - retorna ZIP (MPRs gerados em paralelo + manifesto.json)
         zip_buffer = io.BytesIO()
-
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for idx, peca in enumerate(dados["pecas"], start=1):
-                nome = peca.get("nome") or f"peca_{idx}"
-                nome_limpo = re.sub(r'[^\w\s-]', '', nome).strip().replace(' ', '_')
-
-                mpr_content = gerador.gerar_mpr({
-                    "largura": peca["largura"],
-                    "comprimento": peca["comprimento"],
-                    "espessura": peca["espessura"],
-                    "furos": peca.get("furos", [])
-                })
-
-                zipf.writestr(f"{nome_limpo}.mpr", mpr_content.encode('cp1252', errors='replace'))
-
+        manifesto = await run_in_threadpool(escrever_zip_mprs, dados["pecas"], zip_buffer,
+                                            None, parse_ms)
         zip_buffer.seek(0)
 
         return StreamingResponse(
             zip_buffer,
             media_type="application/zip",
             headers={
-                "Content-Disposition": "attachment; filename=pecas_mpr.zip"
+                "Content-Disposition": "attachment; filename=pecas_mpr.zip",
+                "X-Pack-Pecas": str(len(manifesto["pecas"])),
+                "X-Pack-Falhas": str(len(manifesto["falhas"]))
             }
         )
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Erro ao converter STEP para MPR: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao converter STEP para MPR: {str(e)}"
@@ -481,32 +541,28 @@ async def convert_multipart(
 ):
     content = (await file.read()).decode('utf-8', errors='ignore')
     
-    # Parse STEP
-    dados = parse_step_multipart(content)
+    # Parse STEP (uma vez: objetos para a lista de corte, dicts para os MPRs)
+    inicio = time.perf_counter()
+    pecas, acessorios = StepMultiPartParser(content).parse()
+    parse_ms = (time.perf_counter() - inicio) * 1000
     
-    # Gerar MPRs usando o GeradorMPR
-    gerador = GeradorMPR()
+    nome_projeto = file.filename.rsplit('.', 1)[0]
+    txt = TXTReportGenerator().generate(pecas, acessorios, nome_projeto)
     
-    # Retorna ZIP
+    # Retorna ZIP (MPRs gerados em paralelo + lista de corte + manifesto.json)
     zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for idx, peca in enumerate(dados["pecas"], start=1):
-            nome = peca.get("nome") or f"peca_{idx}"
-            
-            mpr_content = gerador.gerar_mpr({
-                "largura": peca["largura"],
-                "comprimento": peca["comprimento"],
-                "espessura": peca["espessura"],
-                "furos": peca.get("furos", [])
-            })
-            
-            zf.writestr(f"{nome}.mpr", mpr_content)
-        
-        zf.writestr("lista_corte.txt", txt)
-    
+    manifesto = await run_in_threadpool(escrever_zip_mprs, [p.to_dict() for p in pecas], zip_buffer,
+                                        {"lista_corte.txt": txt}, parse_ms)
     zip_buffer.seek(0)
     
-    return StreamingResponse(zip_buffer, media_type="application/zip")
+    return StreamingResponse(
+        zip_buffer,
+        media_type="application/zip",
+        headers={
+            "X-Pack-Pecas": str(len(manifesto["pecas"])),
+            "X-Pack-Falhas": str(len(manifesto["falhas"]))
+        }
+    )
 
 @app.post("/step-to-json")
 async def convert_step_to_json(
@@ -1,6 +1,6 @@
 from app.models.user import User
 from app.models.produto import Produto
 from app.models.peca_db import PecaDB
-from app.models.peca import Peca, FuroVertical, FuroHorizontal, Dimensoes
+from app.models.peca import Peca, FuroVertical, FuroHorizontal, Dimensoes, PadraoFuros
 
-__all__ = ["User", "Produto", "PecaDB", "Peca", "FuroVertical", "FuroHorizontal", "Dimensoes"]
\ No newline at end of file
+__all__ = ["User", "Produto", "PecaDB", "Peca", "FuroVertical", "FuroHorizontal", "Dimensoes", "PadraoFuros"]
\ No newline at end of file
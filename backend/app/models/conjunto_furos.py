@@ -0,0 +1,102 @@
+"""
+Conjunto de furos em arrays (struct-of-arrays)
+Rotação e espelhamento viram uma única transformação afim aplicada aos arrays,
+sem deepcopy da peça nem laço furo a furo.
+"""
+
+from dataclasses import replace
+from typing import List, Sequence, Union
+
+import numpy as np
+
+from .peca import FuroVertical, FuroHorizontal
+
+Furo = Union[FuroVertical, FuroHorizontal]
+
+
+def _numero(valor) -> float:
+    """float(valor), ou NaN se não for numérico"""
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def matriz_rotacao(angulo: int, largura: float, comprimento: float) -> np.ndarray:
+    """
+    Matriz afim 2x3 da rotação horária da peça (origem no canto superior esquerdo).
+    largura/comprimento são as dimensões ANTES da rotação.
+    """
+    if angulo == 90:
+        return np.array([[0.0, -1.0, comprimento], [1.0, 0.0, 0.0]])
+    if angulo == 180:
+        return np.array([[-1.0, 0.0, largura], [0.0, -1.0, comprimento]])
+    if angulo == 270:
+        return np.array([[0.0, 1.0, 0.0], [-1.0, 0.0, largura]])
+    return np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+
+
+def matriz_espelho_vertical(comprimento: float) -> np.ndarray:
+    """Matriz afim 2x3 do espelhamento de cima para baixo (Y -> comprimento - Y)"""
+    return np.array([[1.0, 0.0, 0.0], [0.0, -1.0, comprimento]])
+
+
+class ConjuntoFuros:
+    """
+    Furos de um mesmo tipo guardados em arrays paralelos.
+
+    - x, y, z, diametro, profundidade: float64
+    - lado: código inteiro (índice em self.lados)
+    - fixo: furos que não se movem com a transformação (X textual "x",
+      coordenadas não numéricas) - mantidos exatamente como vieram
+    """
+
+    def __init__(self, furos: Sequence[Furo]):
+        self.furos = list(furos)
+        n = len(self.furos)
+
+        self.x = np.zeros(n)
+        self.y = np.zeros(n)
+        self.z = np.zeros(n)
+        self.diametro = np.zeros(n)
+        self.profundidade = np.zeros(n)
+        self.fixo = np.zeros(n, dtype=bool)
+
+        # Lados como códigos inteiros
+        codigos = {}
+        self.lado = np.array([codigos.setdefault(f.lado, len(codigos)) for f in self.furos], dtype=int)
+        self.lados = list(codigos)
+
+        for i, furo in enumerate(self.furos):
+            try:
+                if isinstance(furo, FuroHorizontal) and isinstance(furo.x, str):
+                    raise ValueError(furo.x)
+                self.x[i] = float(furo.x)
+                self.y[i] = float(furo.y)
+            except (TypeError, ValueError):
+                self.fixo[i] = True
+            self.z[i] = _numero(getattr(furo, 'z', 0))
+            self.diametro[i] = _numero(furo.diametro)
+            self.profundidade[i] = _numero(furo.profundidade)
+
+    def __len__(self) -> int:
+        return len(self.furos)
+
+    @staticmethod
+    def transformar_pontos(matriz: np.ndarray, x: np.ndarray, y: np.ndarray):
+        """Aplica a matriz afim 2x3 a arrays de pontos; retorna (x, y) novos"""
+        return (matriz[0, 0] * x + matriz[0, 1] * y + matriz[0, 2],
+                matriz[1, 0] * x + matriz[1, 1] * y + matriz[1, 2])
+
+    def transformar(self, matriz: np.ndarray):
+        """Posições transformadas pela matriz afim 2x3 (fixos não se movem)"""
+        x, y = self.transformar_pontos(matriz, self.x, self.y)
+        return np.where(self.fixo, self.x, x), np.where(self.fixo, self.y, y)
+
+    def furos_transformados(self, matriz: np.ndarray) -> List[Furo]:
+        """Furos com as posições transformadas (fixos são os mesmos objetos)"""
+        x, y = self.transformar(matriz)
+        return [
+            furo if fixo else replace(furo, x=xi, y=yi)
+            for furo, fixo, xi, yi in zip(self.furos, self.fixo.tolist(), x.tolist(), y.tolist())
+        ]
@@ -2,8 +2,10 @@
 Modelos de dados para peças e furações
 """
 
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field, replace
+from typing import Iterator, List, Optional, Union
+
+from ..core.cache import hash_conteudo
 
 
 @dataclass
@@ -35,6 +37,36 @@ class FuroHorizontal:
     lado: str  # XP, XM, YP, YM
 
 
+@dataclass
+class PadraoFuros:
+    """
+    Série de furos iguais (bloco AN/AB/WI do MPR), expandida só sob demanda.
+    O furo base guarda a origem e as propriedades comuns da série.
+    """
+    furo: Union[FuroVertical, FuroHorizontal]
+    quantidade: int  # AN
+    passo: float  # AB (distância entre furos)
+    angulo: float = 0  # WI: 0 = ao longo de X, 90 = ao longo de Y
+    posicao: int = 0  # índice na lista de furos avulsos onde a série entra
+
+    @property
+    def vertical(self) -> bool:
+        return isinstance(self.furo, FuroVertical)
+
+    def __len__(self) -> int:
+        return self.quantidade
+
+    def __iter__(self):
+        base = self.furo
+        for n in range(self.quantidade):
+            if self.angulo == 90:
+                yield replace(base, y=base.y + (n * self.passo))
+            elif base.x == 'x':
+                yield replace(base)  # lado oposto: X fixo
+            else:
+                yield replace(base, x=base.x + (n * self.passo))
+
+
 @dataclass
 class Peca:
     """Representação completa de uma peça"""
@@ -42,4 +74,108 @@ class Peca:
     dimensoes: Dimensoes
     furos_verticais: List[FuroVertical]
     furos_horizontais: List[FuroHorizontal]
-    comentarios: List[str]
\ No newline at end of file
+    comentarios: List[str]
+    padroes: List[PadraoFuros] = field(default_factory=list)  # séries não expandidas
+
+    def _iter_furos(self, avulsos: list, vertical: bool) -> Iterator:
+        """Furos avulsos com as séries expandidas na posição original"""
+        series = [p for p in self.padroes if p.vertical == vertical]
+        k = 0
+        for i, furo in enumerate(avulsos):
+            while k < len(series) and series[k].posicao <= i:
+                yield from series[k]
+                k += 1
+            yield furo
+        for serie in series[k:]:
+            yield from serie
+
+    def iter_furos_verticais(self) -> Iterator[FuroVertical]:
+        """Todos os furos verticais, incluindo os das séries"""
+        return self._iter_furos(self.furos_verticais, vertical=True)
+
+    def iter_furos_horizontais(self) -> Iterator[FuroHorizontal]:
+        """Todos os furos horizontais, incluindo os das séries"""
+        return self._iter_furos(self.furos_horizontais, vertical=False)
+
+    def hash_conteudo(self) -> str:
+        """
+        Chave canônica do conteúdo (dimensões, furos, séries e comentários,
+        floats exatos). O nome fica de fora: mesma furação => mesma chave.
+        """
+        return hash_conteudo(self.dimensoes, self.furos_verticais, self.furos_horizontais,
+                             self.padroes, self.comentarios, exato=True)
+
+    def expandir_padroes(self) -> 'Peca':
+        """Peça com as séries convertidas em furos individuais (self se não houver séries)"""
+        if not self.padroes:
+            return self
+        return replace(
+            self,
+            furos_verticais=list(self.iter_furos_verticais()),
+            furos_horizontais=list(self.iter_furos_horizontais()),
+            padroes=[]
+        )
+
+
+# Lados de furo horizontal (furos do editor com esses lados não são verticais)
+LADOS_HORIZONTAIS = ['XP', 'XM', 'YP', 'YM']
+
+
+def montar_peca_editor(nome: str, comprimento: float, largura: float, espessura: float,
+                       furos_vert: list, furos_horiz: list) -> Peca:
+    """
+    Converte o estado do editor (furos como dicts) para Peca.
+    No editor comprimento/largura vêm trocados em relação à Peca do PDF.
+    """
+    dimensoes = Dimensoes(
+        largura=comprimento,
+        comprimento=largura,
+        espessura=espessura
+    )
+    
+    furos_verticais_obj = []
+    furos_horizontais_obj = []
+    
+    # Processar furos verticais (não verificar 'tipo', assumir que são verticais)
+    for furo in furos_vert:
+        # Pular se tiver campo 'lado' de horizontal (XP, XM, YP, YM)
+        lado = furo.get('lado', 'LS')
+        if lado in LADOS_HORIZONTAIS:
+            continue
+            
+        furos_verticais_obj.append(
+            FuroVertical(
+                x=furo['x'],
+                y=furo['y'],
+                diametro=furo['diametro'],
+                profundidade=furo.get('profundidade', 0),
+                lado=lado
+            )
+        )
+    
+    # Processar furos horizontais
+    for furo in furos_horiz:
+        x_val = furo.get('x', 0)
+        if x_val == 'x':
+            x_val = 'x'
+        else:
+            x_val = float(x_val) if x_val else 0
+        
+        furos_horizontais_obj.append(
+            FuroHorizontal(
+                x=x_val,
+                y=furo['y'],
+                z=furo.get('z', 7.5),
+                diametro=furo['diametro'],
+                profundidade=furo.get('profundidade', 0),
+                lado=furo.get('lado', 'XP')
+            )
+        )
+    
+    return Peca(
+        nome=nome,
+        dimensoes=dimensoes,
+        furos_verticais=furos_verticais_obj,
+        furos_horizontais=furos_horizontais_obj,
+        comentarios=[]
+    )
@@ -26,4 +26,49 @@ class PecaDB(Base):
     observacoes = Column(Text)
     
     # Relacionamento
-    produto = relationship("Produto", back_populates="pecas")
\ No newline at end of file
+    produto = relationship("Produto", back_populates="pecas")
+
+
+def peca_db_para_pdf(peca_db: PecaDB, produto=None, responsavel: str = None):
+    """
+    Peça salva no banco -> (Peca, dados_adicionais) para o GeradorDesenhoTecnico
+    (comprimento/largura do banco viram largura/comprimento do desenho, como no editor)
+    """
+    from app.models.peca import montar_peca_editor
+    
+    furos_data = peca_db.furos or {}
+    peca_obj = montar_peca_editor(
+        peca_db.nome,
+        float(peca_db.comprimento or 0),
+        float(peca_db.largura or 0),
+        float(peca_db.espessura or 15),
+        furos_data.get('verticais', []),
+        furos_data.get('horizontais', [])
+    )
+    
+    # Buscar transformação e bordas
+    transformacao = peca_db.transformacao or {}
+    bordas = peca_db.bordas or {}
+    
+    # Mapear bordas
+    bordas_pdf = {
+        'top': bordas.get('topo') if bordas.get('topo') != 'nenhum' else None,
+        'bottom': bordas.get('baixo') if bordas.get('baixo') != 'nenhum' else None,
+        'left': bordas.get('esquerda') if bordas.get('esquerda') != 'nenhum' else None,
+        'right': bordas.get('direita') if bordas.get('direita') != 'nenhum' else None
+    }
+    
+    dados_adicionais = {
+        'angulo_rotacao': transformacao.get('rotacao', 0),
+        'espelhar_peca': transformacao.get('espelhado', False),
+        'bordas': bordas_pdf,
+        'alerta': None,
+        'revisao': '00',
+        'status': 'CÓPIA CONTROLADA',
+        'codigo_peca': peca_db.codigo,
+        'nome_peca': peca_db.nome,
+        'codigo_produto': produto.codigo if produto else None,
+        'nome_produto': produto.nome if produto else None,
+        'responsavel': responsavel
+    }
+    return peca_obj, dados_adicionais
@@ -0,0 +1,243 @@
+"""
+Leitor de planilhas do CargaMaquina (lista de peças por produto)
+
+Lê CSV e XLSX em lotes de linhas sem carregar o arquivo inteiro:
+- CSV: encoding e delimitador detectados num prefixo do arquivo, depois o
+  leitor csv da biblioteca padrão (em C) percorre o resto uma única vez
+- XLSX: openpyxl em modo somente leitura (linha a linha)
+- XLS antigo: xlrd via pandas (o formato não permite leitura parcial)
+
+A última linha não vazia é o rodapé do relatório ("MECO114.GER - ...") e é
+descartada, como sempre foi.
+"""
+
+import codecs
+import csv
+import io
+import math
+import re
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Generator, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+COLUNAS_NECESSARIAS = ('Peça', 'Material', 'C', 'L', 'Cod. Peça', 'Família')
+
+TAMANHO_PREFIXO = 64 * 1024
+TAMANHO_LOTE = 500
+DELIMITADORES = ',;\t|'
+
+# O CargaMaquina exporta medidas com 5 casas ("2248,00000"). Quando a
+# planilha é salva de novo num Excel em inglês a vírgula vira separador de
+# milhar e sai "224,800,000": os dígitos são o valor original x 10^5.
+CASAS_DECIMAIS_CARGA = 5
+_MILHARES_DANIFICADOS = re.compile(r'-?\d{1,3}(?:([.,])\d{3})(?:\1\d{3})+')
+
+
+class PlanilhaInvalida(ValueError):
+    """Arquivo ilegível, sem as colunas esperadas ou com linha inválida"""
+
+
+@dataclass
+class LinhaPeca:
+    """Uma peça da planilha, já convertida"""
+    linha: int
+    codigo: str
+    nome: str
+    material: str
+    comprimento: float
+    largura: float
+    espessura: float
+    familia: Optional[str]
+    grupo: Optional[str] = None  # valor da coluna de agrupamento (importação de vários produtos)
+
+
+def extrair_espessura(material: str) -> float:
+    """Extrai espessura do código do material (ex: MDF15 -> 15)"""
+    match = re.search(r'(\d+)', material)
+    return float(match.group(1)) if match else 15.0
+
+
+def converter_numero(valor) -> float:
+    """Número da planilha: 782 / "782,00000" / "1.170,5" / "224,800,000" (ver acima)"""
+    if valor is None or isinstance(valor, bool):
+        return 0
+    if isinstance(valor, (int, float)):
+        return 0 if math.isnan(valor) else float(valor)
+    texto = str(valor).strip()
+    if not texto:
+        return 0
+    if _MILHARES_DANIFICADOS.fullmatch(texto):
+        return int(re.sub(r'[.,]', '', texto)) / 10 ** CASAS_DECIMAIS_CARGA
+    if ',' in texto and '.' in texto:
+        # O separador que aparece por último é o decimal
+        milhar = '.' if texto.rfind(',') > texto.rfind('.') else ','
+        texto = texto.replace(milhar, '')
+    return float(texto.replace(',', '.'))
+
+
+def _texto(valor) -> str:
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return ''
+    return str(valor).strip()
+
+
+def converter_codigo(valor) -> str:
+    """Cod. Peça vem como texto ("510524001"), inteiro ou float do Excel (510524001.0)"""
+    texto = _texto(valor)
+    if not texto:
+        raise ValueError("Cod. Peça vazio")
+    return str(int(float(texto.replace(',', '.'))))
+
+
+# ----------------------------------------------------------------------
+# Detecção de formato
+# ----------------------------------------------------------------------
+def detectar_encoding(prefixo: bytes) -> str:
+    """utf-8 (com ou sem BOM) se o prefixo decodificar; senão cp1252 (Excel no Windows)"""
+    if prefixo.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # final=False: um caractere multibyte cortado no fim do prefixo não é erro
+        codecs.getincrementaldecoder('utf-8')().decode(prefixo, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def detectar_delimitador(amostra: str) -> str:
+    """Delimitador pelas primeiras linhas; cabeçalho decide se o Sniffer falhar"""
+    linhas = amostra.splitlines()
+    trecho = '\n'.join(linhas[:20])
+    try:
+        return csv.Sniffer().sniff(trecho, delimiters=DELIMITADORES).delimiter
+    except csv.Error:
+        cabecalho = linhas[0] if linhas else ''
+        return max(DELIMITADORES, key=cabecalho.count)
+
+
+def _eh_xlsx(prefixo: bytes) -> bool:
+    return prefixo.startswith(b'PK\x03\x04')
+
+
+# ----------------------------------------------------------------------
+# Leitura
+# ----------------------------------------------------------------------
+def _linhas_csv(arquivo: BinaryIO) -> Iterator[Sequence]:
+    prefixo = arquivo.read(TAMANHO_PREFIXO)
+    arquivo.seek(0)
+    encoding = detectar_encoding(prefixo)
+    amostra = prefixo.decode(encoding, errors='ignore')
+    texto = io.TextIOWrapper(arquivo, encoding=encoding, errors='replace', newline='')
+    try:
+        yield from csv.reader(texto, delimiter=detectar_delimitador(amostra))
+    finally:
+        if not texto.closed:
+            texto.detach()  # o arquivo do upload continua com quem o abriu
+
+
+def _linhas_xlsx(arquivo: BinaryIO) -> Iterator[Sequence]:
+    from openpyxl import load_workbook
+
+    try:
+        livro = load_workbook(arquivo, read_only=True, data_only=True)
+    except Exception as e:
+        raise PlanilhaInvalida(
+            "Arquivo Excel corrompido. Abra no Excel, salve como novo arquivo e tente novamente.") from e
+    try:
+        yield from livro.worksheets[0].iter_rows(values_only=True)
+    finally:
+        livro.close()
+
+
+def _linhas_xls(arquivo: BinaryIO) -> Iterator[Sequence]:
+    import pandas as pd
+
+    try:
+        df = pd.read_excel(arquivo, engine='xlrd', header=None, dtype=object)
+    except Exception as e:
+        raise PlanilhaInvalida(
+            "Arquivo Excel corrompido. Abra no Excel, salve como novo arquivo e tente novamente.") from e
+    yield from df.itertuples(index=False, name=None)
+
+
+def linhas_brutas(arquivo: BinaryIO, nome_arquivo: str) -> Generator[Sequence, None, None]:
+    """Linhas cruas (cabeçalho incluso) conforme o tipo do arquivo"""
+    if nome_arquivo.lower().endswith('.csv'):
+        return _linhas_csv(arquivo)
+    prefixo = arquivo.read(4)
+    arquivo.seek(0)
+    # .xls que na verdade é xlsx (renomeado) também vai pelo openpyxl
+    return _linhas_xlsx(arquivo) if _eh_xlsx(prefixo) else _linhas_xls(arquivo)
+
+
+def _sem_rodape(linhas: Iterable[Sequence]) -> Iterator[Tuple[int, Sequence]]:
+    """(número da linha, valores) sem as vazias e sem a última (rodapé)"""
+    anterior = None
+    for numero, valores in enumerate(linhas, start=2):
+        if not any(_texto(v) for v in valores):
+            continue
+        if anterior is not None:
+            yield anterior
+        anterior = (numero, valores)
+
+
+def _indices(cabecalho: Sequence, colunas: Sequence[str]) -> Dict[str, int]:
+    """Coluna -> índice da primeira ocorrência (C e L aparecem duas vezes)"""
+    nomes = [_texto(c) for c in cabecalho]
+    faltando = [c for c in colunas if c not in nomes]
+    if faltando:
+        raise PlanilhaInvalida(f"Colunas faltando no arquivo: {', '.join(faltando)}")
+    return {c: nomes.index(c) for c in colunas}
+
+
+def ler_pecas(arquivo: BinaryIO, nome_arquivo: str, tamanho_lote: int = TAMANHO_LOTE,
+              coluna_grupo: Optional[str] = None) -> Iterator[List[LinhaPeca]]:
+    """
+    Peças da planilha em lotes de até `tamanho_lote`, numa única passada
+
+    Com `coluna_grupo` (ex.: 'Família') a coluna passa a ser obrigatória e o
+    valor de cada linha vai em LinhaPeca.grupo (vazio é linha inválida).
+
+    Raises:
+        PlanilhaInvalida: arquivo ilegível, colunas faltando ou linha inválida
+    """
+    linhas = linhas_brutas(arquivo, nome_arquivo)
+    try:
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            raise PlanilhaInvalida("Arquivo vazio")
+        colunas = COLUNAS_NECESSARIAS
+        if coluna_grupo and coluna_grupo not in colunas:
+            colunas += (coluna_grupo,)
+        indice = _indices(cabecalho, colunas)
+
+        def valor(valores: Sequence, coluna: str):
+            i = indice[coluna]
+            return valores[i] if i < len(valores) else None
+
+        lote = []
+        for numero, valores in _sem_rodape(linhas):
+            try:
+                material = _texto(valor(valores, 'Material'))
+                lote.append(LinhaPeca(
+                    linha=numero,
+                    codigo=converter_codigo(valor(valores, 'Cod. Peça')),
+                    nome=_texto(valor(valores, 'Peça')),
+                    material=material,
+                    comprimento=converter_numero(valor(valores, 'C')),
+                    largura=converter_numero(valor(valores, 'L')),
+                    espessura=extrair_espessura(material),
+                    familia=_texto(valor(valores, 'Família')) or None,
+                    grupo=(_texto(valor(valores, coluna_grupo)) or None) if coluna_grupo else None,
+                ))
+                if coluna_grupo and not lote[-1].grupo:
+                    raise ValueError(f"{coluna_grupo} vazio")
+            except ValueError as e:
+                raise PlanilhaInvalida(f"Linha {numero}: {e}") from e
+            if len(lote) >= tamanho_lote:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+    finally:
+        # Fecha o leitor mesmo se parar no meio (erro de coluna/linha)
+        linhas.close()
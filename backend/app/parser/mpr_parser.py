@@ -3,9 +3,16 @@ Parser para arquivos de furação HOMAG/TopSolid
 Extrai informações de dimensões e furações
 """
 
+import hashlib
 import re
-from typing import Optional
-from ..models.peca import Peca, Dimensoes, FuroVertical, FuroHorizontal
+from dataclasses import replace
+from typing import Optional, Union
+from ..core.cache import CacheLRU
+from ..models.peca import Peca, Dimensoes, FuroVertical, FuroHorizontal, PadraoFuros
+from .mpr_tokenizer import tokenizar_mpr, TIPO_CABECALHO
+
+# Peças já lidas, pelo SHA-1 do conteúdo do arquivo
+cache_parse = CacheLRU(max_itens=256)
 
 
 def extrair_valor(linha: str, chave: str) -> Optional[str]:
@@ -15,146 +22,127 @@ def extrair_valor(linha: str, chave: str) -> Optional[str]:
     return match.group(1) if match else None
 
 
-def parse_furacao(conteudo: str, nome_peca: str = "Peça") -> Peca:
+def parse_furacao(conteudo: Union[str, bytes], nome_peca: str = "Peça",
+                  expandir_padroes: bool = True) -> Peca:
     """
-    Parse do arquivo de furação
+    Parse do arquivo de furação (sobre o tokenizador de MPR)
     
     Args:
-        conteudo: Conteúdo do arquivo MPR
+        conteudo: Conteúdo do arquivo MPR (texto, ou os bytes do arquivo em cp1252)
         nome_peca: Nome da peça
+        expandir_padroes: Se False, blocos com AN > 1 ficam em peca.padroes
+            (expandidos só via iter_furos_* / expandir_padroes())
         
     Returns:
         Objeto Peca com todas as informações
+
+    O resultado fica em cache pelo hash do conteúdo: reler o mesmo arquivo
+    (com qualquer nome) não refaz o parse. Os furos são compartilhados entre
+    as chamadas (as listas não), então trate-os como somente leitura.
     """
-    linhas = conteudo.split('\n')
-    
-    # Extrair dimensões
-    dimensoes = None
-    largura = 0
-    comprimento = 0
-    espessura = 0
+    if isinstance(conteudo, (bytes, bytearray)):
+        chave = ('bytes', hashlib.sha1(conteudo).hexdigest(), expandir_padroes)
+        peca = cache_parse.obter_ou_criar(
+            chave, lambda: _parse_furacao(bytes(conteudo).decode('cp1252', errors='replace'), expandir_padroes))
+    else:
+        chave = ('str', hashlib.sha1(conteudo.encode('utf-8', errors='surrogatepass')).hexdigest(), expandir_padroes)
+        peca = cache_parse.obter_ou_criar(chave, lambda: _parse_furacao(conteudo, expandir_padroes))
 
-    for linha in linhas:
-        if '_BSX=' in linha:
-            comprimento = float(linha.split('=')[1])  # X = comprimento
-        elif '_BSY=' in linha:
-            largura = float(linha.split('=')[1])      # Y = largura
-        elif '_BSZ=' in linha:
-            espessura = float(linha.split('=')[1])    # Z = espessura
-            dimensoes = Dimensoes(largura=largura, comprimento=comprimento, espessura=espessura)
-            break
-    
-    # Extrair furos
+    return replace(
+        peca,
+        nome=nome_peca,
+        furos_verticais=list(peca.furos_verticais),
+        furos_horizontais=list(peca.furos_horizontais),
+        comentarios=list(peca.comentarios),
+        padroes=list(peca.padroes)
+    )
+
+
+def _parse_furacao(conteudo: str, expandir_padroes: bool) -> Peca:
+    """Parse sem cache (o nome é aplicado por parse_furacao)"""
+    dimensoes = None
     furos_verticais = []
     furos_horizontais = []
     comentarios = []
+    padroes = []
     
-    i = 0
-    while i < len(linhas):
-        linha = linhas[i]
+    for secao in tokenizar_mpr(conteudo):
+        # Dimensões vêm do cabeçalho [H
+        if secao.tipo == TIPO_CABECALHO:
+            if dimensoes is None and '_BSZ' in secao.campos:
+                dimensoes = Dimensoes(
+                    largura=float(secao.get('_BSY', 0)),          # Y = largura
+                    comprimento=float(secao.get('_BSX', 0)),      # X = comprimento
+                    espessura=float(secao.get('_BSZ'))            # Z = espessura
+                )
         
-        # Furo Vertical
-        if '<102 \\BohrVert\\' in linha:
-            furo_data = {}
-            j = i
-            while j < len(linhas) and not (linhas[j].startswith('<') and j != i):
-                if '="' in linhas[j]:
-                    partes = linhas[j].split('=')
-                    if len(partes) >= 2:
-                        chave = partes[0].strip()
-                        valor = partes[1].strip().strip('"')
-                        furo_data[chave] = valor
-                j += 1
+        elif secao.nome in ('BohrVert', 'BohrHoriz'):
+            if secao.nome == 'BohrVert':
+                serie, destino = _serie_vertical(secao.campos), furos_verticais
+            else:
+                serie, destino = _serie_horizontal(secao.campos), furos_horizontais
             
-            if 'XA' in furo_data and 'YA' in furo_data:
-                x_base = float(furo_data.get('XA', 0))
-                y_base = float(furo_data.get('YA', 0))
-                diametro = float(furo_data.get('DU', 0))
-                profundidade = float(furo_data.get('TI', 0))
-                lado = furo_data.get('BM', 'LS')
-                
-                quantidade = int(furo_data.get('AN', 1))
-                distancia = float(furo_data.get('AB', 0))
-                angulo = float(furo_data.get('WI', 0))
-                
-                for n in range(quantidade):
-                    if angulo == 90:
-                        x_atual = x_base
-                        y_atual = y_base + (n * distancia)
-                    else:
-                        x_atual = x_base + (n * distancia)
-                        y_atual = y_base
-                    
-                    furo = FuroVertical(
-                        x=x_atual,
-                        y=y_atual,
-                        diametro=diametro,
-                        profundidade=profundidade,
-                        lado=lado
-                    )
-                    furos_verticais.append(furo)
-                    
-            i = j - 1
-        
-        # Furo Horizontal
-        elif '<103 \\BohrHoriz\\' in linha:
-            furo_data = {}
-            j = i
-            while j < len(linhas) and not (linhas[j].startswith('<') and j != i):
-                if '="' in linhas[j]:
-                    partes = linhas[j].split('=')
-                    if len(partes) >= 2:
-                        chave = partes[0].strip()
-                        valor = partes[1].strip().strip('"')
-                        furo_data[chave] = valor
-                j += 1
-            
-            if 'XA' in furo_data and 'YA' in furo_data:
-                # Tratar X (pode ser 'x' = comprimento)
-                x_base_val = furo_data.get('XA', '0')
-                if x_base_val == 'x':
-                    x_base = 'x'
-                else:
-                    x_base = float(x_base_val)
-                
-                y_base = float(furo_data.get('YA', 0))  # ← SEM inversão
-                
-                z_base = float(furo_data.get('ZA', 0))
-                diametro = float(furo_data.get('DU', 0))
-                profundidade = float(furo_data.get('TI', 0))
-                lado = furo_data.get('BM', 'XP')
-                
-                quantidade = int(furo_data.get('AN', 1))
-                distancia = float(furo_data.get('AB', 0))
-                angulo = float(furo_data.get('WI', 0))  # padrão 0, não 90
-                
-                for n in range(quantidade):
-                    if isinstance(x_base, str) and x_base == 'x':
-                        x_atual = 'x'
-                        y_atual = y_base + (n * distancia) if angulo == 90 else y_base  # ← Somando
-                    elif angulo == 90:
-                        x_atual = x_base if isinstance(x_base, float) else float(x_base)
-                        y_atual = y_base + (n * distancia)  # ← Somando
-                    else:
-                        x_atual = x_base + (n * distancia) if isinstance(x_base, (int, float)) else x_base
-                        y_atual = y_base
-                    
-                    furo = FuroHorizontal(
-                        x=x_atual,
-                        y=y_atual,
-                        z=z_base,
-                        diametro=diametro,
-                        profundidade=profundidade,
-                        lado=lado
-                    )
-                    furos_horizontais.append(furo)
-                    
-            i = j - 1
+            if serie is None:
+                continue
+            if expandir_padroes or serie.quantidade <= 1:
+                destino.extend(serie)
+            else:
+                serie.posicao = len(destino)
+                padroes.append(serie)
     
     return Peca(
-        nome=nome_peca,
+        nome="",
         dimensoes=dimensoes,
         furos_verticais=furos_verticais,
         furos_horizontais=furos_horizontais,
-        comentarios=comentarios
-    )
\ No newline at end of file
+        comentarios=comentarios,
+        padroes=padroes
+    )
+
+
+def _serie_vertical(furo_data: dict) -> Optional[PadraoFuros]:
+    """Bloco <102 \\BohrVert\\ como série (AN furos a cada AB mm, WI=90 ao longo de Y)"""
+    if 'XA' not in furo_data or 'YA' not in furo_data:
+        return None
+    
+    furo = FuroVertical(
+        x=float(furo_data.get('XA', 0)),
+        y=float(furo_data.get('YA', 0)),
+        diametro=float(furo_data.get('DU', 0)),
+        profundidade=float(furo_data.get('TI', 0)),
+        lado=furo_data.get('BM', 'LS')
+    )
+    return PadraoFuros(
+        furo=furo,
+        quantidade=int(furo_data.get('AN', 1)),
+        passo=float(furo_data.get('AB', 0)),
+        angulo=float(furo_data.get('WI', 0))
+    )
+
+
+def _serie_horizontal(furo_data: dict) -> Optional[PadraoFuros]:
+    """Bloco <103 \\BohrHoriz\\ como série (XA="x" = lado oposto do comprimento)"""
+    if 'XA' not in furo_data or 'YA' not in furo_data:
+        return None
+    
+    # Tratar X (pode ser 'x' = comprimento)
+    x_base_val = furo_data.get('XA', '0')
+    if x_base_val == 'x':
+        x_base = 'x'
+    else:
+        x_base = float(x_base_val)
+    
+    furo = FuroHorizontal(
+        x=x_base,
+        y=float(furo_data.get('YA', 0)),  # ← SEM inversão
+        z=float(furo_data.get('ZA', 0)),
+        diametro=float(furo_data.get('DU', 0)),
+        profundidade=float(furo_data.get('TI', 0)),
+        lado=furo_data.get('BM', 'XP')
+    )
+    return PadraoFuros(
+        furo=furo,
+        quantidade=int(furo_data.get('AN', 1)),
+        passo=float(furo_data.get('AB', 0)),
+        angulo=float(furo_data.get('WI', 0))  # padrão 0, não 90
+    )
@@ -0,0 +1,86 @@
+"""
+Tokenizador de arquivos MPR (HOMAG/woodWOP)
+Lê o arquivo numa única passada e entrega as seções já com chave/valor:
+- [H    -> cabeçalho (VERSION, _BSX, _BSY, _BSZ, ...)
+- [001  -> variáveis (x, y, z, ...)
+- <NNN \\Nome\\ -> blocos de operação (<102 \\BohrVert\\, <103 \\BohrHoriz\\, ...)
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Início de seção ([H, [001, <102 \\BohrVert\\) ou marcador de fim ("!")
+_RE_SECAO = re.compile(
+    r'^[ \t]*(?:\[(?P<secao>\w+)|<(?P<codigo>\d+)[ \t]*\\(?P<nome>[^\\\r\n]*)\\|(?P<fim>!))',
+    re.M
+)
+
+# CHAVE="valor" ou CHAVE=valor (só o primeiro '=' separa; aspas removidas)
+_RE_ITEM = re.compile(r'^[ \t]*([^=\[<!\s][^=\s]*)[ \t]*=[ \t]*"?([^"\r\n]*)', re.M)
+
+TIPO_CABECALHO = 'cabecalho'
+TIPO_VARIAVEIS = 'variaveis'
+TIPO_OPERACAO = 'operacao'
+
+
+@dataclass
+class SecaoMPR:
+    """
+    Uma seção do MPR. Os pares chave/valor só são extraídos do corpo
+    quando acessados (seções que ninguém lê não custam nada).
+    """
+    tipo: str                 # cabecalho, variaveis ou operacao
+    codigo: str               # 'H', '001', '102', ...
+    nome: str = ''            # nome da operação ('BohrVert'); vazio nas seções [
+    linha: int = 0            # linha (1-based) onde a seção começa
+    corpo: str = field(default='', repr=False)
+
+    @cached_property
+    def itens(self) -> List[Tuple[str, str]]:
+        """Pares (chave, valor) na ordem do arquivo, incluindo chaves repetidas"""
+        return _RE_ITEM.findall(self.corpo)
+
+    @cached_property
+    def campos(self) -> Dict[str, str]:
+        """Chave -> valor (em chaves repetidas vale a última ocorrência)"""
+        return dict(self.itens)
+
+    def get(self, chave: str, padrao: Optional[str] = None) -> Optional[str]:
+        """Valor da última ocorrência da chave"""
+        return self.campos.get(chave, padrao)
+
+    def todos(self, chave: str) -> List[str]:
+        """Todos os valores de uma chave repetida (ex: KM, VA)"""
+        return [v for k, v in self.itens if k == chave]
+
+
+def tokenizar_mpr(conteudo: str) -> Iterator[SecaoMPR]:
+    """
+    Percorre o conteúdo do MPR e gera as seções na ordem do arquivo.
+
+    Linhas de CHAVE=valor antes da primeira seção são ignoradas,
+    assim como tudo depois do marcador de fim ("!").
+    """
+    inicios = _RE_SECAO.finditer(conteudo)
+    atual = next(inicios, None)
+    numero_linha = 1
+    posicao = 0
+
+    while atual is not None and atual.group('fim') is None:
+        proximo = next(inicios, None)
+        fim_corpo = proximo.start() if proximo is not None else len(conteudo)
+
+        numero_linha += conteudo.count('\n', posicao, atual.start())
+        posicao = atual.start()
+
+        codigo = atual.group('secao')
+        corpo = conteudo[atual.end():fim_corpo]
+        if codigo is not None:
+            yield SecaoMPR(tipo=TIPO_CABECALHO if codigo == 'H' else TIPO_VARIAVEIS,
+                           codigo=codigo, linha=numero_linha, corpo=corpo)
+        else:
+            yield SecaoMPR(tipo=TIPO_OPERACAO, codigo=atual.group('codigo'),
+                           nome=atual.group('nome').strip(), linha=numero_linha, corpo=corpo)
+        atual = proximo
@@ -11,6 +11,15 @@ from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 import io
+import logging
+
+from ..core.spatial_index import IndiceEspacial
+
+logger = logging.getLogger(__name__)
+
+TOL_DUPLICADO = 1.0          # Distância (mm) abaixo da qual dois cilindros são o mesmo furo
+TOL_COORD_FIXA = 2.0         # Tolerância da coordenada fixa ao casar fundo com furo horizontal
+MAX_PROF_HORIZONTAL = 35.0   # Profundidade máxima de furo horizontal
 
 
 @dataclass
@@ -451,15 +460,13 @@ class StepMultiPartParser:
                 
                 return mpr_comprimento, mpr_largura, mpr_espessura
             
-            # Primeiro passo: identificar furos horizontais e seus fundos
-            furos_horizontais_coords = set()
-            furos_horizontais_info = []  # Lista com info completa para calcular fundos
+            # Primeiro passo: indexar entradas de furos horizontais
+            # (categoria = lado + raio, ponto = coordenada fixa ao longo da borda)
+            furos_horizontais = IndiceEspacial(TOL_COORD_FIXA)
 
             for cil in cilindros:
                 mpr_x, mpr_y, mpr_z = get_mpr_coords(cil)
                 raio_round = round(cil['raio'], 2)
-                x_round = round(mpr_x, 0)
-                y_round = round(mpr_y, 0)
                 
                 # Verificar se Z está no meio (indicando furo horizontal)
                 if abs(mpr_z - (esp_dim / 2)) > 3.0:
@@ -467,63 +474,52 @@ class StepMultiPartParser:
                 
                 # Se está na borda Y (YP ou YM)
                 if mpr_y <= 2.0:
-                    furos_horizontais_coords.add((x_round, raio_round, 'YP'))
-                    furos_horizontais_info.append({'eixo': 'Y', 'lado': 'YP', 'coord_fixa': x_round, 'raio': raio_round, 'borda': 0})
+                    furos_horizontais.inserir((mpr_x,), cil, ('YP', raio_round))
                 elif mpr_y >= (larg_dim - 2.0):
-                    furos_horizontais_coords.add((x_round, raio_round, 'YM'))
-                    furos_horizontais_info.append({'eixo': 'Y', 'lado': 'YM', 'coord_fixa': x_round, 'raio': raio_round, 'borda': larg_dim})
+                    furos_horizontais.inserir((mpr_x,), cil, ('YM', raio_round))
                 
                 # Se está na borda X (XP ou XM)
                 if mpr_x <= 2.0:
-                    furos_horizontais_coords.add((y_round, raio_round, 'XP'))
-                    furos_horizontais_info.append({'eixo': 'X', 'lado': 'XP', 'coord_fixa': y_round, 'raio': raio_round, 'borda': 0})
+                    furos_horizontais.inserir((mpr_y,), cil, ('XP', raio_round))
                 elif mpr_x >= (comp_dim - 2.0):
-                    furos_horizontais_coords.add((y_round, raio_round, 'XM'))
-                    furos_horizontais_info.append({'eixo': 'X', 'lado': 'XM', 'coord_fixa': y_round, 'raio': raio_round, 'borda': comp_dim})
+                    furos_horizontais.inserir((mpr_y,), cil, ('XM', raio_round))
 
             # Função para verificar se um cilindro é fundo de furo horizontal
             def is_fundo_furo_horizontal(mpr_x, mpr_y, raio):
                 raio_round = round(raio, 2)
-                x_round = round(mpr_x, 0)
-                y_round = round(mpr_y, 0)
                 
-                tolerancia_coord = 2.0  # Tolerância para coordenada fixa
-                max_profundidade = 35.0  # Profundidade máxima de furo horizontal
+                # Só consulta os lados cuja profundidade alcança o cilindro
+                candidatos = []
+                if 0 < mpr_x <= MAX_PROF_HORIZONTAL:
+                    candidatos.append(('XP', mpr_y))
+                if comp_dim - MAX_PROF_HORIZONTAL <= mpr_x < comp_dim:
+                    candidatos.append(('XM', mpr_y))
+                if 0 < mpr_y <= MAX_PROF_HORIZONTAL:
+                    candidatos.append(('YP', mpr_x))
+                if larg_dim - MAX_PROF_HORIZONTAL <= mpr_y < larg_dim:
+                    candidatos.append(('YM', mpr_x))
                 
-                for info in furos_horizontais_info:
-                    if round(info['raio'], 2) != raio_round:
-                        continue
-                    
-                    if info['eixo'] == 'X':
-                        # Furo entra por X, coord_fixa é Y
-                        if abs(y_round - info['coord_fixa']) > tolerancia_coord:
-                            continue
-                        # Verificar se X está dentro da profundidade do furo
-                        if info['lado'] == 'XP' and mpr_x > 0 and mpr_x <= max_profundidade:
-                            return True
-                        if info['lado'] == 'XM' and mpr_x < comp_dim and mpr_x >= (comp_dim - max_profundidade):
-                            return True
-                    
-                    elif info['eixo'] == 'Y':
-                        # Furo entra por Y, coord_fixa é X
-                        if abs(x_round - info['coord_fixa']) > tolerancia_coord:
-                            continue
-                        # Verificar se Y está dentro da profundidade do furo
-                        if info['lado'] == 'YP' and mpr_y > 0 and mpr_y <= max_profundidade:
-                            return True
-                        if info['lado'] == 'YM' and mpr_y < larg_dim and mpr_y >= (larg_dim - max_profundidade):
-                            return True
-                
-                return False
+                return any(
+                    furos_horizontais.existe((coord,), TOL_COORD_FIXA, (lado, raio_round))
+                    for lado, coord in candidatos
+                )
 
-            print(f"   🔍 Furos horizontais encontrados: {len(furos_horizontais_info)}")
+            logger.debug("   🔍 Furos horizontais encontrados: %d", len(furos_horizontais))
 
             # Segundo passo: filtrar e classificar cilindros
             cilindros_unicos = []
-            coords_vistas = set()
+            vistos = IndiceEspacial(TOL_DUPLICADO)
+
+            def registrar(ponto, categoria, cil, mpr, tipo_detectado):
+                """Adiciona o cilindro se não houver outro igual a até TOL_DUPLICADO"""
+                if vistos.existe(ponto, TOL_DUPLICADO, categoria):
+                    return
+                vistos.inserir(ponto, None, categoria)
+                cilindros_unicos.append({**cil, 'mpr': mpr, 'tipo_detectado': tipo_detectado})
 
             for cil in cilindros:
                 mpr_x, mpr_y, mpr_z = get_mpr_coords(cil)
+                mpr = (mpr_x, mpr_y, mpr_z)
                 
                 # Ignorar cilindros fora do bounding box
                 margem = 5.0
@@ -534,9 +530,6 @@ class StepMultiPartParser:
                 if mpr_y < -margem or mpr_y > larg_dim + margem:
                     continue
 
-                y_round = round(mpr_y, 0)
-                x_round = round(mpr_x, 0)
-                z_round = round(mpr_z, 0)
                 raio_round = round(cil['raio'], 2)
                 
                 tolerancia_borda = 2.0
@@ -547,37 +540,21 @@ class StepMultiPartParser:
                 
                 # Se está na borda X = é entrada de furo horizontal XP/XM
                 if mpr_x <= tolerancia_borda and z_no_meio:
-                    key = ('H', y_round, raio_round, 'XP')
-                    if key not in coords_vistas:
-                        coords_vistas.add(key)
-                        cilindros_unicos.append({**cil, 'mpr': (mpr_x, mpr_y, mpr_z), 'tipo_detectado': 'H_XP'})
+                    registrar((mpr_y,), ('H', raio_round, 'XP'), cil, mpr, 'H_XP')
                 elif mpr_x >= (comp_dim - tolerancia_borda) and z_no_meio:
-                    key = ('H', y_round, raio_round, 'XM')
-                    if key not in coords_vistas:
-                        coords_vistas.add(key)
-                        cilindros_unicos.append({**cil, 'mpr': (mpr_x, mpr_y, mpr_z), 'tipo_detectado': 'H_XM'})
+                    registrar((mpr_y,), ('H', raio_round, 'XM'), cil, mpr, 'H_XM')
                 # Se está na borda Y = é entrada de furo horizontal YP/YM
                 elif mpr_y <= tolerancia_borda and z_no_meio:
-                    key = ('H', x_round, raio_round, 'YP')
-                    if key not in coords_vistas:
-                        coords_vistas.add(key)
-                        cilindros_unicos.append({**cil, 'mpr': (mpr_x, mpr_y, mpr_z), 'tipo_detectado': 'H_YP'})
+                    registrar((mpr_x,), ('H', raio_round, 'YP'), cil, mpr, 'H_YP')
                 elif mpr_y >= (larg_dim - tolerancia_borda) and z_no_meio:
-                    key = ('H', x_round, raio_round, 'YM')
-                    if key not in coords_vistas:
-                        coords_vistas.add(key)
-                        cilindros_unicos.append({**cil, 'mpr': (mpr_x, mpr_y, mpr_z), 'tipo_detectado': 'H_YM'})
+                    registrar((mpr_x,), ('H', raio_round, 'YM'), cil, mpr, 'H_YM')
                 else:
                     # Verificar se é fundo de furo horizontal (ignorar)
                     if is_fundo_furo_horizontal(mpr_x, mpr_y, cil['raio']):
-                        #print(f"      ⏭️ Ignorando fundo de furo H: X={x_round}, Y={y_round}, Ø{round(cil['raio']*2, 2)}")
                         continue
                     
                     # Furo vertical
-                    key = ('V', x_round, y_round, raio_round)
-                    if key not in coords_vistas:
-                        coords_vistas.add(key)
-                        cilindros_unicos.append({**cil, 'mpr': (mpr_x, mpr_y, mpr_z), 'tipo_detectado': 'V'})
+                    registrar((mpr_x, mpr_y), ('V', raio_round), cil, mpr, 'V')
 
             furo_id = 1
             for cil in cilindros_unicos:
@@ -21,9 +21,16 @@ from OCC.Core.gp import gp_Pnt, gp_Dir
 from OCC.Core.BRepGProp import brepgprop
 from OCC.Core.GProp import GProp_GProps
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Tuple
+import logging
 import math
 
+import numpy as np
+
+from ..core.spatial_index import deduplicar
+
+logger = logging.getLogger(__name__)
+
 
 # ============================================================
 # CONFIGURAÇÕES - Ajuste conforme necessário
@@ -34,9 +41,16 @@ CONFIG = {
     'min_espessura': 1.0,      # Espessura mínima para não ser borda/fita
     'max_diametro_furo': 15.0, # Diâmetro máximo para considerar furo (acima = rebaixo)
     'min_diametro_furo': 2.0,  # Diâmetro mínimo para considerar furo
-    'debug': True,             # Ativar logs detalhados
+    'tol_duplicado': 1.0,      # Distância máxima (mm) entre furos considerados o mesmo
+    'debug': True,             # Ativar logs detalhados (nível DEBUG do logger)
 }
 
+# Índice de cada eixo nas colunas dos arrays de cilindros
+EIXOS = {'x': 0, 'y': 1, 'z': 2}
+
+# Códigos de lado usados na classificação vetorizada
+LADOS = ('LS', 'LSU', 'XM', 'XP', 'YM', 'YP')
+
 
 @dataclass
 class Furo:
@@ -97,10 +111,10 @@ class StepParserOCC:
         self.debug = debug if debug is not None else CONFIG['debug']
         self._cylinder_debug_info = []  # Para debug
         
-    def _log(self, msg: str):
-        """Log de debug"""
+    def _log(self, msg: str, *args):
+        """Log de debug (formatação só acontece se o nível DEBUG estiver ativo)"""
         if self.debug:
-            print(msg)
+            logger.debug(msg, *args)
     
     def load(self) -> bool:
         """Carrega o arquivo STEP"""
@@ -118,12 +132,12 @@ class StepParserOCC:
             os.unlink(temp_path)
         
         if status != 1:
-            print(f"❌ Erro ao ler arquivo STEP: status {status}")
+            logger.error("❌ Erro ao ler arquivo STEP: status %s", status)
             return False
         
         reader.TransferRoots()
         self.shape = reader.OneShape()
-        print(f"✅ STEP carregado com sucesso")
+        logger.info("✅ STEP carregado com sucesso")
         return True
     
     def _get_bounding_box(self, shape) -> Tuple[float, float, float, float, float, float]:
@@ -163,9 +177,15 @@ class StepParserOCC:
         
         return (dims_sorted[0][0], dims_sorted[1][0], dims_sorted[2][0]), axes_map
     
-    def _find_cylinders(self, shape) -> List[Dict]:
-        """Encontra todas as faces cilíndricas (furos) com informações detalhadas"""
-        cylinders = []
+    def _find_cylinders(self, shape) -> Dict[str, np.ndarray]:
+        """
+        Encontra todas as faces cilíndricas (candidatos a furo) do sólido.
+
+        Returns:
+            Dict de arrays com uma linha por cilindro:
+            'loc' (n, 3), 'dir' (n, 3), 'raio' (n,), 'extent' (n, 3)
+        """
+        locs, dirs, raios, extents = [], [], [], []
         
         explorer = TopExp_Explorer(shape, TopAbs_FACE)
         face_count = 0
@@ -179,264 +199,130 @@ class StepParserOCC:
                 
                 if surface.GetType() == GeomAbs_Cylinder:
                     cylinder = surface.Cylinder()
-                    
-                    # Informações básicas
                     location = cylinder.Location()
                     axis = cylinder.Axis().Direction()
-                    radius = cylinder.Radius()
                     
-                    # Calcular bounding box da face cilíndrica para estimar profundidade
+                    # Bounding box da face cilíndrica para estimar profundidade
                     face_bbox = Bnd_Box()
                     brepbndlib.Add(face, face_bbox)
                     fxmin, fymin, fzmin, fxmax, fymax, fzmax = face_bbox.Get()
                     
-                    # Estimar profundidade baseado na extensão do cilindro
-                    extent_x = abs(fxmax - fxmin)
-                    extent_y = abs(fymax - fymin)
-                    extent_z = abs(fzmax - fzmin)
-                    
-                    cyl_info = {
-                        'x': location.X(),
-                        'y': location.Y(),
-                        'z': location.Z(),
-                        'radius': radius,
-                        'dir_x': axis.X(),
-                        'dir_y': axis.Y(),
-                        'dir_z': axis.Z(),
-                        'extent_x': extent_x,
-                        'extent_y': extent_y,
-                        'extent_z': extent_z,
-                        'face_bbox': (fxmin, fymin, fzmin, fxmax, fymax, fzmax),
-                    }
-                    
-                    cylinders.append(cyl_info)
+                    locs.append((location.X(), location.Y(), location.Z()))
+                    dirs.append((axis.X(), axis.Y(), axis.Z()))
+                    raios.append(cylinder.Radius())
+                    extents.append((fxmax - fxmin, fymax - fymin, fzmax - fzmin))
                     
             except Exception as e:
-                self._log(f"   ⚠️ Erro ao analisar face {face_count}: {e}")
+                self._log("   ⚠️ Erro ao analisar face %d: %s", face_count, e)
             
             explorer.Next()
         
-        self._log(f"   📊 Total de faces analisadas: {face_count}")
-        return cylinders
+        self._log("   📊 Total de faces analisadas: %d", face_count)
+        return {
+            'loc': np.array(locs, dtype=float).reshape(-1, 3),
+            'dir': np.array(dirs, dtype=float).reshape(-1, 3),
+            'raio': np.array(raios, dtype=float),
+            'extent': np.abs(np.array(extents, dtype=float).reshape(-1, 3)),
+        }
     
-    def _classify_hole(self, cyl: Dict, dims: Tuple[float, float, float], 
-                       axes_map: Dict, bbox: Tuple) -> Optional[Furo]:
+    def _classify_holes(self, cyls: Dict[str, np.ndarray], dims: Tuple[float, float, float],
+                        axes_map: Dict) -> Dict[str, np.ndarray]:
         """
-        Classifica um cilindro como furo vertical ou horizontal.
-        Versão 2.0 com tolerâncias corrigidas.
+        Classifica todos os cilindros de uma vez (operações vetorizadas).
+
+        Regras (mesmas da v2.0):
+        - Ø fora de [min_diametro_furo, max_diametro_furo] é descartado
+        - Eixo paralelo à espessura -> vertical (LS acima do meio, LSU abaixo)
+        - Eixo paralelo ao comprimento -> horizontal XM/XP se a até tol_borda da borda
+        - Eixo paralelo à largura -> horizontal YM/YP se a até tol_borda da borda
+
+        Returns:
+            Arrays dos cilindros aceitos: x, y, z, diametro, profundidade, lado
+            (lado é índice em LADOS)
         """
-        xmin, ymin, zmin, xmax, ymax, zmax = bbox
         comprimento, largura, espessura = dims
+        ic = EIXOS[axes_map['comprimento']['eixo']]
+        il = EIXOS[axes_map['largura']['eixo']]
+        ie = EIXOS[axes_map['espessura']['eixo']]
+        
+        comp_min, comp_max = axes_map['comprimento']['min'], axes_map['comprimento']['max']
+        larg_min, larg_max = axes_map['largura']['min'], axes_map['largura']['max']
+        esp_min, esp_max = axes_map['espessura']['min'], axes_map['espessura']['max']
         
-        diametro = cyl['radius'] * 2
-        
-        # Filtrar por diâmetro
-        if diametro > CONFIG['max_diametro_furo']:
-            self._log(f"   ⏭️ Cilindro Ø{diametro:.1f}mm ignorado (rebaixo/furo grande)")
-            return None
-        
-        if diametro < CONFIG['min_diametro_furo']:
-            self._log(f"   ⏭️ Cilindro Ø{diametro:.1f}mm ignorado (muito pequeno)")
-            return None
-        
-        # Direções absolutas do cilindro
-        dir_x = abs(cyl['dir_x'])
-        dir_y = abs(cyl['dir_y'])
-        dir_z = abs(cyl['dir_z'])
-        
-        # Identificar qual eixo é qual dimensão
-        eixo_comp = axes_map['comprimento']['eixo']
-        eixo_larg = axes_map['largura']['eixo']
-        eixo_esp = axes_map['espessura']['eixo']
-        
-        # Funções auxiliares para pegar valores por eixo
-        def get_coord(eixo, point_dict):
-            return point_dict.get(eixo, 0)
-        
-        def get_dir(eixo):
-            if eixo == 'x': return dir_x
-            if eixo == 'y': return dir_y
-            return dir_z
-        
-        def get_cyl_coord(eixo):
-            if eixo == 'x': return cyl['x']
-            if eixo == 'y': return cyl['y']
-            return cyl['z']
-        
-        def get_extent(eixo):
-            if eixo == 'x': return cyl['extent_x']
-            if eixo == 'y': return cyl['extent_y']
-            return cyl['extent_z']
-        
-        # Coordenadas do cilindro no sistema da peça
-        cyl_comp = get_cyl_coord(eixo_comp)
-        cyl_larg = get_cyl_coord(eixo_larg)
-        cyl_esp = get_cyl_coord(eixo_esp)
-        
-        # Limites da peça
-        comp_min = axes_map['comprimento']['min']
-        comp_max = axes_map['comprimento']['max']
-        larg_min = axes_map['largura']['min']
-        larg_max = axes_map['largura']['max']
-        esp_min = axes_map['espessura']['min']
-        esp_max = axes_map['espessura']['max']
-        
-        # Coordenadas relativas (origem no canto min)
-        rel_comp = cyl_comp - comp_min
-        rel_larg = cyl_larg - larg_min
-        rel_esp = cyl_esp - esp_min
-        
-        # Direções no sistema da peça
-        dir_comp = get_dir(eixo_comp)
-        dir_larg = get_dir(eixo_larg)
-        dir_esp = get_dir(eixo_esp)
-        
-        tol_dir = CONFIG['tol_direcao']
+        loc, ext = cyls['loc'], cyls['extent']
+        direcao = np.abs(cyls['dir'])
+        diametro = cyls['raio'] * 2
+        
+        lim_dir = 1.0 - CONFIG['tol_direcao']
         tol_borda = CONFIG['tol_borda']
         
-        self._log(f"   🔍 Cilindro Ø{diametro:.1f}mm em ({cyl['x']:.1f}, {cyl['y']:.1f}, {cyl['z']:.1f})")
-        self._log(f"      Direção: comp={dir_comp:.2f}, larg={dir_larg:.2f}, esp={dir_esp:.2f}")
-        self._log(f"      Rel: comp={rel_comp:.1f}, larg={rel_larg:.1f}, esp={rel_esp:.1f}")
+        valido = (diametro <= CONFIG['max_diametro_furo']) & (diametro >= CONFIG['min_diametro_furo'])
         
-        # Determinar tipo baseado na direção dominante
-        max_dir = max(dir_comp, dir_larg, dir_esp)
+        # Direção dominante (vertical tem prioridade, depois comprimento, depois largura)
+        vertical = valido & (direcao[:, ie] > lim_dir)
+        horiz_comp = valido & ~vertical & (direcao[:, ic] > lim_dir)
+        horiz_larg = valido & ~vertical & ~horiz_comp & (direcao[:, il] > lim_dir)
         
-        # FURO VERTICAL: direção paralela ao eixo da espessura
-        if dir_esp > (1.0 - tol_dir):
-            # Verificar se está dentro da peça (não é furo de borda lateral)
-            profundidade = get_extent(eixo_esp)
-            
-            # Determinar lado (LS = topo, LSU = base)
-            meio_esp = (esp_min + esp_max) / 2
-            if cyl_esp > meio_esp:
-                lado = 'LS'
-            else:
-                lado = 'LSU'
-            
-            self._log(f"      ✅ VERTICAL {lado} - prof={profundidade:.1f}mm")
-            
-            return Furo(
-                id=0,
-                x=rel_comp,
-                y=rel_larg,
-                z=rel_esp,
-                diametro=diametro,
-                profundidade=profundidade if profundidade > 0 else espessura,
-                tipo='vertical',
-                lado=lado
-            )
+        # Proximidade das bordas
+        xm = horiz_comp & (np.abs(loc[:, ic] - comp_min) <= tol_borda)
+        xp = horiz_comp & ~xm & (np.abs(loc[:, ic] - comp_max) <= tol_borda)
+        ym = horiz_larg & (np.abs(loc[:, il] - larg_min) <= tol_borda)
+        yp = horiz_larg & ~ym & (np.abs(loc[:, il] - larg_max) <= tol_borda)
         
-        # FURO HORIZONTAL na direção do comprimento (XP ou XM)
-        elif dir_comp > (1.0 - tol_dir):
-            # Verificar se está na borda do comprimento
-            dist_comp_min = abs(cyl_comp - comp_min)
-            dist_comp_max = abs(cyl_comp - comp_max)
-            
-            self._log(f"      Dist bordas comp: min={dist_comp_min:.1f}, max={dist_comp_max:.1f}")
-            
-            profundidade = get_extent(eixo_comp)
-            
-            if dist_comp_min <= tol_borda:
-                lado = 'XM'  # Entra pelo lado menor do comprimento
-                x_final = 0
-                self._log(f"      ✅ HORIZONTAL {lado} - prof={profundidade:.1f}mm")
-                
-                return Furo(
-                    id=0,
-                    x=x_final,
-                    y=rel_larg,
-                    z=rel_esp,
-                    diametro=diametro,
-                    profundidade=profundidade if profundidade > 0 else 22.0,
-                    tipo='horizontal',
-                    lado=lado
-                )
-            elif dist_comp_max <= tol_borda:
-                lado = 'XP'  # Entra pelo lado maior do comprimento
-                x_final = comprimento
-                self._log(f"      ✅ HORIZONTAL {lado} - prof={profundidade:.1f}mm")
-                
-                return Furo(
-                    id=0,
-                    x=x_final,
-                    y=rel_larg,
-                    z=rel_esp,
-                    diametro=diametro,
-                    profundidade=profundidade if profundidade > 0 else 22.0,
-                    tipo='horizontal',
-                    lado=lado
-                )
-            else:
-                self._log(f"      ❌ Descartado: não está na borda do comprimento")
-                return None
+        ls = vertical & (loc[:, ie] > (esp_min + esp_max) / 2)
+        lado = np.select([ls, vertical, xm, xp, ym, yp], np.arange(len(LADOS)), default=-1)
         
-        # FURO HORIZONTAL na direção da largura (YP ou YM)
-        elif dir_larg > (1.0 - tol_dir):
-            dist_larg_min = abs(cyl_larg - larg_min)
-            dist_larg_max = abs(cyl_larg - larg_max)
-            
-            self._log(f"      Dist bordas larg: min={dist_larg_min:.1f}, max={dist_larg_max:.1f}")
-            
-            profundidade = get_extent(eixo_larg)
-            
-            if dist_larg_min <= tol_borda:
-                lado = 'YM'
-                y_final = 0
-                self._log(f"      ✅ HORIZONTAL {lado} - prof={profundidade:.1f}mm")
-                
-                return Furo(
-                    id=0,
-                    x=rel_comp,
-                    y=y_final,
-                    z=rel_esp,
-                    diametro=diametro,
-                    profundidade=profundidade if profundidade > 0 else 22.0,
-                    tipo='horizontal',
-                    lado=lado
-                )
-            elif dist_larg_max <= tol_borda:
-                lado = 'YP'
-                y_final = largura
-                self._log(f"      ✅ HORIZONTAL {lado} - prof={profundidade:.1f}mm")
-                
-                return Furo(
-                    id=0,
-                    x=rel_comp,
-                    y=y_final,
-                    z=rel_esp,
-                    diametro=diametro,
-                    profundidade=profundidade if profundidade > 0 else 22.0,
-                    tipo='horizontal',
-                    lado=lado
-                )
-            else:
-                self._log(f"      ❌ Descartado: não está na borda da largura")
-                return None
+        # Coordenadas relativas (origem no canto min); horizontais vão para a borda
+        rel_comp = loc[:, ic] - comp_min
+        rel_larg = loc[:, il] - larg_min
+        x = np.where(xm, 0.0, np.where(xp, comprimento, rel_comp))
+        y = np.where(ym, 0.0, np.where(yp, largura, rel_larg))
         
-        else:
-            self._log(f"      ❌ Descartado: direção não alinhada com nenhum eixo")
-            return None
-    
-    def _remove_duplicates(self, furos: List[Furo]) -> List[Furo]:
-        """Remove furos duplicados (mesmo local e diâmetro)"""
-        unique = []
-        seen = set()
-        
-        for furo in furos:
-            # Chave única com tolerância de 1mm
-            key = (
-                round(furo.x / 2) * 2,  # Arredondar para 2mm
-                round(furo.y / 2) * 2,
-                round(furo.diametro, 0),
-                furo.tipo,
-                furo.lado
-            )
-            
-            if key not in seen:
-                seen.add(key)
-                unique.append(furo)
+        # Profundidade = extensão da face no eixo do furo (fallback se zero)
+        prof = np.where(vertical, ext[:, ie], np.where(horiz_comp, ext[:, ic], ext[:, il]))
+        prof = np.where(prof > 0, prof, np.where(vertical, espessura, 22.0))
+        
+        if self.debug and logger.isEnabledFor(logging.DEBUG):
+            self._log_classificacao(cyls, direcao[:, [ic, il, ie]], valido, lado)
         
-        return unique
+        aceito = lado >= 0
+        return {
+            'x': x[aceito],
+            'y': y[aceito],
+            'z': (loc[:, ie] - esp_min)[aceito],
+            'diametro': diametro[aceito],
+            'profundidade': prof[aceito],
+            'lado': lado[aceito],
+        }
+    
+    def _log_classificacao(self, cyls: Dict[str, np.ndarray], direcao: np.ndarray,
+                           valido: np.ndarray, lado: np.ndarray):
+        """Detalha a classificação de cada cilindro (só chamado com DEBUG ativo)"""
+        n = len(cyls['raio'])
+        for i in range(n):
+            diametro = cyls['raio'][i] * 2
+            self._log("   --- Cilindro %d/%d: Ø%.1fmm em (%.1f, %.1f, %.1f) ---",
+                      i + 1, n, diametro, *cyls['loc'][i])
+            if not valido[i]:
+                self._log("      ⏭️ Ignorado (Ø fora de %.1f-%.1fmm)",
+                          CONFIG['min_diametro_furo'], CONFIG['max_diametro_furo'])
+                continue
+            self._log("      Direção: comp=%.2f, larg=%.2f, esp=%.2f", *direcao[i])
+            if lado[i] >= 0:
+                self._log("      ✅ %s", LADOS[lado[i]])
+            else:
+                self._log("      ❌ Descartado: fora da borda ou direção não alinhada")
+    
+    def _remove_duplicates(self, furos: Dict[str, np.ndarray]) -> List[int]:
+        """
+        Remove furos duplicados (mesmo lado e diâmetro, a até tol_duplicado mm).
+
+        Returns:
+            Índices dos furos mantidos, na ordem original
+        """
+        pontos = np.column_stack([furos['x'], furos['y']]).tolist()
+        categorias = list(zip(np.round(furos['diametro']).tolist(), furos['lado'].tolist()))
+        return deduplicar(pontos, CONFIG['tol_duplicado'], categorias)
     
     def parse(self) -> List[Peca]:
         """Processa o STEP e extrai peças com furos"""
@@ -458,7 +344,7 @@ class StepParserOCC:
             
             # Filtrar bordas e peças muito finas
             if dims[2] < CONFIG['min_espessura']:
-                print(f"\n⏭️ Peca_{solid_count}: Ignorada (borda/fita - espessura {dims[2]:.2f}mm)")
+                logger.debug("⏭️ Peca_%d: Ignorada (borda/fita - espessura %.2fmm)", solid_count, dims[2])
                 explorer.Next()
                 continue
             
@@ -473,57 +359,52 @@ class StepParserOCC:
                 bbox_max=(bbox[3], bbox[4], bbox[5])
             )
             
-            print(f"\n{'='*60}")
-            print(f"📦 {nome}: {dims[0]:.1f} x {dims[1]:.1f} x {dims[2]:.1f} mm")
-            print(f"   BBox: ({bbox[0]:.1f}, {bbox[1]:.1f}, {bbox[2]:.1f}) -> ({bbox[3]:.1f}, {bbox[4]:.1f}, {bbox[5]:.1f})")
-            print(f"   Eixos: comp={axes_map['comprimento']['eixo']}, larg={axes_map['largura']['eixo']}, esp={axes_map['espessura']['eixo']}")
-            print(f"{'='*60}")
+            logger.debug("📦 %s: %.1f x %.1f x %.1f mm", nome, dims[0], dims[1], dims[2])
+            logger.debug("   BBox: (%.1f, %.1f, %.1f) -> (%.1f, %.1f, %.1f)", *bbox)
+            logger.debug("   Eixos: comp=%s, larg=%s, esp=%s", axes_map['comprimento']['eixo'],
+                         axes_map['largura']['eixo'], axes_map['espessura']['eixo'])
             
             # Encontrar cilindros
             cylinders = self._find_cylinders(solid)
-            print(f"\n   🔍 Cilindros encontrados: {len(cylinders)}")
-            
-            # Classificar cada cilindro
-            furos = []
-            for i, cyl in enumerate(cylinders):
-                self._log(f"\n   --- Cilindro {i+1}/{len(cylinders)} ---")
-                furo = self._classify_hole(cyl, dims, axes_map, bbox)
-                if furo:
-                    furos.append(furo)
+            logger.debug("   🔍 Cilindros encontrados: %d", len(cylinders['raio']))
             
-            # Remover duplicados
-            furos_unicos = self._remove_duplicates(furos)
+            # Classificar (vetorizado) e remover duplicados (índice espacial)
+            furos = self._classify_holes(cylinders, dims, axes_map)
+            manter = self._remove_duplicates(furos)
             
-            # Atribuir IDs
-            for i, furo in enumerate(furos_unicos, 1):
-                furo.id = i
+            colunas = zip(*(furos[k][manter].tolist() for k in
+                            ('x', 'y', 'z', 'diametro', 'profundidade', 'lado')))
+            furos_unicos = [
+                Furo(id=i, x=x, y=y, z=z, diametro=d, profundidade=p,
+                     tipo='vertical' if LADOS[lado] in ('LS', 'LSU') else 'horizontal',
+                     lado=LADOS[lado])
+                for i, (x, y, z, d, p, lado) in enumerate(colunas, 1)
+            ]
             
             peca.furos = furos_unicos
             
-            # Resumo
-            v_count = len([f for f in furos_unicos if f.tipo == 'vertical'])
-            h_count = len([f for f in furos_unicos if f.tipo == 'horizontal'])
-            
-            print(f"\n   📊 RESUMO:")
-            print(f"   ✅ Furos detectados: {len(furos_unicos)} ({v_count} verticais, {h_count} horizontais)")
-            
-            # Detalhar furos por lado
-            lados = {}
-            for f in furos_unicos:
-                if f.lado not in lados:
-                    lados[f.lado] = []
-                lados[f.lado].append(f)
-            
-            for lado, lista in sorted(lados.items()):
-                diams = [f.diametro for f in lista]
-                print(f"      {lado}: {len(lista)} furos - Ø{diams}")
+            # Resumo (só monta se o DEBUG estiver ativo)
+            if logger.isEnabledFor(logging.DEBUG):
+                v_count = len([f for f in furos_unicos if f.tipo == 'vertical'])
+                h_count = len([f for f in furos_unicos if f.tipo == 'horizontal'])
+                logger.debug("   ✅ Furos detectados: %d (%d verticais, %d horizontais)",
+                             len(furos_unicos), v_count, h_count)
+                
+                # Detalhar furos por lado
+                lados = {}
+                for f in furos_unicos:
+                    if f.lado not in lados:
+                        lados[f.lado] = []
+                    lados[f.lado].append(f)
+                
+                for lado, lista in sorted(lados.items()):
+                    diams = [f.diametro for f in lista]
+                    logger.debug("      %s: %d furos - Ø%s", lado, len(lista), diams)
             
             self.pecas.append(peca)
             explorer.Next()
         
-        print(f"\n{'='*60}")
-        print(f"📊 TOTAL: {len(self.pecas)} peça(s) processada(s)")
-        print(f"{'='*60}")
+        logger.info("📊 TOTAL: %d peça(s) processada(s)", len(self.pecas))
         
         return self.pecas
     
@@ -555,6 +436,9 @@ if __name__ == "__main__":
         filepath = sys.argv[1]
         debug = '--debug' in sys.argv or '-d' in sys.argv
         
+        from app.core.logging_config import configurar_logging
+        configurar_logging(nivel='DEBUG' if debug else 'INFO')
+        
         print(f"\n🚀 CoreWood STEP Parser v2.0")
         print(f"   Arquivo: {filepath}")
         print(f"   Debug: {'ON' if debug else 'OFF'}")
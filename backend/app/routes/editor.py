@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, Form
+from fastapi import APIRouter, HTTPException, Depends, Form, Header
 from pydantic import BaseModel
 from typing import List, Optional, Union
 from fastapi.responses import Response
@@ -10,8 +10,13 @@ from sqlalchemy.orm import Session
 import tempfile
 from typing import Union
 import os
-from app.models.peca_db import PecaDB
+from app.models.peca_db import PecaDB, peca_db_para_pdf
+from app.models.peca import montar_peca_editor, LADOS_HORIZONTAIS
 from app.models.produto import Produto
+import logging
+from app.core.instrumentacao import medir_render, perfil_ativado
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/editor", tags=["editor"])
 
@@ -48,6 +53,15 @@ class PecaData(BaseModel):
     comentarios: List[str] = []
 
 
+class PlanoFuracaoRequest(BaseModel):
+    comprimento: float
+    largura: float
+    espessura: float
+    furos_verticais: List[FuroData] = []
+    furos_horizontais: List[FuroHorizontalData] = []
+    transformacao: dict = {}
+
+
 @router.post("/export-mpr")
 async def export_mpr(
     peca: PecaData,
@@ -57,12 +71,10 @@ async def export_mpr(
     Exporta peça criada no editor como arquivo MPR
     """
     try:
-        print(f"\n📤 ===== EXPORTANDO MPR =====")
-        print(f"👤 Usuário: {current_user.username}")
-        print(f"📦 Peça: {peca.nome}")
-        print(f"📐 Dimensões: {peca.largura}x{peca.comprimento}x{peca.espessura}mm")
-        print(f"🔴 Furos verticais: {len(peca.furos)}")
-        print(f"🔵 Furos horizontais: {len(peca.furosHorizontais)}")
+        logger.info("📤 Exportando MPR: %s (usuário: %s)", peca.nome, current_user.username)
+        logger.debug("📐 Dimensões: %sx%sx%smm | 🔴 %d verticais | 🔵 %d horizontais",
+                     peca.largura, peca.comprimento, peca.espessura,
+                     len(peca.furos), len(peca.furosHorizontais))
         
         # Juntar furos verticais e horizontais
         todos_furos = []
@@ -102,15 +114,15 @@ async def export_mpr(
         
         # Gerar MPR
         gerador = GeradorMPR()
-        mpr_content = gerador.gerar_mpr(peca_dict)
+        mpr_content = gerador.gerar_mpr_bytes(peca_dict)
         
-        print(f"✅ MPR gerado: {len(mpr_content)} caracteres")
+        logger.debug("✅ MPR gerado: %d bytes", len(mpr_content))
         
         # Retornar como arquivo para download
         filename = f"{peca.nome}.mpr"
         
         return Response(
-            content=mpr_content.encode('cp1252', errors='replace'),
+            content=mpr_content,
             media_type='application/octet-stream',
             headers={
                 'Content-Disposition': f'attachment; filename="{filename}"'
@@ -118,9 +130,7 @@ async def export_mpr(
         )
         
     except Exception as e:
-        print(f"❌ Erro ao exportar MPR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Erro ao exportar MPR: %s", e)
         raise HTTPException(status_code=500, detail=f"Erro ao gerar MPR: {str(e)}")
 
 
@@ -138,26 +148,25 @@ async def generate_pdf_from_editor(
     current_user: User = Depends(get_current_active_user),
     alerta: str = Form("false"),
     observacoes: str = Form(""),
+    x_render_profile: Optional[str] = Header(None),
     db: Session = Depends(get_db)
     ):
     """
     Gera PDF diretamente dos dados do editor (sem passar por MPR)
+    Tempos por etapa vão nos headers Server-Timing / X-Render-Metrics;
+    X-Render-Profile: 1 liga o cProfile se COREWOOD_PERFIL_HEADER=1 (resumo no log app.metrics)
     """
     try:
         import json
         
-        print(f"⚠️ ALERTA recebido: '{alerta}' -> {alerta.lower() == 'true'}")
-        print(f"📝 OBSERVAÇÕES: '{observacoes}'")
-        from app.models.peca import Peca, Dimensoes, FuroVertical, FuroHorizontal
+        logger.debug("⚠️ ALERTA recebido: '%s' | 📝 OBSERVAÇÕES: '%s'", alerta, observacoes)
         from app.generators.pdf_generator import GeradorDesenhoTecnico
         from fastapi.responses import FileResponse
         from app.models.peca_db import PecaDB
         from app.models.produto import Produto
         
-        print(f"\n📄 ===== GERANDO PDF DO EDITOR =====")
-        print(f"👤 Usuário: {current_user.username}")
-        print(f"📦 Peça: {nome_peca}")
-        print(f"🆔 peca_id recebido: {peca_id}")
+        logger.info("📄 Gerando PDF do editor: %s (peca_id: %s, usuário: %s)",
+                    nome_peca, peca_id, current_user.username)
 
         # Buscar dados da peça se vier peca_id
         codigo_peca = None
@@ -166,7 +175,6 @@ async def generate_pdf_from_editor(
         nome_produto = None
         
         if peca_id:
-            print(f"🔍 Buscando peça ID {peca_id} no banco...")
             peca_db = db.query(PecaDB).filter(PecaDB.id == peca_id).first()
             
             if peca_db:
@@ -177,13 +185,10 @@ async def generate_pdf_from_editor(
                 codigo_produto = produto.codigo if produto else None
                 nome_produto = produto.nome if produto else None
                 
-                print(f"📋 Dados do banco encontrados:")
-                print(f"   Código Peça: {codigo_peca}")
-                print(f"   Nome Peça: {nome_peca_db}")
-                print(f"   Código Produto: {codigo_produto}")
-                print(f"   Nome Produto: {nome_produto}")
+                logger.debug("📋 Dados do banco: %s - %s (produto %s - %s)",
+                             codigo_peca, nome_peca_db, codigo_produto, nome_produto)
             else:
-                print(f"⚠️ Peça ID {peca_id} não encontrada no banco")
+                logger.warning("⚠️ Peça ID %s não encontrada no banco", peca_id)
         
         # Converter JSON strings para objetos
         furos_vert = json.loads(furos_verticais)
@@ -191,7 +196,6 @@ async def generate_pdf_from_editor(
 
         # Converter bordas
         bordas_dict = json.loads(bordas)
-        print(f"🎨 Bordas recebidas: {bordas_dict}")
 
         # Mapear nomes do frontend para o PDF
         bordas_pdf = {
@@ -206,71 +210,17 @@ async def generate_pdf_from_editor(
             if bordas_pdf[key] == 'nenhum':
                 bordas_pdf[key] = None
 
-        print(f"🎨 Bordas mapeadas para PDF: {bordas_pdf}")
-
         # Converter transformação
         transformacao_dict = json.loads(transformacao)
-        print(f"🔄 Transformação: {transformacao_dict}")
-        
-        print(f"🔴 Furos verticais recebidos: {len(furos_vert)}")
-        print(f"🔵 Furos horizontais recebidos: {len(furos_horiz)}")
+        logger.debug("🎨 Bordas: %s -> %s | 🔄 Transformação: %s | furos recebidos: %d V, %d H",
+                     bordas_dict, bordas_pdf, transformacao_dict, len(furos_vert), len(furos_horiz))
         
         # Converter dados do editor para formato Peca
-        dimensoes = Dimensoes(
-            largura=comprimento,
-            comprimento=largura,
-            espessura=espessura
-        )
-        
-        furos_verticais_obj = []
-        furos_horizontais_obj = []
-        
-        # Processar furos verticais (não verificar 'tipo', assumir que são verticais)
-        for furo in furos_vert:
-            # Pular se tiver campo 'lado' de horizontal (XP, XM, YP, YM)
-            lado = furo.get('lado', 'LS')
-            if lado in ['XP', 'XM', 'YP', 'YM']:
-                continue
-                
-            furos_verticais_obj.append(
-                FuroVertical(
-                    x=furo['x'],
-                    y=furo['y'],
-                    diametro=furo['diametro'],
-                    profundidade=furo.get('profundidade', 0),
-                    lado=lado
-                )
-            )
-        
-        # Processar furos horizontais
-        for furo in furos_horiz:
-            x_val = furo.get('x', 0)
-            if x_val == 'x':
-                x_val = 'x'
-            else:
-                x_val = float(x_val) if x_val else 0
-            
-            furos_horizontais_obj.append(
-                FuroHorizontal(
-                    x=x_val,
-                    y=furo['y'],
-                    z=furo.get('z', 7.5),
-                    diametro=furo['diametro'],
-                    profundidade=furo.get('profundidade', 0),
-                    lado=furo.get('lado', 'XP')
-                )
-            )
-        
-        print(f"🔴 Furos verticais processados: {len(furos_verticais_obj)}")
-        print(f"🔵 Furos horizontais processados: {len(furos_horizontais_obj)}")
+        peca_obj = montar_peca_editor(nome_peca, comprimento, largura, espessura,
+                                       furos_vert, furos_horiz)
         
-        peca_obj = Peca(
-            nome=nome_peca,
-            dimensoes=dimensoes,
-            furos_verticais=furos_verticais_obj,
-            furos_horizontais=furos_horizontais_obj,
-            comentarios=[]
-        )
+        logger.debug("Furos processados: %d verticais, %d horizontais",
+                     len(peca_obj.furos_verticais), len(peca_obj.furos_horizontais))
         
         # Gerar PDF
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
@@ -292,24 +242,62 @@ async def generate_pdf_from_editor(
             'responsavel': current_user.username
         }
         
-        gerador.gerar_pdf(peca_obj, pdf_path, dados_adicionais)
+        with medir_render(perfil=perfil_ativado(x_render_profile)) as metricas:
+            gerador.gerar_pdf(peca_obj, pdf_path, dados_adicionais)
+        metricas.registrar(peca=nome_peca, usuario=current_user.username)
         
-        print(f"✅ PDF gerado: {pdf_path}")
+        logger.info("✅ PDF gerado: %s", pdf_path)
         
         return FileResponse(
             pdf_path,
             media_type='application/pdf',
             filename=f"{nome_peca}_furacao.pdf",
+            headers=metricas.headers(),
             background=None
         )
         
         
     except Exception as e:
-        print(f"❌ Erro ao gerar PDF: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Erro ao gerar PDF: %s", e)
         raise HTTPException(status_code=500, detail=f"Erro ao gerar PDF: {str(e)}")
     
+
+@router.post("/plano-furacao")
+def plano_furacao(
+    dados: PlanoFuracaoRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Plano de furação do estado atual do editor, sem gerar PDF:
+    páginas (INFERIOR/SUPERIOR), batente, mandril de cada furo,
+    passadas extras e conflitos de 100mm.
+    """
+    from app.generators.pdf_generator import GeradorDesenhoTecnico
+
+    furos_vert = [f.model_dump() for f in dados.furos_verticais]
+    furos_horiz = [f.model_dump() for f in dados.furos_horizontais]
+    peca_obj = montar_peca_editor('plano', dados.comprimento, dados.largura, dados.espessura,
+                                   furos_vert, furos_horiz)
+
+    try:
+        plano = GeradorDesenhoTecnico().planejar_furacao(peca_obj, {
+            'angulo_rotacao': dados.transformacao.get('rotacao', 0),
+            'espelhar_peca': dados.transformacao.get('espelhado', False),
+        })
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Furos inválidos: {str(e)}")
+
+    # 'indice' do plano -> id do furo no editor (quando o editor mandou)
+    ids_verticais = [f.get('id') for f in furos_vert if f.get('lado', 'LS') not in LADOS_HORIZONTAIS]
+    ids_horizontais = [f.get('id') for f in furos_horiz]
+    for pagina in plano['paginas']:
+        for furo in pagina['furos_verticais']:
+            furo['id'] = ids_verticais[furo['indice']]
+        for furo in pagina['furos_horizontais']:
+            furo['id'] = ids_horizontais[furo['indice']]
+
+    return plano
+
 @router.post("/generate-pdfs-batch")
 async def generate_pdfs_batch(
     request: dict,
@@ -328,9 +316,7 @@ async def generate_pdfs_batch(
     if not peca_ids:
         raise HTTPException(status_code=400, detail="Nenhuma peça selecionada")
     
-    print(f"\n📄 ===== GERANDO PDFs EM LOTE =====")
-    print(f"👤 Usuário: {current_user.username}")
-    print(f"📦 Peças: {peca_ids}")
+    logger.info("📄 Gerando PDFs em lote: %s (usuário: %s)", peca_ids, current_user.username)
     
     # Criar ZIP em memória
     zip_buffer = io.BytesIO()
@@ -341,101 +327,26 @@ async def generate_pdfs_batch(
                 # Buscar peça
                 peca_db = db.query(PecaDB).filter(PecaDB.id == peca_id).first()
                 if not peca_db:
-                    print(f"⚠️ Peça {peca_id} não encontrada")
+                    logger.warning("⚠️ Peça %s não encontrada", peca_id)
                     continue
                 
                 # Buscar produto
                 produto = db.query(Produto).filter(Produto.id == peca_db.produto_id).first()
                 
-                print(f"📄 Gerando PDF: {peca_db.codigo} - {peca_db.nome}")
+                logger.debug("📄 Gerando PDF: %s - %s", peca_db.codigo, peca_db.nome)
                 
-                # Montar dados da peça
-                from app.models.peca import Peca, Dimensoes, FuroVertical, FuroHorizontal
                 from app.generators.pdf_generator import GeradorDesenhoTecnico
                 
-                dimensoes = Dimensoes(
-                    largura=float(peca_db.comprimento or 0),
-                    comprimento=float(peca_db.largura or 0),
-                    espessura=float(peca_db.espessura or 15)
-                )
-                
-                # Processar furos
-                furos_verticais_obj = []
-                furos_horizontais_obj = []
-                
-                furos_data = peca_db.furos or {}
-                
-                for furo in furos_data.get('verticais', []):
-                    lado = furo.get('lado', 'LS')
-                    if lado not in ['XP', 'XM', 'YP', 'YM']:
-                        furos_verticais_obj.append(
-                            FuroVertical(
-                                x=furo['x'],
-                                y=furo['y'],
-                                diametro=furo['diametro'],
-                                profundidade=furo.get('profundidade', 0),
-                                lado=lado
-                            )
-                        )
-                
-                for furo in furos_data.get('horizontais', []):
-                    x_val = furo.get('x', 0)
-                    if x_val == 'x':
-                        x_val = 'x'
-                    else:
-                        x_val = float(x_val) if x_val else 0
-                    
-                    furos_horizontais_obj.append(
-                        FuroHorizontal(
-                            x=x_val,
-                            y=furo['y'],
-                            z=furo.get('z', 7.5),
-                            diametro=furo['diametro'],
-                            profundidade=furo.get('profundidade', 0),
-                            lado=furo.get('lado', 'XP')
-                        )
-                    )
-                
-                peca_obj = Peca(
-                    nome=peca_db.nome,
-                    dimensoes=dimensoes,
-                    furos_verticais=furos_verticais_obj,
-                    furos_horizontais=furos_horizontais_obj,
-                    comentarios=[]
-                )
-                
-                # Buscar transformação e bordas
-                transformacao = peca_db.transformacao or {}
-                bordas = peca_db.bordas or {}
-                
-                # Mapear bordas
-                bordas_pdf = {
-                    'top': bordas.get('topo') if bordas.get('topo') != 'nenhum' else None,
-                    'bottom': bordas.get('baixo') if bordas.get('baixo') != 'nenhum' else None,
-                    'left': bordas.get('esquerda') if bordas.get('esquerda') != 'nenhum' else None,
-                    'right': bordas.get('direita') if bordas.get('direita') != 'nenhum' else None
-                }
+                peca_obj, dados_adicionais = peca_db_para_pdf(peca_db, produto, current_user.username)
                 
                 # Gerar PDF temporário
                 with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
                     pdf_path = tmp_file.name
                 
                 gerador = GeradorDesenhoTecnico()
-                dados_adicionais = {
-                    'angulo_rotacao': transformacao.get('rotacao', 0),
-                    'espelhar_peca': transformacao.get('espelhado', False),
-                    'bordas': bordas_pdf,
-                    'alerta': None,
-                    'revisao': '00',
-                    'status': 'CÓPIA CONTROLADA',
-                    'codigo_peca': peca_db.codigo,
-                    'nome_peca': peca_db.nome,
-                    'codigo_produto': produto.codigo if produto else None,
-                    'nome_produto': produto.nome if produto else None,
-                    'responsavel': current_user.username
-                }
-                
-                gerador.gerar_pdf(peca_obj, pdf_path, dados_adicionais)
+                with medir_render() as metricas:
+                    gerador.gerar_pdf(peca_obj, pdf_path, dados_adicionais)
+                metricas.registrar(peca=peca_db.codigo)
                 
                 # Adicionar ao ZIP
                 nome_arquivo = f"{peca_db.codigo}_{peca_db.nome}.pdf".replace(' ', '_')
@@ -445,23 +356,103 @@ async def generate_pdfs_batch(
                 # Limpar arquivo temporário
                 os.remove(pdf_path)
                 
-                print(f"✅ PDF gerado: {nome_arquivo}")
+                logger.debug("✅ PDF gerado: %s", nome_arquivo)
                 
             except Exception as e:
-                print(f"❌ Erro ao gerar PDF da peça {peca_id}: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("❌ Erro ao gerar PDF da peça %s: %s", peca_id, e)
                 continue
     
     zip_buffer.seek(0)
     
-    print(f"✅ ZIP gerado com sucesso!")
+    logger.info("✅ ZIP de PDFs gerado com sucesso!")
     
     return StreamingResponse(
         zip_buffer,
         media_type='application/zip',
         headers={'Content-Disposition': 'attachment; filename=pecas_pdfs.zip'}
-    )    
+    )
+
+@router.post("/generate-pdf-pack")
+def generate_pdf_pack(
+    request: dict,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Gera UM PDF com todas as peças para impressão (índice + marcadores por peça).
+    Body: {"produto_id": 1} (todas as peças do produto) ou {"peca_ids": [...]}
+    """
+    from fastapi.responses import FileResponse
+    from starlette.background import BackgroundTask
+    from app.generators.pdf_generator import GeradorDesenhoTecnico, ItemPacote
+
+    produto_id = request.get('produto_id')
+    peca_ids = request.get('peca_ids', [])
+
+    # Só id/código/nome para o índice; furos são carregados peça a peça
+    consulta = db.query(PecaDB.id, PecaDB.codigo, PecaDB.nome, PecaDB.produto_id)
+    if produto_id:
+        linhas = consulta.filter(PecaDB.produto_id == produto_id).order_by(PecaDB.codigo).all()
+    elif peca_ids:
+        por_id = {linha.id: linha for linha in consulta.filter(PecaDB.id.in_(peca_ids)).all()}
+        linhas = [por_id[peca_id] for peca_id in peca_ids if peca_id in por_id]
+    else:
+        raise HTTPException(status_code=400, detail="Informe produto_id ou peca_ids")
+
+    if not linhas:
+        raise HTTPException(status_code=404, detail="Nenhuma peça encontrada")
+
+    produtos = {}
+
+    def buscar_produto(id_produto):
+        if id_produto not in produtos:
+            produtos[id_produto] = db.query(Produto).filter(Produto.id == id_produto).first()
+        return produtos[id_produto]
+
+    def carregador(peca_id):
+        def carregar():
+            peca_db = db.query(PecaDB).filter(PecaDB.id == peca_id).first()
+            peca_obj, dados_adicionais = peca_db_para_pdf(
+                peca_db, buscar_produto(peca_db.produto_id), current_user.username)
+            db.expunge(peca_db)  # Não acumular as peças na sessão
+            return peca_obj, dados_adicionais
+        return carregar
+
+    itens = [ItemPacote(f"{linha.codigo} - {linha.nome or ''}".strip(' -'), carregador(linha.id))
+             for linha in linhas]
+
+    produto = buscar_produto(produto_id or linhas[0].produto_id)
+    titulo = f"{produto.codigo} - {produto.nome}" if produto else ""
+
+    logger.info("🖨️ Gerando pacote de impressão: %d peças (%s, usuário: %s)",
+                len(itens), titulo or peca_ids, current_user.username)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+        pdf_path = tmp_file.name
+
+    try:
+        with medir_render() as metricas:
+            resumo = GeradorDesenhoTecnico().gerar_pacote_pdf(itens, pdf_path, titulo)
+        metricas.registrar(pacote=titulo, pecas=resumo['pecas'], paginas=resumo['paginas'])
+    except Exception as e:
+        os.remove(pdf_path)
+        logger.exception("❌ Erro ao gerar pacote de impressão: %s", e)
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar pacote: {str(e)}")
+
+    if resumo['falhas']:
+        logger.warning("⚠️ Peças fora do pacote: %s", resumo['falhas'])
+
+    nome_arquivo = f"pacote_{produto.codigo if produto else 'pecas'}.pdf".replace(' ', '_')
+
+    # Arquivo é enviado em blocos e apagado depois da resposta
+    return FileResponse(
+        pdf_path,
+        media_type='application/pdf',
+        filename=nome_arquivo,
+        headers={'X-Pack-Pecas': str(resumo['pecas']),
+                 'X-Pack-Falhas': str(len(resumo['falhas']))},
+        background=BackgroundTask(os.remove, pdf_path)
+    )
 
 @router.post("/generate-mprs-batch")
 async def generate_mprs_batch(
@@ -481,9 +472,7 @@ async def generate_mprs_batch(
     if not peca_ids:
         raise HTTPException(status_code=400, detail="Nenhuma peça selecionada")
 
-    print(f"\n📐 ===== GERANDO MPRs EM LOTE =====")
-    print(f"👤 Usuário: {current_user.username}")
-    print(f"📦 Peças: {peca_ids}")
+    logger.info("📐 Gerando MPRs em lote: %s (usuário: %s)", peca_ids, current_user.username)
 
     # Criar ZIP em memória
     zip_buffer = io.BytesIO()
@@ -495,10 +484,10 @@ async def generate_mprs_batch(
                 # Buscar peça
                 peca_db = db.query(PecaDB).filter(PecaDB.id == peca_id).first()
                 if not peca_db:
-                    print(f"⚠️ Peça {peca_id} não encontrada")
+                    logger.warning("⚠️ Peça %s não encontrada", peca_id)
                     continue
 
-                print(f"📐 Gerando MPR: {peca_db.codigo} - {peca_db.nome}")
+                logger.debug("📐 Gerando MPR: %s - %s", peca_db.codigo, peca_db.nome)
 
                 # Processar furos
                 furos_list = []
@@ -534,23 +523,18 @@ async def generate_mprs_batch(
                     'furos': furos_list
                 }
 
-                # Gerar MPR
-                mpr_content = gerador.gerar_mpr(peca_dict)
-
-                # Adicionar ao ZIP
+                # Gerar MPR direto no membro do ZIP
                 nome_arquivo = f"{peca_db.codigo}_{peca_db.nome}.mpr".replace(' ', '_')
-                zip_file.writestr(nome_arquivo, mpr_content.encode('cp1252', errors='replace'))
+                gerador.escrever_mpr_zip(zip_file, nome_arquivo, peca_dict)
 
-                print(f"✅ MPR gerado: {nome_arquivo}")
+                logger.debug("✅ MPR gerado: %s", nome_arquivo)
 
             except Exception as e:
-                print(f"❌ Erro ao gerar MPR da peça {peca_id}: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("❌ Erro ao gerar MPR da peça %s: %s", peca_id, e)
                 continue
 
     zip_buffer.seek(0)
-    print(f"✅ ZIP de MPRs gerado com sucesso!")
+    logger.info("✅ ZIP de MPRs gerado com sucesso!")
 
     return StreamingResponse(
         zip_buffer,
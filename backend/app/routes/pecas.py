@@ -1,35 +1,132 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Header, BackgroundTasks
+from fastapi.responses import Response
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.database import get_db
 from app.models.produto import Produto
-from app.models.peca_db import PecaDB
+from app.models.peca_db import PecaDB, peca_db_para_pdf
 from app.schemas.peca import PecaResponse
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from app.core.auth import get_current_active_user
 from app.models.user import User
-import pandas as pd
-import io
+from app.parser.carga_maquina import LinhaPeca, PlanilhaInvalida, ler_pecas
+import hashlib
+import json
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/pecas", tags=["Peças"])
 
-def extrair_espessura(material: str) -> float:
-    """Extrai espessura do código do material (ex: MDF15 -> 15)"""
-    match = re.search(r'(\d+)', material)
-    return float(match.group(1)) if match else 15.0
+# Acima disso a importação em lote não pré-gera miniaturas (ficam para a listagem)
+MAX_PREVIEWS_LOTE = 2000
+
+
+def aquecer_previews(peca_ids: List[int]):
+    """Gera as miniaturas padrão fora da requisição (listagem já abre com cache)"""
+    from app.database import SessionLocal
+    from app.generators.preview import GeradorPreview
+    
+    db = SessionLocal()
+    try:
+        gerador = GeradorPreview()
+        geradas = 0
+        # IN em blocos: SQLite limita o número de parâmetros por consulta
+        for inicio in range(0, len(peca_ids), 500):
+            bloco = peca_ids[inicio:inicio + 500]
+            for peca_db in db.query(PecaDB).filter(PecaDB.id.in_(bloco)).yield_per(50):
+                try:
+                    gerador.gerar(*peca_db_para_pdf(peca_db))
+                    geradas += 1
+                except Exception as e:
+                    logger.warning("⚠️ Miniatura da peça %s não gerada: %s", peca_db.id, e)
+        logger.info("🖼️ %d miniaturas pré-geradas", geradas)
+    finally:
+        db.close()
+
+
+def gravar_lote(db: Session, produto_id: int, lote: List[LinhaPeca]) -> Tuple[int, int]:
+    """
+    Upsert de um lote de linhas nas peças do produto: uma consulta para as
+    existentes, um UPDATE e um INSERT em massa. Devolve (criadas, atualizadas).
+    """
+    por_codigo = {linha.codigo: linha for linha in lote}  # código repetido: vale a última linha
+    existentes = dict(
+        db.query(PecaDB.codigo, PecaDB.id).filter(PecaDB.produto_id == produto_id,
+                                                  PecaDB.codigo.in_(list(por_codigo)))
+    )
+
+    novas, atualizadas = [], []
+    for codigo, linha in por_codigo.items():
+        campos = {
+            'nome': linha.nome,
+            'material': linha.material,
+            'comprimento': linha.comprimento,
+            'largura': linha.largura,
+            'espessura': linha.espessura,
+        }
+        peca_id = existentes.get(codigo)
+        if peca_id is not None:
+            atualizadas.append({'id': peca_id, **campos})
+        else:
+            novas.append({'produto_id': produto_id, 'codigo': codigo, 'quantidade': 1, 'alerta': False, **campos})
+
+    if novas:
+        db.execute(insert(PecaDB), novas)
+    if atualizadas:
+        db.execute(update(PecaDB), atualizadas)  # UPDATE em massa pela chave primária
+    db.flush()
+    return len(novas), len(existentes)
+
+
+def importar_planilha(db: Session, arquivo, nome_arquivo: str, codigo_produto: str,
+                      nome_produto: Optional[str]) -> dict:
+    """Lê a planilha em lotes e grava cada lote ao chegar; um commit no final"""
+    produto = None
+    pecas_criadas = 0
+    linhas = 0
+    for lote in ler_pecas(arquivo, nome_arquivo):
+        if produto is None:
+            # Família (nome do produto) da primeira linha
+            familia_produto = lote[0].familia
+            produto = db.query(Produto).filter(Produto.codigo == codigo_produto).first()
+            if not produto:
+                produto = Produto(
+                    codigo=codigo_produto,
+                    nome=familia_produto or nome_produto or f"Produto {codigo_produto}"
+                )
+                db.add(produto)
+                db.flush()
+            elif familia_produto:
+                # Atualizar nome com a família (sempre)
+                produto.nome = familia_produto
+        pecas_criadas += gravar_lote(db, produto.id, lote)[0]
+        linhas += len(lote)
 
-def converter_numero(valor):
-    if pd.isna(valor):
-        return 0
-    if isinstance(valor, (int, float)):
-        return float(valor)
-    # Tratar string com vírgula como decimal
-    return float(str(valor).strip().replace(',', '.'))
+    if produto is None:
+        # Planilha só com cabeçalho: produto criado sem peças, como antes
+        produto = db.query(Produto).filter(Produto.codigo == codigo_produto).first()
+        if not produto:
+            produto = Produto(codigo=codigo_produto, nome=nome_produto or f"Produto {codigo_produto}")
+            db.add(produto)
 
+    db.commit()
+    db.refresh(produto)
+    logger.info("📥 %s: %d linhas, %d peças novas (produto %s)", nome_arquivo, linhas, pecas_criadas,
+                produto.codigo)
+    return {
+        "success": True,
+        "message": f"{pecas_criadas} peças importadas com sucesso!",
+        "produto_id": produto.id,
+        "codigo_produto": produto.codigo
+    }
 
 
 @router.post("/importar", response_model=dict)
 async def importar_pecas(
+    background_tasks: BackgroundTasks,
     codigo_produto: str = Form(...),
     nome_produto: str = Form(None),
     file: UploadFile = File(...),
@@ -38,6 +135,8 @@ async def importar_pecas(
 ):
     """
     Importa peças do Excel ou CSV do CargaMaquina
+    (lido em lotes direto do arquivo do upload, fora do event loop;
+    miniaturas das peças são pré-geradas em segundo plano)
     """
     
     # Validar arquivo
@@ -46,122 +145,173 @@ async def importar_pecas(
         raise HTTPException(status_code=400, detail="Arquivo deve ser Excel (.xlsx, .xls) ou CSV (.csv)")
     
     try:
-        # Ler arquivo
-        contents = await file.read()
-        
-        # Detectar tipo e ler adequadamente
-        if file.filename.lower().endswith('.csv'):
-            # Tentar diferentes encodings para CSV
-            for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                try:
-                    df = pd.read_csv(io.BytesIO(contents), encoding=encoding, sep=None, engine='python')
-                    break
-                except:
-                    continue
-            else:
-                raise HTTPException(status_code=400, detail="Não foi possível ler o CSV. Verifique o encoding.")
-        else:
-            # Excel - tentar diferentes engines
-            try:
-                df = pd.read_excel(io.BytesIO(contents), engine='openpyxl')
-            except:
-                try:
-                    df = pd.read_excel(io.BytesIO(contents), engine='xlrd')
-                except:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail="Arquivo Excel corrompido. Abra no Excel, salve como novo arquivo e tente novamente."
-                    )
-
-        # Remove última linha (informações desnecessárias)
-        df = df[:-1]
-        
-        # Validar colunas necessárias
-        colunas_necessarias = ['Peça', 'Material', 'C', 'L', 'Cod. Peça', 'Família']
-        colunas_faltando = [col for col in colunas_necessarias if col not in df.columns]
-        
-        if colunas_faltando:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Colunas faltando no arquivo: {', '.join(colunas_faltando)}"
-            )
-        
-        # Pegar família (nome do produto) da primeira linha
-        familia_produto = None
-        if len(df) > 0 and 'Família' in df.columns:
-            familia_produto = str(df.iloc[0]['Família']).strip() if pd.notna(df.iloc[0]['Família']) else None
-
-        # Criar ou buscar produto
-        produto = db.query(Produto).filter(Produto.codigo == codigo_produto).first()
-
-        if not produto:
-            produto = Produto(
-                codigo=codigo_produto,
-                nome=familia_produto or nome_produto or f"Produto {codigo_produto}"
-            )
-            db.add(produto)
-            db.commit()
-            db.refresh(produto)
-        else:
-            # Atualizar nome com a família (sempre)
-            if familia_produto:
-                produto.nome = familia_produto
-                db.commit()
-                db.refresh(produto)
-        
-        # Processar peças
-        pecas_criadas = 0        
-        for _, row in df.iterrows():
-            # Extrair dados
-            codigo_peca = str(int(float(row['Cod. Peça']))).strip()
-            nome_peca = str(row['Peça']).strip()
-            material = str(row['Material']).strip()
-            comprimento = converter_numero(row['C'])
-            largura = converter_numero(row['L'])
-            espessura = extrair_espessura(material)
-            
-            # Verificar se peça já existe
-            peca_existente = db.query(PecaDB).filter(
-                PecaDB.produto_id == produto.id,
-                PecaDB.codigo == codigo_peca
-            ).first()
-            
-            if peca_existente:
-                # Atualizar
-                peca_existente.nome = nome_peca
-                peca_existente.material = material
-                peca_existente.comprimento = comprimento
-                peca_existente.largura = largura
-                peca_existente.espessura = espessura
-            else:
-                # Criar nova
-                nova_peca = PecaDB(
-                    produto_id=produto.id,
-                    codigo=codigo_peca,
-                    nome=nome_peca,
-                    material=material,
-                    comprimento=comprimento,
-                    largura=largura,
-                    espessura=espessura,
-                )
-                db.add(nova_peca)
-                pecas_criadas += 1
-        
-        db.commit()
-        
-        return {
-            "success": True,
-            "message": f"{pecas_criadas} peças importadas com sucesso!",
-            "produto_id": produto.id,
-            "codigo_produto": produto.codigo
-        }
-        
-    except HTTPException:
-        raise
+        resultado = await run_in_threadpool(importar_planilha, db, file.file, file.filename,
+                                            codigo_produto, nome_produto)
+    except PlanilhaInvalida as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao importar: {str(e)}")
     
+    ids = [peca_id for (peca_id,) in db.query(PecaDB.id).filter(PecaDB.produto_id == resultado["produto_id"])]
+    background_tasks.add_task(aquecer_previews, ids)
+    
+    return resultado
+    
+def codigo_do_grupo(valor: str) -> str:
+    """
+    Código do produto (até 20 caracteres) a partir do valor do grupo: o próprio
+    valor se couber, senão prefixo + hash curto (estável entre importações)
+    """
+    codigo = re.sub(r'\s+', ' ', valor.strip()).upper()
+    if len(codigo) <= 20:
+        return codigo
+    # Sem separador sobrando antes do hash ("HOME_2.2 -" -> "HOME_2.2")
+    prefixo = re.sub(r'[\s._-]+$', '', codigo[:11])
+    return f"{prefixo}-{hashlib.sha1(codigo.encode('utf-8')).hexdigest()[:8].upper()}"
+
+
+def _buscar_produtos(db: Session, grupos: Dict[str, List[LinhaPeca]],
+                     codigos: Dict[str, str]) -> Dict[str, Optional[Produto]]:
+    """
+    Produto já cadastrado de cada grupo novo: pelo código (informado em
+    `codigos` ou derivado do grupo) e, se não houver, pelo nome, que o
+    /pecas/importar grava com a Família (ou o próprio valor do grupo).
+    Uma consulta por critério para o lote inteiro.
+    """
+    por_codigo = {p.codigo: p for p in db.query(Produto).filter(Produto.codigo.in_(list(codigos.values())))}
+    encontrados = {grupo: por_codigo.get(codigo) for grupo, codigo in codigos.items()}
+
+    nomes = {grupo: {grupos[grupo][0].familia or grupo, grupo}
+             for grupo, produto in encontrados.items() if produto is None}
+    if nomes:
+        por_nome: Dict[str, Produto] = {}
+        todos = set().union(*nomes.values())
+        # Mais de um produto com o mesmo nome: fica o mais antigo
+        for produto in db.query(Produto).filter(Produto.nome.in_(list(todos))).order_by(Produto.id.desc()):
+            por_nome[produto.nome] = produto
+        for grupo in nomes:
+            familia = grupos[grupo][0].familia or grupo
+            encontrados[grupo] = por_nome.get(familia) or por_nome.get(grupo)
+    return encontrados
+
+
+def importar_planilha_lote(db: Session, arquivo, nome_arquivo: str, coluna_grupo: str,
+                           codigos: Dict[str, str]) -> dict:
+    """
+    Uma planilha com vários produtos: linhas agrupadas por `coluna_grupo`,
+    produtos e peças criados/atualizados em lotes e um único commit no final
+    """
+    produtos: Dict[str, Produto] = {}   # valor do grupo -> produto
+    contagem: Dict[str, Dict] = {}
+    for lote in ler_pecas(arquivo, nome_arquivo, coluna_grupo=coluna_grupo):
+        grupos: Dict[str, List[LinhaPeca]] = {}
+        for linha in lote:
+            grupos.setdefault(linha.grupo, []).append(linha)
+
+        # Produtos que apareceram agora: busca e flush para todos de uma vez
+        novos = {grupo: codigos.get(grupo) or codigo_do_grupo(grupo) for grupo in grupos if grupo not in produtos}
+        if novos:
+            existentes = _buscar_produtos(db, grupos, novos)
+            criados_agora: Dict[str, Produto] = {}
+            for grupo, codigo in novos.items():
+                nome = grupos[grupo][0].familia or grupo
+                produto = existentes[grupo] or criados_agora.get(codigo)
+                if produto is None:
+                    produto = Produto(codigo=codigo, nome=nome)
+                    db.add(produto)
+                    criados_agora[codigo] = produto
+                    criado = True
+                else:
+                    # Atualizar nome com a família (sempre)
+                    produto.nome = nome
+                    criado = produto in db.new
+                produtos[grupo] = produto
+                contagem.setdefault(produto.codigo, {'linhas': 0, 'pecas_criadas': 0, 'pecas_atualizadas': 0,
+                                                     'produto_criado': criado, 'grupo': grupo})
+            db.flush()
+
+        for grupo, linhas in grupos.items():
+            produto = produtos[grupo]
+            criadas, atualizadas = gravar_lote(db, produto.id, linhas)
+            resumo = contagem[produto.codigo]
+            resumo['linhas'] += len(linhas)
+            resumo['pecas_criadas'] += criadas
+            resumo['pecas_atualizadas'] += atualizadas
+
+    if not produtos:
+        raise PlanilhaInvalida("Nenhuma peça na planilha")
+
+    db.commit()
+    por_codigo = {p.codigo: p for p in produtos.values()}
+    resultado = [
+        {'produto_id': por_codigo[codigo].id, 'codigo_produto': codigo, 'nome': por_codigo[codigo].nome, **resumo}
+        for codigo, resumo in contagem.items()
+    ]
+    criadas = sum(r['pecas_criadas'] for r in resultado)
+    logger.info("📥 %s: %d produtos por '%s', %d peças novas", nome_arquivo, len(resultado),
+                coluna_grupo, criadas)
+    return {
+        "success": True,
+        "message": f"{len(resultado)} produtos, {criadas} peças importadas com sucesso!",
+        "agrupado_por": coluna_grupo,
+        "total_produtos_criados": sum(1 for r in resultado if r['produto_criado']),
+        "total_pecas_criadas": criadas,
+        "total_pecas_atualizadas": sum(r['pecas_atualizadas'] for r in resultado),
+        "produtos": resultado,
+    }
+
+
+@router.post("/importar-lote", response_model=dict)
+async def importar_pecas_lote(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    agrupar_por: str = Form("Família"),
+    codigos: str = Form("{}"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Importa uma planilha do CargaMaquina com vários produtos de uma vez
+
+    - agrupar_por: coluna que separa os produtos (padrão Família)
+    - codigos: JSON opcional {valor do grupo: código do produto}; sem ele o
+      código é o próprio valor (ou prefixo + hash quando passa de 20 caracteres)
+
+    Tudo numa transação; devolve as contagens por produto.
+    """
+    extensoes_validas = ('.xlsx', '.xls', '.csv')
+    if not file.filename.lower().endswith(extensoes_validas):
+        raise HTTPException(status_code=400, detail="Arquivo deve ser Excel (.xlsx, .xls) ou CSV (.csv)")
+
+    try:
+        mapa_codigos = json.loads(codigos) if codigos else {}
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="codigos deve ser um JSON {grupo: código}")
+    if not isinstance(mapa_codigos, dict) or any(len(str(c)) > 20 for c in mapa_codigos.values()):
+        raise HTTPException(status_code=400, detail="codigos deve ser um JSON {grupo: código} (até 20 caracteres)")
+    mapa_codigos = {str(g).strip(): str(c).strip() for g, c in mapa_codigos.items()}
+
+    try:
+        resultado = await run_in_threadpool(importar_planilha_lote, db, file.file, file.filename,
+                                            agrupar_por.strip(), mapa_codigos)
+    except PlanilhaInvalida as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao importar: {str(e)}")
+
+    total_pecas = resultado['total_pecas_criadas'] + resultado['total_pecas_atualizadas']
+    if total_pecas <= MAX_PREVIEWS_LOTE:
+        produto_ids = [r['produto_id'] for r in resultado['produtos']]
+        ids = [peca_id for (peca_id,) in db.query(PecaDB.id).filter(PecaDB.produto_id.in_(produto_ids))]
+        background_tasks.add_task(aquecer_previews, ids)
+
+    return resultado
+
+
 @router.put("/{peca_id}/salvar", response_model=PecaResponse)
 async def salvar_peca(
     peca_id: int,
@@ -201,11 +351,9 @@ async def salvar_peca(
     peca.alerta = alerta.lower() == 'true'
     peca.observacoes = observacoes      
     
-    print(f"💾 Salvando peça {peca_id}:")
-    print(f"   Dimensões: {largura}x{comprimento}x{espessura}")
-    print(f"   Furos: {peca.furos}")
-    print(f"   Bordas: {peca.bordas}")
-    print(f"   Transformação: {peca.transformacao}")
+    logger.info("💾 Salvando peça %s (%sx%sx%s)", peca_id, largura, comprimento, espessura)
+    logger.debug("   Furos: %s | Bordas: %s | Transformação: %s",
+                 peca.furos, peca.bordas, peca.transformacao)
     
     db.commit()
     db.refresh(peca)
@@ -227,4 +375,44 @@ def listar_pecas_produto(
     
     pecas = db.query(PecaDB).filter(PecaDB.produto_id == produto.id).order_by(PecaDB.codigo).all()
     
-    return pecas
\ No newline at end of file
+    return pecas
+
+
+@router.get("/{peca_id}/preview")
+def preview_peca(
+    peca_id: int,
+    formato: str = "png",
+    largura: int = 320,
+    altura: int = 240,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Miniatura da vista principal (PNG ou SVG) que cabe em largura x altura px.
+    ETag = hash do conteúdo da peça; If-None-Match igual responde 304.
+    """
+    from app.generators.preview import GeradorPreview, FORMATOS
+    
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail=f"Formato deve ser {' ou '.join(FORMATOS)}")
+    
+    peca_db = db.query(PecaDB).filter(PecaDB.id == peca_id).first()
+    if not peca_db:
+        raise HTTPException(status_code=404, detail="Peça não encontrada")
+    
+    peca_obj, dados_adicionais = peca_db_para_pdf(peca_db)
+    gerador = GeradorPreview()
+    
+    etag = f'"{gerador.chave(peca_obj, dados_adicionais, formato, largura, altura)}"'
+    cabecalhos = {'ETag': etag, 'Cache-Control': 'private, max-age=300'}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=cabecalhos)
+    
+    try:
+        _, conteudo = gerador.gerar(peca_obj, dados_adicionais, formato, largura, altura)
+    except Exception as e:
+        logger.exception("❌ Erro ao gerar miniatura da peça %s: %s", peca_id, e)
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar miniatura: {str(e)}")
+    
+    return Response(content=conteudo, media_type=FORMATOS[formato], headers=cabecalhos)
@@ -4,18 +4,29 @@ CoreWood API - Rotas para Parser STEP com pythonOCC
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, List
 import tempfile
 import os
 import re
 import io
-import zipfile
+import logging
+import time
 
-from ..parser.step_parser_occ import parse_step_occ
 from ..generators.mpr_generator import GeradorMPR
+from ..generators.lote_mpr import escrever_zip_mprs
 from ..core.auth import get_current_active_user
 from ..models.user import User
 
+logger = logging.getLogger(__name__)
+
+
+def parse_step_occ(*args, **kwargs):
+    """pythonOCC carregado na primeira requisição, não quando o worker sobe"""
+    from ..parser.step_parser_occ import parse_step_occ as _parse_step_occ
+    return _parse_step_occ(*args, **kwargs)
+
+
 router = APIRouter(
     prefix="/api/step",
     tags=["STEP (pythonOCC)"]
@@ -81,8 +92,7 @@ async def parse_step_occ_endpoint(
                 os.unlink(tmp_path)
     
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Erro ao processar STEP: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao processar STEP: {str(e)}"
@@ -166,7 +176,9 @@ async def step_to_mpr_occ(
         
         try:
             # Parse
+            inicio = time.perf_counter()
             dados = parse_step_occ(filepath=tmp_path, debug=False)
+            parse_ms = (time.perf_counter() - inicio) * 1000
             pecas = dados.get("pecas", [])
             
             if not pecas:
@@ -180,7 +192,7 @@ async def step_to_mpr_occ(
                 nome = peca.get("nome", "peca")
                 nome_limpo = re.sub(r'[^\w\s-]', '', nome).strip().replace(' ', '_')
                 
-                mpr_content = gerador.gerar_mpr({
+                mpr_content = gerador.gerar_mpr_bytes({
                     "largura": peca["largura"],
                     "comprimento": peca["comprimento"],
                     "espessura": peca["espessura"],
@@ -188,37 +200,25 @@ async def step_to_mpr_occ(
                 })
                 
                 return Response(
-                    content=mpr_content.encode('cp1252', errors='replace'),
+                    content=mpr_content,
                     media_type='application/octet-stream',
                     headers={
                         'Content-Disposition': f'attachment; filename="{nome_limpo}.mpr"'
                     }
                 )
             
-            # Múltiplas peças: retorna ZIP
+            # Múltiplas peças: retorna ZIP (MPRs gerados em paralelo + manifesto.json)
             zip_buffer = io.BytesIO()
-            
-            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-                for idx, peca in enumerate(pecas, start=1):
-                    nome = peca.get("nome", f"peca_{idx}")
-                    nome_limpo = re.sub(r'[^\w\s-]', '', nome).strip().replace(' ', '_')
-                    
-                    mpr_content = gerador.gerar_mpr({
-                        "largura": peca["largura"],
-                        "comprimento": peca["comprimento"],
-                        "espessura": peca["espessura"],
-                        "furos": peca.get("furos", [])
-                    })
-                    
-                    zipf.writestr(f"{nome_limpo}.mpr", mpr_content.encode('cp1252', errors='replace'))
-            
+            manifesto = await run_in_threadpool(escrever_zip_mprs, pecas, zip_buffer, None, parse_ms)
             zip_buffer.seek(0)
             
             return StreamingResponse(
                 zip_buffer,
                 media_type="application/zip",
                 headers={
-                    "Content-Disposition": f"attachment; filename={file.filename.rsplit('.', 1)[0]}_mprs.zip"
+                    "Content-Disposition": f"attachment; filename={file.filename.rsplit('.', 1)[0]}_mprs.zip",
+                    "X-Pack-Pecas": str(len(manifesto["pecas"])),
+                    "X-Pack-Falhas": str(len(manifesto["falhas"]))
                 }
             )
         
@@ -229,8 +229,7 @@ async def step_to_mpr_occ(
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Erro ao converter STEP para MPR: %s", e)
         raise HTTPException(status_code=500, detail=f"Erro ao converter STEP para MPR: {str(e)}")
 
 
@@ -277,6 +276,5 @@ async def step_to_json_occ(
                 os.unlink(tmp_path)
     
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Erro ao converter STEP para JSON: %s", e)
         raise HTTPException(status_code=500, detail=f"Erro ao converter STEP para JSON: {str(e)}")
\ No newline at end of file
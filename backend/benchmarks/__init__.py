@@ -0,0 +1,24 @@
+"""
+Benchmarks reproduzíveis sobre o corpus de exemplo (zDocs)
+
+Roda a partir de backend/:
+    python -m benchmarks                                # todas as etapas
+    python -m benchmarks -e parse_furacao -e gerar_mpr  # só algumas
+    python -m benchmarks --salvar benchmarks/baseline.json
+    python -m benchmarks --comparar benchmarks/baseline.json
+
+Cada etapa mede o tempo por item (arquivo, peça ou requisição) com os
+caches do app zerados antes de cada item, e reporta vazão, p50/p95 e pico
+de RSS. As etapas de rota usam o TestClient do FastAPI (precisa do httpx,
+ver benchmarks/requirements.txt) com um SQLite temporário no lugar do
+Postgres; sem httpx elas aparecem como puladas.
+
+Para entradas maiores que as do zDocs, benchmarks.sintetico gera um
+corpus com montagens de qualquer tamanho (python -m benchmarks.sintetico -h).
+
+Carga HTTP com usuários simultâneos contra a API rodando de verdade
+(latência por rota, erros e atraso do event loop): python -m benchmarks.carga -h
+
+Orçamento de inicialização do worker (import de app.main sem pandas,
+ReportLab ou pythonOCC): python -m benchmarks.inicializacao
+"""
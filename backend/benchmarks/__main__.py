@@ -0,0 +1,160 @@
+"""
+Executa os benchmarks: python -m benchmarks --help (a partir de backend/)
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Antes de qualquer import do app: banco SQLite descartável e logs só de aviso
+_pasta_banco = tempfile.mkdtemp(prefix="corewood_bench_")
+atexit.register(shutil.rmtree, _pasta_banco, ignore_errors=True)
+os.environ.setdefault("DATABASE_URL",
+                      f"sqlite:///{_pasta_banco}/corewood_bench.db?check_same_thread=false")
+os.environ.setdefault("COREWOOD_LOG_LEVEL", "WARNING")
+
+from .etapas import CORPUS_PADRAO, encerrar, etapas  # noqa: E402
+from .medicao import EtapaIndisponivel, ResultadoEtapa, medir  # noqa: E402
+
+VERSAO_FORMATO = 1
+
+# Métrica -> True se maior é melhor
+METRICAS_COMPARADAS = {'p50_ms': False, 'p95_ms': False, 'vazao_por_s': True, 'pico_rss_mb': False}
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _formatar(valor, casas: int = 1) -> str:
+    return "-" if valor is None else f"{valor:.{casas}f}"
+
+
+def imprimir(resultados: List[ResultadoEtapa]):
+    cabecalho = f"{'etapa':<34}{'itens':>6}{'amostras':>9}{'p50 ms':>10}{'p95 ms':>10}" \
+                f"{'itens/s':>10}{'MB/s':>8}{'RSS MB':>9}{'erros':>7}"
+    print(cabecalho)
+    print("-" * len(cabecalho))
+    for resultado in resultados:
+        if resultado.pulada:
+            print(f"{resultado.nome:<34}  pulada: {resultado.pulada}")
+            continue
+        r = resultado.resumo()
+        print(f"{resultado.nome:<34}{r['itens']:>6}{r['amostras']:>9}{_formatar(r['p50_ms'], 2):>10}"
+              f"{_formatar(r['p95_ms'], 2):>10}{_formatar(r['vazao_por_s']):>10}"
+              f"{_formatar(r['mb_por_s'], 2):>8}{_formatar(r['pico_rss_mb']):>9}{len(r['erros']):>7}")
+    for resultado in resultados:
+        for item, erro in resultado.erros.items():
+            print(f"⚠️ {resultado.nome} / {item}: {erro}")
+
+
+def comparar(atual: Dict, base: Dict, limiar: float) -> List[str]:
+    """Imprime a variação por etapa e devolve as regressões acima do limiar (%)"""
+    regressoes = []
+    print(f"\nComparação com {base.get('commit') or '?'} ({base.get('gerado_em')}), limiar {limiar:.0f}%")
+    for nome, resumo in atual['etapas'].items():
+        anterior = base.get('etapas', {}).get(nome)
+        if not anterior or resumo.get('pulada') or anterior.get('pulada'):
+            continue
+        partes = []
+        for metrica, maior_melhor in METRICAS_COMPARADAS.items():
+            antes, agora = anterior.get(metrica), resumo.get(metrica)
+            if not antes or agora is None:
+                continue
+            variacao = (agora - antes) / antes * 100
+            piora = -variacao if maior_melhor else variacao
+            marca = ""
+            if piora > limiar:
+                marca = " ⚠️"
+                regressoes.append(f"{nome}.{metrica}: {antes} -> {agora} ({variacao:+.1f}%)")
+            partes.append(f"{metrica} {variacao:+.1f}%{marca}")
+        print(f"  {nome:<34}{' | '.join(partes)}")
+    return regressoes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Benchmarks do backend sobre o corpus zDocs")
+    parser.add_argument("-e", "--etapa", action="append", dest="etapas",
+                        help="Roda só esta etapa (pode repetir)")
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PADRAO, help="Pasta com .step/.mpr/.csv")
+    parser.add_argument("-n", "--repeticoes", type=int, default=5, help="Passadas medidas (padrão 5)")
+    parser.add_argument("--aquecimento", type=int, default=1, help="Passadas descartadas (padrão 1)")
+    parser.add_argument("--salvar", type=Path, help="Grava o resultado em JSON (baseline)")
+    parser.add_argument("--comparar", type=Path, help="JSON de um resultado anterior")
+    parser.add_argument("--limiar", type=float, default=20.0,
+                        help="Piora em %% que conta como regressão no --comparar (padrão 20)")
+    parser.add_argument("--listar", action="store_true", help="Lista as etapas e sai")
+    args = parser.parse_args(argv)
+
+    try:
+        disponiveis = etapas(args.corpus)
+    except EtapaIndisponivel as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    if args.listar:
+        for etapa in disponiveis:
+            print(f"{etapa.nome:<34}{etapa.descricao}")
+        return 0
+
+    if args.etapas:
+        desconhecidas = set(args.etapas) - {etapa.nome for etapa in disponiveis}
+        if desconhecidas:
+            print(f"❌ Etapas desconhecidas: {', '.join(sorted(desconhecidas))} (veja --listar)",
+                  file=sys.stderr)
+            return 2
+        disponiveis = [etapa for etapa in disponiveis if etapa.nome in args.etapas]
+
+    resultados = []
+    try:
+        for etapa in disponiveis:
+            print(f"⏱️ {etapa.nome}...", file=sys.stderr, flush=True)
+            resultados.append(medir(etapa, args.repeticoes, args.aquecimento))
+    finally:
+        encerrar()
+
+    imprimir(resultados)
+
+    saida = {
+        'versao': VERSAO_FORMATO,
+        'gerado_em': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'corpus': str(args.corpus),
+        'repeticoes': args.repeticoes,
+        'aquecimento': args.aquecimento,
+        'ambiente': {k: v for k, v in sorted(os.environ.items()) if k.startswith("COREWOOD_")},
+        'etapas': {resultado.nome: resultado.resumo() for resultado in resultados},
+    }
+
+    if args.salvar:
+        args.salvar.parent.mkdir(parents=True, exist_ok=True)
+        args.salvar.write_text(json.dumps(saida, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 Resultado salvo em {args.salvar}")
+
+    if args.comparar:
+        base = json.loads(args.comparar.read_text(encoding="utf-8"))
+        regressoes = comparar(saida, base, args.limiar)
+        if regressoes:
+            print("\n⚠️ Regressões:\n  " + "\n  ".join(regressoes))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
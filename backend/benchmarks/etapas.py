@@ -0,0 +1,321 @@
+"""
+Etapas medidas, todas sobre os arquivos do corpus (zDocs por padrão)
+
+- step_parse:      StepMultiPartParser(...).parse() por arquivo .step
+- step_parse_occ:  parse_step_occ por arquivo .step (só com pythonOCC)
+- parse_furacao:   parse_furacao por arquivo .mpr
+- gerar_mpr:       GeradorMPR.gerar_mpr por peça (peças dos STEP e dos MPR)
+- gerar_pdf:       GeradorDesenhoTecnico.gerar_pdf por peça dos MPR
+- importar_csv:    leitura + conversão do CSV do CargaMaquina (sem banco)
+- rota_*:          rotas de lote (ZIP), MPR regravado e importação pelo TestClient
+
+Os imports do app ficam dentro das funções: o DATABASE_URL do SQLite
+temporário precisa estar definido antes de app.database ser importado.
+"""
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .medicao import Etapa, EtapaIndisponivel, Item
+
+CORPUS_PADRAO = Path(__file__).resolve().parents[2] / "zDocs"
+CODIGO_PRODUTO = "BENCH"
+
+_cliente = None
+
+
+def arquivos(corpus: Path, *extensoes: str) -> List[Path]:
+    """Arquivos do corpus com as extensões (sem diferenciar maiúsculas), em ordem"""
+    return sorted(p for p in corpus.rglob("*")
+                  if p.is_file() and p.suffix.lower() in extensoes)
+
+
+def _nome(corpus: Path, caminho: Path) -> str:
+    return caminho.relative_to(corpus).as_posix()
+
+
+def zerar_caches():
+    """Caches de conteúdo do app (cada item é medido a frio)"""
+    from app.generators.mpr_generator import cache_mpr
+    from app.generators.pdf_generator import cache_distribuicao, cache_geometria, cache_layout
+    from app.generators.preview import cache_previews
+    from app.parser.mpr_parser import cache_parse
+
+    for cache in (cache_parse, cache_mpr, cache_geometria, cache_distribuicao,
+                  cache_layout, cache_previews):
+        cache.limpar()
+
+
+# ----------------------------------------------------------------------
+# Entradas
+# ----------------------------------------------------------------------
+def _steps(corpus: Path) -> List[Item]:
+    return [Item(_nome(corpus, p), p.read_bytes().decode("utf-8", errors="ignore"), p.stat().st_size)
+            for p in arquivos(corpus, ".step", ".stp")]
+
+
+def _steps_occ(corpus: Path) -> List[Item]:
+    try:
+        import OCC.Core.STEPControl  # noqa: F401
+    except ImportError:
+        raise EtapaIndisponivel("pythonOCC não instalado")
+    return _steps(corpus)
+
+
+def _mprs(corpus: Path) -> List[Item]:
+    return [Item(_nome(corpus, p), p.read_bytes(), p.stat().st_size)
+            for p in arquivos(corpus, ".mpr")]
+
+
+def _pecas_mpr(corpus: Path, expandir_padroes: bool = False) -> List[Item]:
+    """Peças (Peca) lidas dos .mpr do corpus; arquivo que não lê fica de fora"""
+    from app.parser.mpr_parser import parse_furacao
+
+    itens = []
+    for item in _mprs(corpus):
+        try:
+            peca = parse_furacao(item.entrada, Path(item.nome).stem, expandir_padroes=expandir_padroes)
+        except Exception:
+            continue
+        itens.append(Item(item.nome, peca))
+    return itens
+
+
+def _dados_mpr(corpus: Path) -> List[Item]:
+    """(peca_data, inverter_y) das peças dos STEP e dos MPR"""
+    from app.generators.lote_mpr import dados_mpr
+    from app.generators.mpr_generator import GeradorMPR
+    from app.parser.step_parser import parse_step_multipart
+
+    itens = []
+    for item in _steps(corpus):
+        try:
+            pecas = parse_step_multipart(item.entrada)["pecas"]
+        except Exception:
+            continue
+        for i, peca in enumerate(pecas, start=1):
+            itens.append(Item(f"{item.nome}#{peca.get('nome') or i}", (dados_mpr(peca), True)))
+
+    gerador = GeradorMPR()
+    for item in _pecas_mpr(corpus):
+        # Peças de MPR já estão com o Y do WoodWop
+        itens.append(Item(item.nome, (gerador._dados_peca(item.entrada, False), False)))
+    return itens
+
+
+def _csvs(corpus: Path) -> List[Item]:
+    return [Item(_nome(corpus, p), p.read_bytes(), p.stat().st_size)
+            for p in arquivos(corpus, ".csv")]
+
+
+# ----------------------------------------------------------------------
+# Execução
+# ----------------------------------------------------------------------
+def _parse_step(conteudo: str):
+    from app.parser.step_parser import StepMultiPartParser
+    return StepMultiPartParser(conteudo).parse()
+
+
+def _parse_step_occ(conteudo: str):
+    from app.parser.step_parser_occ import parse_step_occ
+    return parse_step_occ(content=conteudo)
+
+
+def _parse_mpr(conteudo: bytes):
+    from app.parser.mpr_parser import parse_furacao
+    return parse_furacao(conteudo)
+
+
+def _gerar_mpr(entrada):
+    from app.generators.mpr_generator import GeradorMPR
+    peca_data, inverter_y = entrada
+    return GeradorMPR().gerar_mpr(peca_data, inverter_y)
+
+
+def _gerar_pdf(peca):
+    from app.generators.pdf_generator import GeradorDesenhoTecnico
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        caminho = tmp.name
+    try:
+        GeradorDesenhoTecnico().gerar_pdf(peca, caminho, {})
+    finally:
+        os.remove(caminho)
+
+
+def _converter_csv(conteudo: bytes) -> int:
+    """Mesma leitura e conversão de linhas do POST /pecas/importar, sem o banco"""
+    from app.parser.carga_maquina import ler_pecas
+
+    return sum(len(lote) for lote in ler_pecas(io.BytesIO(conteudo), "planilha.csv"))
+
+
+# ----------------------------------------------------------------------
+# Rotas (TestClient + SQLite)
+# ----------------------------------------------------------------------
+def cliente():
+    """TestClient do app com usuário fixo; sobe o app (startup) na primeira chamada"""
+    global _cliente
+    if _cliente is None:
+        try:
+            from fastapi.testclient import TestClient
+        except (ImportError, RuntimeError):  # starlette levanta RuntimeError sem httpx
+            raise EtapaIndisponivel("httpx não instalado (pip install -r benchmarks/requirements.txt)")
+        from app.core.auth import get_current_active_user
+        from app.main import app
+        from app.models.user import User
+
+        usuario = User(id=0, username="benchmark", email="benchmark@corewood.local",
+                       hashed_password="", is_active=True)
+        app.dependency_overrides[get_current_active_user] = lambda: usuario
+        _cliente = TestClient(app)
+        _cliente.__enter__()
+    return _cliente
+
+
+def encerrar():
+    """Desliga o app do TestClient (shutdown) se foi iniciado"""
+    global _cliente
+    if _cliente is not None:
+        _cliente.__exit__(None, None, None)
+        _cliente = None
+
+
+def _pecas_banco(corpus: Path) -> List[int]:
+    """Grava as peças dos .mpr num produto BENCH (recriado) e devolve os ids"""
+    from dataclasses import asdict
+
+    from app.database import SessionLocal
+    from app.models.peca_db import PecaDB
+    from app.models.produto import Produto
+
+    pecas = _pecas_mpr(corpus, expandir_padroes=True)
+    db = SessionLocal()
+    try:
+        antigo = db.query(Produto).filter(Produto.codigo == CODIGO_PRODUTO).first()
+        if antigo:
+            db.delete(antigo)
+            db.commit()
+        produto = Produto(codigo=CODIGO_PRODUTO, nome="Benchmark")
+        db.add(produto)
+        db.flush()
+
+        registros = []
+        for i, item in enumerate(pecas, start=1):
+            peca = item.entrada
+            # comprimento/largura do banco viram largura/comprimento do desenho
+            registros.append(PecaDB(
+                produto_id=produto.id, codigo=str(i), nome=peca.nome, material="MDF15",
+                comprimento=peca.dimensoes.largura, largura=peca.dimensoes.comprimento,
+                espessura=peca.dimensoes.espessura,
+                furos={'verticais': [asdict(f) for f in peca.furos_verticais],
+                       'horizontais': [asdict(f) for f in peca.furos_horizontais]},
+            ))
+        db.add_all(registros)
+        db.commit()
+        return [registro.id for registro in registros]
+    finally:
+        db.close()
+
+
+def _verificar(resposta):
+    if resposta.status_code >= 400:
+        raise RuntimeError(f"HTTP {resposta.status_code}: {resposta.text[:200]}")
+    return resposta
+
+
+def _pecas_banco_com_cliente(corpus: Path) -> List[int]:
+    cliente()  # cria as tabelas (import do app) antes de gravar
+    ids = _pecas_banco(corpus)
+    if not ids:
+        raise EtapaIndisponivel("nenhum .mpr legível no corpus")
+    return ids
+
+
+def _rota_lote_editor(corpus: Path, caminho: str) -> Etapa:
+    def carregar():
+        ids = _pecas_banco_com_cliente(corpus)
+        return [Item(f"{len(ids)} peças", ids)]
+
+    return Etapa(
+        f"rota_{caminho.strip('/').replace('/', '_').replace('-', '_')}",
+        f"POST {caminho} (ZIP com as peças dos .mpr gravadas no banco)", "requisição",
+        carregar, lambda ids: _verificar(cliente().post(caminho, json={'peca_ids': ids})),
+        zerar_caches,
+    )
+
+
+def _rotas(corpus: Path) -> List[Etapa]:
+    def steps():
+        cliente()
+        return [Item(item.nome, (Path(item.nome).name, item.entrada.encode("utf-8")), item.bytes)
+                for item in _steps(corpus)]
+
+    def mprs():
+        cliente()
+        return [Item(item.nome, (Path(item.nome).name, item.entrada), item.bytes) for item in _mprs(corpus)]
+
+    def lote_mprs():
+        cliente()
+        itens = _mprs(corpus)
+        arquivos_ = [("files", (Path(item.nome).name, item.entrada)) for item in itens]
+        return [Item(f"{len(itens)} arquivos", arquivos_, sum(item.bytes for item in itens))]
+
+    def csvs():
+        cliente()
+        return [Item(item.nome, (Path(item.nome).name, item.entrada), item.bytes) for item in _csvs(corpus)]
+
+    return [
+        Etapa("rota_step_to_mpr", "POST /step-to-mpr (ZIP com manifesto se houver várias peças)",
+              "arquivo", steps,
+              lambda arquivo: _verificar(cliente().post("/step-to-mpr", files={'file': arquivo})),
+              zerar_caches),
+        Etapa("rota_mpr_to_mpr", "POST /mpr-to-mpr (séries AN/AB/WI regravadas sem expandir)",
+              "arquivo", mprs,
+              lambda arquivo: _verificar(cliente().post("/mpr-to-mpr", files={'file': arquivo})),
+              zerar_caches),
+        Etapa("rota_generate_pdf_batch", "POST /generate-pdf-batch (todos os .mpr num ZIP de PDFs)",
+              "requisição", lote_mprs,
+              lambda arquivos_: _verificar(cliente().post(
+                  "/generate-pdf-batch", files=arquivos_,
+                  data={'configs': json.dumps([{}] * len(arquivos_))})),
+              zerar_caches),
+        _rota_lote_editor(corpus, "/editor/generate-mprs-batch"),
+        _rota_lote_editor(corpus, "/editor/generate-pdfs-batch"),
+        Etapa("rota_pecas_importar", "POST /pecas/importar (inclui as miniaturas em background)",
+              "arquivo", csvs,
+              lambda arquivo: _verificar(cliente().post(
+                  "/pecas/importar", files={'file': arquivo},
+                  data={'codigo_produto': f"BENCH-{Path(arquivo[0]).stem}"})),
+              zerar_caches),
+    ]
+
+
+def etapas(corpus: Optional[Path] = None) -> List[Etapa]:
+    """Todas as etapas, na ordem em que rodam"""
+    corpus = Path(corpus or CORPUS_PADRAO)
+    if not corpus.is_dir():
+        raise EtapaIndisponivel(f"corpus não encontrado: {corpus}")
+
+    return [
+        Etapa("step_parse", "StepMultiPartParser(...).parse()", "arquivo",
+              lambda: _steps(corpus), _parse_step, zerar_caches),
+        Etapa("step_parse_occ", "parse_step_occ (pythonOCC)", "arquivo",
+              lambda: _steps_occ(corpus), _parse_step_occ, zerar_caches),
+        Etapa("parse_furacao", "parse_furacao (.mpr)", "arquivo",
+              lambda: _mprs(corpus), _parse_mpr, zerar_caches),
+        Etapa("gerar_mpr", "GeradorMPR.gerar_mpr", "peça",
+              lambda: _dados_mpr(corpus), _gerar_mpr, zerar_caches),
+        Etapa("gerar_pdf", "GeradorDesenhoTecnico.gerar_pdf", "peça",
+              lambda: _pecas_mpr(corpus), _gerar_pdf, zerar_caches),
+        Etapa("importar_csv", "Leitura e conversão do CSV do CargaMaquina", "arquivo",
+              lambda: _csvs(corpus), _converter_csv),
+    ] + _rotas(corpus)
+
+
+def nomes() -> Dict[str, str]:
+    """nome -> descrição (para o --listar)"""
+    return {etapa.nome: etapa.descricao for etapa in etapas(CORPUS_PADRAO)}
@@ -0,0 +1,156 @@
+"""
+Orçamento de inicialização do worker web
+
+Importa app.main num processo novo com python -X importtime e confere:
+- tempo total do import (--orcamento-ms, padrão 600: cabe no orçamento do /health);
+- que nenhum módulo pesado foi carregado só para subir (pandas, ReportLab,
+  numpy, openpyxl, PIL, pythonOCC): eles devem ficar nas rotas que os usam;
+- com --servidor, o tempo até um uvicorn novo responder /health
+  (--orcamento-health-ms, padrão 750: o worker tem que estar no ar bem
+  antes de um segundo).
+
+A partir de backend/:
+    python -m benchmarks.inicializacao
+    python -m benchmarks.inicializacao --top 30 --servidor
+    python -m benchmarks.inicializacao --orcamento-ms 600 -n 5
+    python -m benchmarks.inicializacao --servidor --orcamento-health-ms 800
+
+Sai com código 1 se estourar o orçamento ou carregar algum módulo proibido.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PASTA_BACKEND = Path(__file__).resolve().parents[1]
+
+# Pacotes que o worker não deve importar para responder /health
+PROIBIDOS = ("pandas", "reportlab", "numpy", "openpyxl", "xlrd", "PIL", "OCC")
+
+LINHA_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _ambiente(pasta_banco: str) -> Dict[str, str]:
+    env = {**os.environ, 'COREWOOD_LOG_LEVEL': 'WARNING'}
+    env.setdefault('DATABASE_URL', f"sqlite:///{pasta_banco}/inicializacao.db?check_same_thread=false")
+    # Pool de MPR como numa máquina com vários núcleos: o que ele subir junto
+    # com a API entra na conta mesmo rodando com uma CPU só
+    env.setdefault('COREWOOD_MPR_WORKERS', '4')
+    return env
+
+
+def medir_import(env: Dict[str, str]) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """(ms de parede, [(módulo, self_us, cumulativo_us)]) do import de app.main"""
+    inicio = time.perf_counter()
+    processo = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                              cwd=PASTA_BACKEND, env=env, capture_output=True, text=True)
+    parede_ms = (time.perf_counter() - inicio) * 1000
+    if processo.returncode != 0:
+        raise RuntimeError(f"import app.main falhou:\n{processo.stderr[-2000:]}")
+    modulos = [(m.group(4), int(m.group(1)), int(m.group(2)))
+               for m in map(LINHA_IMPORTTIME.match, processo.stderr.splitlines()) if m]
+    return parede_ms, modulos
+
+
+def medir_health(env: Dict[str, str]) -> float:
+    """ms entre subir o uvicorn e o primeiro /health com 200"""
+    import httpx
+
+    from .carga import _porta_livre
+
+    porta = _porta_livre()
+    # Um cliente só, criado antes de subir: httpx.get monta cliente e contexto SSL
+    # a cada tentativa e disputa a CPU com o servidor que está subindo
+    with httpx.Client(timeout=1) as cliente:
+        inicio = time.perf_counter()
+        processo = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                                     "--port", str(porta), "--no-access-log"],
+                                    cwd=PASTA_BACKEND, env=env, stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL)
+        try:
+            while time.perf_counter() - inicio < 60:
+                if processo.poll() is not None:
+                    raise RuntimeError(f"uvicorn encerrou ao subir (código {processo.returncode})")
+                try:
+                    if cliente.get(f"http://127.0.0.1:{porta}/health").status_code == 200:
+                        return (time.perf_counter() - inicio) * 1000
+                except httpx.HTTPError:
+                    time.sleep(0.01)
+            raise RuntimeError("uvicorn não respondeu /health em 60s")
+        finally:
+            processo.terminate()
+            processo.wait(timeout=15)
+
+
+def por_pacote(modulos: Sequence[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Tempo próprio (us) somado por pacote de primeiro nível"""
+    soma = defaultdict(int)
+    for nome, proprio, _ in modulos:
+        soma[nome.split(".")[0]] += proprio
+    return dict(soma)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.inicializacao",
+                                     description="Tempo de import e de primeira resposta do worker web")
+    parser.add_argument("--orcamento-ms", type=float, default=600,
+                        help="Máximo para o import de app.main (mediana, padrão 600)")
+    parser.add_argument("-n", "--repeticoes", type=int, default=3,
+                        help="Imports (e subidas do servidor) medidos (padrão 3)")
+    parser.add_argument("--top", type=int, default=15, help="Pacotes mais caros listados (padrão 15)")
+    parser.add_argument("--servidor", action="store_true",
+                        help="Mede também o tempo até o uvicorn responder /health (precisa do httpx)")
+    parser.add_argument("--orcamento-health-ms", type=float, default=750,
+                        help="Máximo até o primeiro /health com --servidor (mediana, padrão 750)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="corewood_inicializacao_") as pasta:
+        env = _ambiente(pasta)
+        medicoes = [medir_import(env) for _ in range(max(1, args.repeticoes))]
+        totais = sorted(next(cumulativo for nome, _, cumulativo in modulos if nome == "app.main") / 1000
+                        for _, modulos in medicoes)
+        _, modulos = medicoes[-1]
+
+        print(f"{'pacote':<28}{'ms':>10}")
+        print("-" * 38)
+        for pacote, proprio in sorted(por_pacote(modulos).items(), key=lambda p: -p[1])[:args.top]:
+            print(f"{pacote:<28}{proprio / 1000:>10.1f}")
+
+        mediana = statistics.median(totais)
+        parede = statistics.median(parede for parede, _ in medicoes)
+        print(f"\nimport app.main: mediana {mediana:.0f}ms (min {totais[0]:.0f}, máx {totais[-1]:.0f}) | "
+              f"processo {parede:.0f}ms | {len(modulos)} módulos")
+
+        falhas = []
+        carregados = {nome.split(".")[0] for nome, _, _ in modulos}
+        proibidos = [p for p in PROIBIDOS if p in carregados]
+        if proibidos:
+            falhas.append(f"módulos pesados no import: {', '.join(proibidos)}")
+        if mediana > args.orcamento_ms:
+            falhas.append(f"import {mediana:.0f}ms acima do orçamento de {args.orcamento_ms:.0f}ms")
+
+        if args.servidor:
+            tempos_health = sorted(medir_health(env) for _ in range(max(1, args.repeticoes)))
+            health = statistics.median(tempos_health)
+            print(f"primeiro /health: mediana {health:.0f}ms (min {tempos_health[0]:.0f}, "
+                  f"máx {tempos_health[-1]:.0f}) após iniciar o uvicorn")
+            if health > args.orcamento_health_ms:
+                falhas.append(f"/health em {health:.0f}ms acima do orçamento de "
+                              f"{args.orcamento_health_ms:.0f}ms")
+
+    for falha in falhas:
+        print(f"⚠️ {falha}")
+    if not falhas:
+        print("✅ Dentro do orçamento")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Medição das etapas: tempos por item, percentis, vazão e pico de RSS
+
+O pico de RSS é por etapa no Linux (VmHWM de /proc/self/status, zerado
+escrevendo "5" em /proc/self/clear_refs). Onde isso não existe fica o
+pico do processo inteiro (ru_maxrss) e o resultado marca escopo="processo".
+"""
+import resource
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+class EtapaIndisponivel(Exception):
+    """A etapa não roda neste ambiente (dependência ou corpus faltando)"""
+
+
+@dataclass
+class Item:
+    """Uma unidade medida da etapa (arquivo, peça, requisição)"""
+    nome: str
+    entrada: Any
+    bytes: int = 0
+
+
+@dataclass
+class Etapa:
+    nome: str
+    descricao: str
+    unidade: str
+    carregar: Callable[[], List[Item]]       # monta as entradas (fora da medição)
+    executar: Callable[[Any], Any]           # o que é medido, uma vez por item
+    antes: Optional[Callable[[], None]] = None  # antes de cada item, fora da medição (zerar caches)
+
+
+@dataclass
+class ResultadoEtapa:
+    nome: str
+    descricao: str
+    unidade: str
+    itens: int = 0
+    amostras_ms: List[float] = field(default_factory=list)
+    total_s: float = 0.0
+    bytes_processados: int = 0
+    pico_rss_mb: Optional[float] = None
+    escopo_rss: str = "etapa"
+    erros: Dict[str, str] = field(default_factory=dict)   # item -> primeira mensagem
+    pulada: Optional[str] = None
+
+    def resumo(self) -> Dict:
+        """Dict salvo no JSON (sem as amostras brutas)"""
+        if self.pulada:
+            return {'descricao': self.descricao, 'unidade': self.unidade, 'pulada': self.pulada}
+        amostras = sorted(self.amostras_ms)
+        return {
+            'descricao': self.descricao,
+            'unidade': self.unidade,
+            'itens': self.itens,
+            'amostras': len(amostras),
+            'p50_ms': round(percentil(amostras, 50), 3) if amostras else None,
+            'p95_ms': round(percentil(amostras, 95), 3) if amostras else None,
+            'media_ms': round(statistics.fmean(amostras), 3) if amostras else None,
+            'vazao_por_s': round(len(amostras) / self.total_s, 2) if self.total_s else None,
+            'mb_por_s': round(self.bytes_processados / 1e6 / self.total_s, 3)
+                        if self.total_s and self.bytes_processados else None,
+            'pico_rss_mb': round(self.pico_rss_mb, 1) if self.pico_rss_mb is not None else None,
+            'escopo_rss': self.escopo_rss,
+            'erros': dict(self.erros),
+        }
+
+
+def percentil(ordenadas: List[float], p: float) -> float:
+    """Percentil com interpolação linear (mesmo método 'inclusive' do statistics)"""
+    if len(ordenadas) == 1:
+        return ordenadas[0]
+    return statistics.quantiles(ordenadas, n=100, method='inclusive')[int(p) - 1]
+
+
+def zerar_pico_rss() -> bool:
+    """Zera o VmHWM do processo; False se o sistema não permite"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def pico_rss_mb() -> float:
+    """Pico de memória residente (desde o último zerar_pico_rss, se funcionou)"""
+    try:
+        with open('/proc/self/status') as f:
+            for linha in f:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def medir(etapa: Etapa, repeticoes: int = 5, aquecimento: int = 1) -> ResultadoEtapa:
+    """
+    Roda a etapa: `aquecimento` passadas sem medir (imports, fontes, JIT do
+    pandas...) e depois `repeticoes` passadas medindo cada item.
+    Item que falha é registrado em erros e não entra nas amostras.
+    """
+    resultado = ResultadoEtapa(etapa.nome, etapa.descricao, etapa.unidade)
+    try:
+        itens = etapa.carregar()
+    except EtapaIndisponivel as e:
+        resultado.pulada = str(e)
+        return resultado
+    if not itens:
+        resultado.pulada = "nenhum item no corpus"
+        return resultado
+    resultado.itens = len(itens)
+
+    def rodar(item: Item) -> Optional[float]:
+        if etapa.antes:
+            etapa.antes()
+        inicio = time.perf_counter()
+        try:
+            etapa.executar(item.entrada)
+        except Exception as e:
+            resultado.erros.setdefault(item.nome, f"{type(e).__name__}: {e}")
+            return None
+        return (time.perf_counter() - inicio) * 1000
+
+    for _ in range(aquecimento):
+        for item in itens:
+            rodar(item)
+
+    if not zerar_pico_rss():
+        resultado.escopo_rss = "processo"
+
+    for _ in range(repeticoes):
+        for item in itens:
+            ms = rodar(item)
+            if ms is not None:
+                resultado.amostras_ms.append(ms)
+                resultado.total_s += ms / 1000
+                resultado.bytes_processados += item.bytes
+
+    resultado.pico_rss_mb = pico_rss_mb()
+    return resultado
@@ -0,0 +1,420 @@
+"""
+Gerador de montagens sintéticas (STEP + MPRs) para testes de escala
+
+Gera um corpus no mesmo formato do zDocs, no tamanho que for preciso:
+    python -m benchmarks.sintetico saida/ --pecas 80 --furos-por-peca 60
+    python -m benchmarks --corpus saida/        # benchmarks sobre ele
+
+Conteúdo da pasta:
+- montagem.step: uma MANIFOLD_SOLID_BREP por painel (B-rep completo:
+  faces planas, furos cegos com CYLINDRICAL_SURFACE, CIRCLE na entrada e no
+  fundo) e fitas de borda de 0,45mm como sólidos "Borda"
+- mpr/<painel>.mpr: o MPR de cada painel (GeradorMPR), com os mesmos furos
+- sintetico.json: parâmetros e os furos esperados de cada painel
+
+Furos de cada painel (sistema 32):
+- verticais Ø5 em linhas a 37mm das bordas, passo 32mm ao longo do comprimento
+- horizontais Ø8 x 22mm (cavilhas) nas bordas XP/XM, no meio da espessura
+
+Os painéis ficam lado a lado em X, afastados (o StepMultiPartParser separa
+os furos de cada peça pelo bounding box). Coordenadas dos furos no sistema
+do parser: X = comprimento, Y = largura, Z = espessura, origem no canto.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+Vetor = Tuple[float, float, float]
+
+NOMES = ("LATERAL ESQUERDA", "LATERAL DIREITA", "BASE", "CHAPEU", "PRATELEIRA",
+         "DIVISAO", "PORTA", "FUNDO", "TRAVESSA", "GAVETA FRENTE")
+ESPESSURAS = (15.0, 18.0, 25.0)
+
+AFASTAMENTO_BORDA = 37.0   # mm: linha de furos até a borda (sistema 32)
+PASSO = 32.0
+ESPACO_LINHAS = 96.0       # entre linhas intermediárias de furos verticais
+DIAMETRO_VERTICAL = 5.0
+PROFUNDIDADE_VERTICAL = 12.0
+DIAMETRO_HORIZONTAL = 8.0
+PROFUNDIDADE_HORIZONTAL = 22.0
+ESPESSURA_FITA = 0.45      # abaixo de 1mm o parser OCC também descarta
+AFASTAMENTO_PAINEIS = 100.0
+
+
+# ----------------------------------------------------------------------
+# Painéis
+# ----------------------------------------------------------------------
+def _furos_verticais(comprimento: float, largura: float, espessura: float, quantidade: int) -> List[Dict]:
+    """Linhas de furos ao longo do comprimento: bordas primeiro, depois as do meio"""
+    linhas = [AFASTAMENTO_BORDA, largura - AFASTAMENTO_BORDA]
+    y = AFASTAMENTO_BORDA + ESPACO_LINHAS
+    while y < largura - AFASTAMENTO_BORDA - ESPACO_LINHAS / 2:
+        linhas.append(y)
+        y += ESPACO_LINHAS
+
+    colunas = []
+    x = AFASTAMENTO_BORDA
+    while x <= comprimento - AFASTAMENTO_BORDA:
+        colunas.append(x)
+        x += PASSO
+
+    profundidade = min(PROFUNDIDADE_VERTICAL, espessura - 3)
+    furos = []
+    for y in linhas:
+        for x in colunas:
+            if len(furos) == quantidade:
+                return furos
+            furos.append({'tipo': 'vertical', 'x': x, 'y': y, 'z': espessura,
+                          'diametro': DIAMETRO_VERTICAL, 'profundidade': profundidade, 'lado': 'LS'})
+    return furos
+
+
+def _furos_horizontais(comprimento: float, largura: float, espessura: float, por_lado: int) -> List[Dict]:
+    """Cavilhas igualmente espaçadas nas bordas XP (x=0) e XM (x=comprimento)"""
+    if por_lado <= 0:
+        return []
+    inicio, fim = AFASTAMENTO_BORDA, largura - AFASTAMENTO_BORDA
+    passo = (fim - inicio) / (por_lado - 1) if por_lado > 1 else 0
+    posicoes = [round(inicio + i * passo, 1) for i in range(por_lado)]
+    return [{'tipo': 'horizontal', 'x': x, 'y': y, 'z': espessura / 2,
+             'diametro': DIAMETRO_HORIZONTAL, 'profundidade': PROFUNDIDADE_HORIZONTAL, 'lado': lado}
+            for lado, x in (('XP', 0), ('XM', comprimento)) for y in posicoes]
+
+
+def furos_painel(comprimento: float, largura: float, espessura: float,
+                 verticais: int = 60, horizontais_por_lado: int = 4) -> List[Dict]:
+    """Furos de um painel (sistema de coordenadas do parser STEP)"""
+    return (_furos_verticais(comprimento, largura, espessura, verticais)
+            + _furos_horizontais(comprimento, largura, espessura, horizontais_por_lado))
+
+
+def gerar_paineis(pecas: int, furos_por_peca: int, horizontais_por_lado: int,
+                  semente: int = 42) -> List[Dict]:
+    """
+    Painéis aleatórios (reprodutíveis pela semente) no formato do parser STEP:
+    nome, largura, comprimento, espessura e furos
+    """
+    sorteio = random.Random(semente)
+    paineis = []
+    for i in range(1, pecas + 1):
+        comprimento = float(sorteio.randrange(600, 2401))
+        largura = float(sorteio.randrange(300, min(900, int(comprimento)) + 1))
+        espessura = sorteio.choice(ESPESSURAS)
+        paineis.append({
+            'nome': f"{NOMES[(i - 1) % len(NOMES)]} {i:03d}",
+            'largura': largura,
+            'comprimento': comprimento,
+            'espessura': espessura,
+            'furos': furos_painel(comprimento, largura, espessura, furos_por_peca, horizontais_por_lado),
+        })
+    return paineis
+
+
+# ----------------------------------------------------------------------
+# STEP
+# ----------------------------------------------------------------------
+def _real(valor: float) -> str:
+    """REAL do STEP: sempre com ponto, sem expoente ("15.", "-0.45")"""
+    texto = ("%.6f" % valor).rstrip('0')
+    return "0." if texto in ("-0.", "0.") else texto
+
+
+def _soma(a: Vetor, b: Vetor, fator: float = 1.0) -> Vetor:
+    return (a[0] + b[0] * fator, a[1] + b[1] * fator, a[2] + b[2] * fator)
+
+
+class EscritorStep:
+    """Acumula entidades do STEP (AP214) com numeração sequencial"""
+
+    def __init__(self):
+        self.linhas: List[str] = []
+
+    def _add(self, texto: str) -> int:
+        self.linhas.append(texto)
+        return len(self.linhas)
+
+    def ponto(self, p: Vetor) -> int:
+        return self._add(f"CARTESIAN_POINT('',({_real(p[0])},{_real(p[1])},{_real(p[2])}))")
+
+    def direcao(self, d: Vetor) -> int:
+        return self._add(f"DIRECTION('',({_real(d[0])},{_real(d[1])},{_real(d[2])}))")
+
+    def eixo(self, origem: Vetor, normal: Vetor, referencia: Vetor) -> int:
+        return self._add(f"AXIS2_PLACEMENT_3D('',#{self.ponto(origem)},"
+                         f"#{self.direcao(normal)},#{self.direcao(referencia)})")
+
+    def vertice(self, p: Vetor) -> int:
+        return self._add(f"VERTEX_POINT('',#{self.ponto(p)})")
+
+    def aresta_reta(self, va: int, vb: int, a: Vetor, b: Vetor) -> int:
+        delta = (b[0] - a[0], b[1] - a[1], b[2] - a[2])
+        tamanho = sum(c * c for c in delta) ** 0.5
+        direcao = tuple(c / tamanho for c in delta)
+        vetor = self._add(f"VECTOR('',#{self.direcao(direcao)},{_real(tamanho)})")
+        linha = self._add(f"LINE('',#{self.ponto(a)},#{vetor})")
+        return self._add(f"EDGE_CURVE('',#{va},#{vb},#{linha},.T.)")
+
+    def aresta_circulo(self, centro: Vetor, normal: Vetor, referencia: Vetor, raio: float) -> int:
+        """Círculo fechado (um vértice); sentido anti-horário em torno de `normal`"""
+        vertice = self.vertice(_soma(centro, referencia, raio))
+        circulo = self._add(f"CIRCLE('',#{self.eixo(centro, normal, referencia)},{_real(raio)})")
+        return self._add(f"EDGE_CURVE('',#{vertice},#{vertice},#{circulo},.T.)")
+
+    @staticmethod
+    def _orientada(aresta: int, sentido: bool) -> str:
+        return f"ORIENTED_EDGE('',*,*,#{aresta},.{'T' if sentido else 'F'}.)"
+
+    def laco(self, arestas: Sequence[Tuple[int, bool]], externo: bool = True) -> int:
+        orientadas = ",".join(f"#{self._add(self._orientada(aresta, sentido))}" for aresta, sentido in arestas)
+        loop = self._add(f"EDGE_LOOP('',({orientadas}))")
+        tipo = "FACE_OUTER_BOUND" if externo else "FACE_BOUND"
+        return self._add(f"{tipo}('',#{loop},.T.)")
+
+    def face(self, limites: Sequence[int], superficie: int, mesmo_sentido: bool = True) -> int:
+        refs = ",".join(f"#{i}" for i in limites)
+        return self._add(f"ADVANCED_FACE('',({refs}),#{superficie},.{'T' if mesmo_sentido else 'F'}.)")
+
+    def plano(self, origem: Vetor, normal: Vetor, referencia: Vetor) -> int:
+        return self._add(f"PLANE('',#{self.eixo(origem, normal, referencia)})")
+
+    # ------------------------------------------------------------------
+    def furo(self, entrada: Vetor, direcao: Vetor, diametro: float,
+             profundidade: float) -> Tuple[int, List[int]]:
+        """
+        Furo cego entrando por `entrada` no sentido `direcao` (para dentro do
+        material). Devolve (FACE_BOUND para a face de entrada, [face
+        cilíndrica, face do fundo]).
+        """
+        raio = diametro / 2
+        referencia = (0.0, 0.0, 1.0) if abs(direcao[0]) > 0.5 else (1.0, 0.0, 0.0)
+        fundo = _soma(entrada, direcao, profundidade)
+        borda_entrada = self.aresta_circulo(entrada, direcao, referencia, raio)
+        borda_fundo = self.aresta_circulo(fundo, direcao, referencia, raio)
+
+        # Na face de entrada o furo é um laço interno (horário em torno da normal externa)
+        limite_entrada = self.laco([(borda_entrada, True)], externo=False)
+        cilindro = self._add(f"CYLINDRICAL_SURFACE('',#{self.eixo(entrada, direcao, referencia)},{_real(raio)})")
+        lateral = self.face([self.laco([(borda_entrada, False)]), self.laco([(borda_fundo, True)], externo=False)],
+                            cilindro, mesmo_sentido=False)
+        normal_fundo = (-direcao[0], -direcao[1], -direcao[2])
+        tampa = self.face([self.laco([(borda_fundo, False)])], self.plano(fundo, normal_fundo, referencia))
+        return limite_entrada, [lateral, tampa]
+
+    def caixa(self, minimo: Vetor, maximo: Vetor, furos: Sequence[Tuple[Vetor, Vetor, float, float]] = ()) -> int:
+        """
+        CLOSED_SHELL de uma caixa alinhada aos eixos com furos cegos
+        (entrada, direção, diâmetro, profundidade); a entrada deve estar numa face.
+        """
+        cantos = [(maximo[0] if i & 1 else minimo[0], maximo[1] if i & 2 else minimo[1],
+                   maximo[2] if i & 4 else minimo[2]) for i in range(8)]
+        vertices = [self.vertice(c) for c in cantos]
+        arestas: Dict[Tuple[int, int], int] = {}
+
+        def aresta(a: int, b: int) -> Tuple[int, bool]:
+            chave = (min(a, b), max(a, b))
+            if chave not in arestas:
+                arestas[chave] = self.aresta_reta(vertices[chave[0]], vertices[chave[1]],
+                                                  cantos[chave[0]], cantos[chave[1]])
+            return arestas[chave], a < b
+
+        # (normal externa, referência, cantos em sentido anti-horário em torno da normal)
+        faces = [
+            ((0, 0, -1), (1, 0, 0), (0, 2, 3, 1)),
+            ((0, 0, 1), (1, 0, 0), (4, 5, 7, 6)),
+            ((-1, 0, 0), (0, 1, 0), (0, 4, 6, 2)),
+            ((1, 0, 0), (0, 1, 0), (1, 3, 7, 5)),
+            ((0, -1, 0), (1, 0, 0), (0, 1, 5, 4)),
+            ((0, 1, 0), (1, 0, 0), (2, 6, 7, 3)),
+        ]
+        internos: Dict[int, List[int]] = {i: [] for i in range(len(faces))}
+        extras: List[int] = []
+        for entrada, direcao, diametro, profundidade in furos:
+            # Face de entrada: a normal externa é o oposto da direção do furo
+            indice = next(i for i, (normal, _, _) in enumerate(faces)
+                          if all(n == -d for n, d in zip(normal, direcao)))
+            limite, novas = self.furo(entrada, direcao, diametro, profundidade)
+            internos[indice].append(limite)
+            extras += novas
+
+        ids = []
+        for i, (normal, referencia, ordem) in enumerate(faces):
+            externo = self.laco([aresta(ordem[k], ordem[(k + 1) % 4]) for k in range(4)])
+            plano = self.plano(cantos[ordem[0]], tuple(float(n) for n in normal),
+                               tuple(float(r) for r in referencia))
+            ids.append(self.face([externo] + internos[i], plano))
+        refs = ",".join(f"#{i}" for i in ids + extras)
+        return self._add(f"CLOSED_SHELL('',({refs}))")
+
+    def texto(self, nome_arquivo: str) -> Iterator[str]:
+        yield "ISO-10303-21;\nHEADER;\n"
+        yield "FILE_DESCRIPTION(('STEP AP214'),'1');\n"
+        yield (f"FILE_NAME('{nome_arquivo}','{time.strftime('%Y-%m-%dT%H:%M:%S')}',(' '),(' '),"
+               f"'CoreWood benchmarks.sintetico',' ',' ');\n")
+        yield "FILE_SCHEMA(('AUTOMOTIVE_DESIGN { 1 0 10303 214 1 1 1 1 }'));\nENDSEC;\nDATA;\n"
+        for i, linha in enumerate(self.linhas, start=1):
+            yield f"#{i}={linha};\n"
+        yield "ENDSEC;\nEND-ISO-10303-21;\n"
+
+
+def _solidos(paineis: Sequence[Dict], bordas: int) -> Iterator[Tuple[str, Vetor, Vetor, list]]:
+    """(nome, mínimo, máximo, furos STEP) dos painéis lado a lado e das fitas de borda"""
+    x = 0.0
+    for painel in paineis:
+        c, l, e = painel['comprimento'], painel['largura'], painel['espessura']
+        furos = []
+        for furo in painel['furos']:
+            if furo['tipo'] == 'vertical':
+                furos.append(((x + furo['x'], furo['y'], e), (0.0, 0.0, -1.0),
+                              furo['diametro'], furo['profundidade']))
+            else:
+                sentido = 1.0 if furo['lado'] == 'XP' else -1.0
+                furos.append(((x + furo['x'], furo['y'], furo['z']), (sentido, 0.0, 0.0),
+                              furo['diametro'], furo['profundidade']))
+        yield painel['nome'], (x, 0.0, 0.0), (x + c, l, e), furos
+
+        # Fitas: frente, fundo (bordas em Y) e depois topos (bordas em X)
+        fitas = [((x, -ESPESSURA_FITA, 0.0), (x + c, 0.0, e)),
+                 ((x, l, 0.0), (x + c, l + ESPESSURA_FITA, e)),
+                 ((x - ESPESSURA_FITA, 0.0, 0.0), (x, l, e)),
+                 ((x + c, 0.0, 0.0), (x + c + ESPESSURA_FITA, l, e))]
+        for minimo, maximo in fitas[:bordas]:
+            yield "Borda", minimo, maximo, []
+        x += c + AFASTAMENTO_PAINEIS
+
+
+def escrever_step(paineis: Sequence[Dict], destino: Path, bordas: int = 1) -> int:
+    """Grava o STEP da montagem; devolve o número de entidades"""
+    step = EscritorStep()
+    contexto = step._add(
+        "APPLICATION_CONTEXT('core data for automotive mechanical design processes')")
+    step._add(f"APPLICATION_PROTOCOL_DEFINITION('international standard','automotive_design',2000,#{contexto})")
+    contexto_produto = step._add(f"PRODUCT_CONTEXT('',#{contexto},'mechanical')")
+    produto = step._add(f"PRODUCT('MONTAGEM','MONTAGEM','',(#{contexto_produto}))")
+    formacao = step._add(f"PRODUCT_DEFINITION_FORMATION('','',#{produto})")
+    contexto_definicao = step._add(f"PRODUCT_DEFINITION_CONTEXT('part definition',#{contexto},'design')")
+    definicao = step._add(f"PRODUCT_DEFINITION('design','',#{formacao},#{contexto_definicao})")
+    forma = step._add(f"PRODUCT_DEFINITION_SHAPE('','',#{definicao})")
+
+    # Contexto geométrico em milímetros (entidade complexa, como os exportadores CAD gravam)
+    milimetro = step._add("( LENGTH_UNIT() NAMED_UNIT(*) SI_UNIT(.MILLI.,.METRE.) )")
+    radiano = step._add("( NAMED_UNIT(*) PLANE_ANGLE_UNIT() SI_UNIT($,.RADIAN.) )")
+    esterradiano = step._add("( NAMED_UNIT(*) SI_UNIT($,.STERADIAN.) SOLID_ANGLE_UNIT() )")
+    incerteza = step._add(f"UNCERTAINTY_MEASURE_WITH_UNIT(LENGTH_MEASURE(1.E-04),#{milimetro},"
+                          f"'distance_accuracy_value','confusion accuracy')")
+    geometria = step._add(
+        f"( GEOMETRIC_REPRESENTATION_CONTEXT(3) GLOBAL_UNCERTAINTY_ASSIGNED_CONTEXT((#{incerteza})) "
+        f"GLOBAL_UNIT_ASSIGNED_CONTEXT((#{milimetro},#{radiano},#{esterradiano})) "
+        f"REPRESENTATION_CONTEXT('Context #1','3D Context with UNIT and UNCERTAINTY') )")
+
+    for nome, minimo, maximo, furos in _solidos(paineis, bordas):
+        solido = step._add(f"MANIFOLD_SOLID_BREP('{nome}',#{step.caixa(minimo, maximo, furos)})")
+        origem = step.eixo((0.0, 0.0, 0.0), (0.0, 0.0, 1.0), (1.0, 0.0, 0.0))
+        representacao = step._add(
+            f"ADVANCED_BREP_SHAPE_REPRESENTATION('{nome}',(#{solido},#{origem}),#{geometria})")
+        step._add(f"SHAPE_DEFINITION_REPRESENTATION(#{forma},#{representacao})")
+
+    with open(destino, "w", encoding="utf-8", newline="\n") as arquivo:
+        arquivo.writelines(step.texto(destino.name))
+    return len(step.linhas)
+
+
+# ----------------------------------------------------------------------
+# Corpus
+# ----------------------------------------------------------------------
+def gerar_corpus(saida: Path, pecas: int = 80, furos_por_peca: int = 60,
+                 horizontais_por_lado: int = 4, bordas: int = 1, semente: int = 42) -> Dict:
+    """Grava montagem.step, mpr/*.mpr e sintetico.json em `saida`; devolve o resumo"""
+    from app.generators.lote_mpr import dados_mpr, nome_arquivo_mpr
+    from app.generators.mpr_generator import GeradorMPR
+
+    paineis = gerar_paineis(pecas, furos_por_peca, horizontais_por_lado, semente)
+    (saida / "mpr").mkdir(parents=True, exist_ok=True)
+
+    inicio = time.perf_counter()
+    entidades = escrever_step(paineis, saida / "montagem.step", bordas)
+    gerador = GeradorMPR()
+    for i, painel in enumerate(paineis, start=1):
+        with open(saida / "mpr" / f"{nome_arquivo_mpr(painel['nome'], f'peca_{i}')}.mpr", "wb") as arquivo:
+            gerador.escrever_mpr(dados_mpr(painel), arquivo)
+
+    resumo = {
+        'parametros': {'pecas': pecas, 'furos_por_peca': furos_por_peca,
+                       'horizontais_por_lado': horizontais_por_lado, 'bordas': bordas, 'semente': semente},
+        'entidades_step': entidades,
+        'bytes_step': (saida / "montagem.step").stat().st_size,
+        'furos': sum(len(p['furos']) for p in paineis),
+        'geracao_s': round(time.perf_counter() - inicio, 2),
+        'paineis': paineis,
+    }
+    (saida / "sintetico.json").write_text(json.dumps(resumo, ensure_ascii=False, indent=1), encoding="utf-8")
+    return resumo
+
+
+def verificar(saida: Path) -> List[str]:
+    """
+    Lê o montagem.step com o StepMultiPartParser e confere dimensões e furos
+    de cada painel contra o sintetico.json. Devolve as divergências.
+    """
+    from app.parser.step_parser import parse_step_multipart
+
+    esperado = {p['nome']: p for p in json.loads((saida / "sintetico.json").read_text(encoding="utf-8"))['paineis']}
+    lido = parse_step_multipart((saida / "montagem.step").read_text(encoding="utf-8"))
+
+    def chave(furo: Dict) -> Tuple:
+        return (furo['tipo'], furo['lado'], round(float(furo['x']), 1), round(float(furo['y']), 1))
+
+    divergencias = []
+    for peca in lido['pecas']:
+        painel = esperado.pop(peca['nome'], None)
+        if painel is None:
+            divergencias.append(f"{peca['nome']}: peça inesperada")
+            continue
+        dims = (peca['largura'], peca['comprimento'], peca['espessura'])
+        if dims != (painel['largura'], painel['comprimento'], painel['espessura']):
+            divergencias.append(f"{peca['nome']}: dimensões {dims}")
+        faltando = {chave(f) for f in painel['furos']} - {chave(f) for f in peca['furos']}
+        sobrando = {chave(f) for f in peca['furos']} - {chave(f) for f in painel['furos']}
+        if faltando or sobrando:
+            divergencias.append(f"{peca['nome']}: {len(faltando)} furos faltando, {len(sobrando)} sobrando")
+    divergencias += [f"{nome}: não encontrada no STEP" for nome in esperado]
+    return divergencias
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.sintetico",
+                                     description="Gera STEP + MPRs sintéticos para testes de escala")
+    parser.add_argument("saida", type=Path, help="Pasta de saída (vira um corpus do python -m benchmarks)")
+    parser.add_argument("--pecas", type=int, default=80, help="Painéis na montagem (padrão 80)")
+    parser.add_argument("--furos-por-peca", type=int, default=60,
+                        help="Furos verticais por painel, limitado ao que cabe (padrão 60)")
+    parser.add_argument("--horizontais-por-lado", type=int, default=4,
+                        help="Cavilhas em cada borda XP/XM (padrão 4)")
+    parser.add_argument("--bordas", type=int, default=1, choices=range(5),
+                        help="Fitas de borda por painel, 0 a 4 (padrão 1)")
+    parser.add_argument("--semente", type=int, default=42, help="Semente das dimensões (padrão 42)")
+    parser.add_argument("--verificar", action="store_true",
+                        help="Relê o STEP com o StepMultiPartParser e confere os furos")
+    args = parser.parse_args(argv)
+
+    resumo = gerar_corpus(args.saida, args.pecas, args.furos_por_peca, args.horizontais_por_lado,
+                          args.bordas, args.semente)
+    print(f"✅ {args.pecas} painéis, {resumo['furos']} furos, {resumo['entidades_step']} entidades "
+          f"({resumo['bytes_step'] / 1e6:.1f} MB) em {resumo['geracao_s']}s -> {args.saida}")
+
+    if args.verificar:
+        inicio = time.perf_counter()
+        divergencias = verificar(args.saida)
+        print(f"🔍 Verificação em {time.perf_counter() - inicio:.1f}s: "
+              f"{'ok' if not divergencias else f'{len(divergencias)} divergências'}")
+        for divergencia in divergencias[:20]:
+            print(f"   ⚠️ {divergencia}")
+        return 1 if divergencias else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())